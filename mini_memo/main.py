@@ -15,6 +15,7 @@ import sys
 import collections
 import yaml
 import jinja2
+import functools
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
@@ -75,8 +76,14 @@ class Message(yaml.YAMLObject):
     def __repr__(self):
         return "{!s}(msg={!r), created={!r})".format(self.__class__.__name__, self.msg, self.created)
     
+_jinja2_environment = jinja2.Environment()
+
+@functools.lru_cache(maxsize=None)
+def _get_template(template_s):
+    return _jinja2_environment.from_string(template_s)
+
 def convert_to_evernote_format(messages, template_s=EVERNOTE_TEMPLATE):
-    template = jinja2.Template(template_s)
+    template = _get_template(template_s)
     return template.render(messages=messages)
 
 def proc_insert(args):
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Fri Oct 23 09:18:36 2026
+
+@author: yuki_next
+
+parse benchmark of every crawler over a recorded corpus of overview and detail pages.
+
+record: fetch the entry urls of each site, and copy the newest cached detail pages (html, json, pdf) of the work dir.
+        every response of recipe_crawler.sessions.get while parsing is recorded too,
+        as some crawlers fetch more pages in _get_recipe_overviews.
+run:    replay the corpus without network access, and time _convert_overview_content, _get_recipe_overviews,
+        _convert_detail_content and _recipe_details_generator separately. pages/sec and peak memory (tracemalloc) per site.
+        with --check, exit with 1 if a site is slower or uses more memory than the baseline by --tolerance.
+
+benchmarks/corpus is a synthetic corpus of every crawler made by synthetic_corpus.py, and corpus_baseline.json is its baseline.
+record overwrites the corpus of a site with the real pages.
+
+run in the scraper directory:
+    python benchmarks/corpus_benchmark.py record --work-dir .work_recipes [sites...]
+    python benchmarks/corpus_benchmark.py run --update-baseline
+    python benchmarks/corpus_benchmark.py run --check
+"""
+import argparse
+import hashlib
+import json
+import pathlib
+import pickle
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+
+import requests
+import yaml
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+import recipe_crawler.sessions
+from parser_benchmark import get_crawlers_map, load_overview_recipes, get_overview_recipe
+
+benchmark_dir = pathlib.Path(__file__).resolve().parent
+
+def crawler_args(work_dir):
+    return types.SimpleNamespace(work_dir=work_dir, processed_list_filename_postfix="_processed_data.txt", parse_workers=1)
+
+class ResponseRecorder(object):
+    """
+    wrap recipe_crawler.sessions.get and keep every response. key: url
+    """
+    def __init__(self):
+        self.responses = dict()
+        self._get = None
+
+    def __enter__(self):
+        self._get = recipe_crawler.sessions.get
+        def get(url, **kwargs):
+            kwargs.pop("headers", None) # no conditional request. the body is always needed
+            res = self._get(url, **kwargs)
+            self.responses[url] = res
+            return res
+        recipe_crawler.sessions.get = get
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        recipe_crawler.sessions.get = self._get
+        return False
+
+class ResponseReplayer(object):
+    """
+    replace recipe_crawler.sessions.get with the recorded responses of the corpus
+    """
+    def __init__(self, corpus_dir, corpus):
+        self.corpus_dir = corpus_dir
+        self.corpus = corpus
+        self._get = None
+
+    def __enter__(self):
+        self._get = recipe_crawler.sessions.get
+        recipe_crawler.sessions.get = self.get
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        recipe_crawler.sessions.get = self._get
+        return False
+
+    def get(self, url, **kwargs):
+        entry = self.corpus["responses"].get(url)
+        if entry is None:
+            raise RuntimeError("not recorded: {}".format(url))
+        res = requests.Response()
+        res.url = url
+        res.status_code = entry["status_code"]
+        res._content = (self.corpus_dir / "responses" / entry["filename"]).read_bytes()
+        if entry["content_type"]:
+            res.headers["Content-Type"] = entry["content_type"]
+        return res
+
+def record_site(site, site_config, crawler, args):
+    corpus_dir = args.corpus_dir / site
+    (corpus_dir / "responses").mkdir(parents=True, exist_ok=True)
+    (corpus_dir / "details").mkdir(parents=True, exist_ok=True)
+
+    corpus = {"site": site, "overview_urls": list(), "responses": dict(), "details": list()}
+    with ResponseRecorder() as recorder:
+        crawler.init(crawler_args(args.work_dir), site_config)
+        for entry_url in crawler.entry_urls[:args.max_overviews]:
+            res = recipe_crawler.sessions.get(entry_url)
+            if not res.ok:
+                print("{}: {} {}".format(site, res.status_code, entry_url), file=sys.stderr)
+                continue
+            try:
+                list(crawler._parse_overview_content(res.content, entry_url))
+            except Exception as e:
+                print("{}: skip broken overview {}: {!r}".format(site, entry_url, e), file=sys.stderr)
+                continue
+            corpus["overview_urls"].append(entry_url)
+
+        overview_recipes = load_overview_recipes(crawler.cache_dir)
+        target_fns = [target_fn for target_fn in sorted(crawler.cache_dir.glob("[!_|.*]*"), key=lambda k: crawler._sortkey_cache_filename(k)) if crawler._is_valid_cache_filename(target_fn)]
+        recorded_overview_recipes = dict()
+        for target_fn in target_fns[-args.max_pages:]:
+            recipe_id = crawler._get_recipe_id_from_cache_file(target_fn)
+            entry = crawler.manifest.get(target_fn.name)
+            content_type = entry["content_type"] if entry else None
+            content = target_fn.read_bytes()
+            overview_recipe = get_overview_recipe(crawler, overview_recipes, recipe_id, target_fn)
+            try:
+                crawler._parse_detail_content(content, overview_recipe, content_type=content_type)
+            except Exception as e:
+                print("{}: skip broken page {}: {!r}".format(site, target_fn.name, e), file=sys.stderr)
+                continue
+            (corpus_dir / "details" / target_fn.name).write_bytes(content)
+            corpus["details"].append({"filename": target_fn.name, "recipe_id": recipe_id, "content_type": content_type})
+            recorded_overview_recipes[recipe_id] = overview_recipe
+
+    for url, res in recorder.responses.items():
+        filename = hashlib.sha256(url.encode("utf-8")).hexdigest()[:16]
+        (corpus_dir / "responses" / filename).write_bytes(res.content)
+        corpus["responses"][url] = {"filename": filename, "status_code": res.status_code, "content_type": res.headers.get("Content-Type")}
+
+    with (corpus_dir / "overview_recipes.pickle").open("wb") as fp:
+        pickle.dump(recorded_overview_recipes, fp)
+    (corpus_dir / "corpus.json").write_text(json.dumps(corpus, ensure_ascii=False, indent=1))
+    print("{}: {} overview pages, {} detail pages, {} responses".format(site, len(corpus["overview_urls"]), len(corpus["details"]), len(corpus["responses"])))
+
+def run_corpus(crawler, corpus_dir, corpus, overview_recipes, details):
+    """
+    parse the corpus once. return seconds of each stage
+    """
+    stage_sec = dict([(stage, 0.0) for stage in ("convert_overview", "overviews", "convert_detail", "details")])
+    for entry_url in corpus["overview_urls"]:
+        raw_content = recipe_crawler.sessions.get(entry_url).content
+        t0 = time.perf_counter()
+        converted_content = crawler._convert_overview_content(raw_content)
+        t1 = time.perf_counter()
+        list(crawler._get_recipe_overviews(converted_content, entry_url))
+        t2 = time.perf_counter()
+        stage_sec["convert_overview"] += t1 - t0
+        stage_sec["overviews"] += t2 - t1
+
+    for detail, raw_content in details:
+        crawler._content_type = detail["content_type"]
+        try:
+            t0 = time.perf_counter()
+            converted_content = crawler._convert_detail_content(raw_content)
+            t1 = time.perf_counter()
+            list(crawler._recipe_details_generator(converted_content, overview_recipes.get(detail["recipe_id"])))
+            t2 = time.perf_counter()
+        finally:
+            crawler._content_type = None
+        stage_sec["convert_detail"] += t1 - t0
+        stage_sec["details"] += t2 - t1
+    return stage_sec
+
+def bench_site(site, site_config, crawler, args):
+    corpus_dir = args.corpus_dir / site
+    corpus = json.loads((corpus_dir / "corpus.json").read_text())
+    with (corpus_dir / "overview_recipes.pickle").open("rb") as fp:
+        overview_recipes = pickle.load(fp)
+    details = [(detail, (corpus_dir / "details" / detail["filename"]).read_bytes()) for detail in corpus["details"]]
+
+    with tempfile.TemporaryDirectory() as tmp_dir, ResponseReplayer(corpus_dir, corpus):
+        crawler.init(crawler_args(pathlib.Path(tmp_dir)), dict(site_config, is_expand_entry_urls=False))
+        run_corpus(crawler, corpus_dir, corpus, overview_recipes, details) # warm up
+
+        best_stage_sec = None
+        for _ in range(args.repeat):
+            stage_sec = run_corpus(crawler, corpus_dir, corpus, overview_recipes, details)
+            if best_stage_sec is None or sum(stage_sec.values()) < sum(best_stage_sec.values()):
+                best_stage_sec = stage_sec
+
+        tracemalloc.start()
+        run_corpus(crawler, corpus_dir, corpus, overview_recipes, details)
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    page_num = len(corpus["overview_urls"]) + len(details)
+    return {
+        "overview_pages": len(corpus["overview_urls"]),
+        "detail_pages": len(details),
+        "stage_sec": best_stage_sec,
+        "ms_per_page": sum(best_stage_sec.values()) * 1000 / max(1, page_num),
+        "pages_per_sec": page_num / max(1e-9, sum(best_stage_sec.values())),
+        "peak_kb": peak_bytes / 1024,
+    }
+
+def compare_baseline(result, baseline, tolerance):
+    if baseline is None:
+        return "new"
+    regressions = list()
+    if baseline["ms_per_page"] * (1 + tolerance) < result["ms_per_page"]:
+        regressions.append("time x{:.2f}".format(result["ms_per_page"] / baseline["ms_per_page"]))
+    if baseline["peak_kb"] * (1 + tolerance) < result["peak_kb"]:
+        regressions.append("memory x{:.2f}".format(result["peak_kb"] / baseline["peak_kb"]))
+    return "REGRESSED " + ", ".join(regressions) if len(regressions) else "ok"
+
+def proc_record(args, config, crawlers_map):
+    sites = args.sites if len(args.sites) else [site for site in config.keys() if site in crawlers_map and config[site].get("enable", True)]
+    for site in sites:
+        if not (site in config and site in crawlers_map):
+            print("not exist: {}".format(site), file=sys.stderr)
+            continue
+        record_site(site, config[site], crawlers_map[site], args)
+    return 0
+
+def proc_run(args, config, crawlers_map):
+    recorded_sites = sorted([corpus_fn.parent.name for corpus_fn in args.corpus_dir.glob("*/corpus.json")])
+    sites = args.sites if len(args.sites) else recorded_sites
+    if not len(sites):
+        print("no corpus in {}. record it first".format(args.corpus_dir), file=sys.stderr)
+        return 1
+
+    baselines = dict()
+    if args.baseline_filename.exists():
+        baselines.update(json.loads(args.baseline_filename.read_text()))
+
+    is_regressed = False
+    results = dict()
+    print("stage columns are total ms over the pages of the site")
+    print("{:<28} {:>5} {:>5} {:>9} {:>9} {:>9} {:>9} {:>9} {:>9}  {}".format(
+            "site", "ov", "detail", "conv ov", "overview", "conv det", "details", "pages/s", "peak MB", "baseline"))
+    for site in sites:
+        if not (site in config and site in crawlers_map and site in recorded_sites):
+            print("not exist: {}".format(site), file=sys.stderr)
+            continue
+        result = bench_site(site, config[site], crawlers_map[site], args)
+        results[site] = result
+        status = compare_baseline(result, baselines.get(site), args.tolerance)
+        is_regressed |= status.startswith("REGRESSED")
+        stage_ms = dict([(stage, sec * 1000) for stage, sec in result["stage_sec"].items()])
+        print("{:<28} {:>5} {:>5} {:>9.2f} {:>9.2f} {:>9.2f} {:>9.2f} {:>9.1f} {:>9.2f}  {}".format(
+                site, result["overview_pages"], result["detail_pages"],
+                stage_ms["convert_overview"], stage_ms["overviews"], stage_ms["convert_detail"], stage_ms["details"],
+                result["pages_per_sec"], result["peak_kb"] / 1024, status))
+
+    if args.update_baseline:
+        for site, result in results.items():
+            baselines[site] = {"ms_per_page": result["ms_per_page"], "peak_kb": result["peak_kb"]}
+        args.baseline_filename.write_text(json.dumps(baselines, indent=1, sort_keys=True))
+        print("baseline updated: {}".format(args.baseline_filename))
+
+    if args.check and is_regressed:
+        return 1
+    return 0
+
+def main():
+    root_dir = benchmark_dir.parent
+    common_parser = argparse.ArgumentParser(add_help=False)
+    common_parser.add_argument("sites", nargs="*", help="site name in config yaml file. no input is all sites.")
+    common_parser.add_argument("--config-yaml-filename", default=root_dir / "recipe_crawler_config.yml", type=pathlib.Path)
+    common_parser.add_argument("--corpus-dir", default=benchmark_dir / "corpus", type=pathlib.Path)
+
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers()
+
+    parser_record = subparsers.add_parser("record", parents=[common_parser], help="record the corpus from the sites and the work dir")
+    parser_record.add_argument("--work-dir", default=root_dir / ".work_recipes", type=pathlib.Path, help="working directory of recipe_main.py")
+    parser_record.add_argument("--max-overviews", default=2, type=int, help="number of entry urls per site")
+    parser_record.add_argument("--max-pages", default=20, type=int, help="newest N cached detail pages per site")
+    parser_record.set_defaults(handler=proc_record)
+
+    parser_run = subparsers.add_parser("run", parents=[common_parser], help="benchmark the recorded corpus")
+    parser_run.add_argument("--repeat", default=3, type=int, help="the best of N runs is reported")
+    parser_run.add_argument("--baseline-filename", default=benchmark_dir / "corpus_baseline.json", type=pathlib.Path)
+    parser_run.add_argument("--update-baseline", action="store_true")
+    parser_run.add_argument("--check", action="store_true", help="exit with 1 if a site regresses past the baseline")
+    parser_run.add_argument("--tolerance", default=0.5, type=float, help="allowed ratio over the baseline")
+    parser_run.set_defaults(handler=proc_run)
+
+    args = parser.parse_args()
+    if not hasattr(args, "handler"):
+        parser.print_help()
+        return 2
+
+    config = yaml.safe_load(args.config_yaml_filename.open("r").read())
+    return args.handler(args, config, get_crawlers_map())
+
+if __name__ == "__main__":
+    sys.exit(main())
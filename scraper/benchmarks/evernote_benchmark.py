@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Thu Oct 22 11:02:09 2026
+
+@author: yuki_next
+
+drive recipe_main.store_evernote against the in-process fake evernote account
+and report notes/second and api calls per note for some numbers of upload workers.
+recipes are read from the recipe store of --work-dir (_recipes.sqlite3), or made up if it does not exist.
+images are dropped unless --keep-images, so that no network access is needed.
+run in the scraper directory (recipe_main reads recipe_crawler_logging.yml and writes logs/):
+    python benchmarks/evernote_benchmark.py --notes 300 --workers 1,3,6 --latency 0.05
+"""
+import argparse
+import pathlib
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+import recipe_main
+import recipe_crawler.evernote_mirror
+import recipe_crawler.fake_note_store
+import recipe_crawler.stores
+from template_benchmark import create_sample_recipe
+
+def load_recipes(args):
+    db_filename = args.work_dir / "_recipes.sqlite3"
+    if db_filename.exists():
+        with recipe_crawler.stores.RecipeStore(db_filename) as recipe_store:
+            recipes = recipe_store.find(site=args.site, limit=args.notes)
+        print("corpus: {} recipes from {}".format(len(recipes), db_filename))
+    else:
+        recipes = [create_sample_recipe(i) for i in range(args.notes)]
+        print("corpus: {} made up recipes".format(len(recipes)))
+
+    if not args.keep_images:
+        for recipe in recipes:
+            recipe.image_urls = list()
+            for recipe_text in recipe.materials + recipe.recipe_steps:
+                recipe_text.image_urls = list()
+    return recipes
+
+def bench(recipes, workers, args):
+    account = recipe_crawler.fake_note_store.FakeEvernoteAccount(latency=args.latency, rate_limit=args.rate_limit, rate_limit_window=args.rate_limit_window)
+    evernote_cred = {
+        "is_sandbox": True,
+        "developer_token": None,
+        "notebook_name": "benchmark",
+        "fake_account": account,
+    }
+    site_config = {"program_name": "benchmark"}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        notebook_mirror = None
+        if not args.no_notebook_mirror:
+            notebook_mirror = recipe_crawler.evernote_mirror.NotebookMirror(pathlib.Path(tmp_dir) / "_evernote_mirror.json")
+        uploader = recipe_main.create_evernote_uploader(evernote_cred, workers=workers)
+
+        t0 = time.perf_counter()
+        with uploader:
+            stored_num = sum(1 for _ in recipe_main.store_evernote(lambda: iter(recipes), None, site_config, evernote_cred,
+                                                                    notebook_mirror=notebook_mirror, uploader=uploader))
+        elapsed = time.perf_counter() - t0
+
+    note_num = len(account.notes)
+    print("workers: {:2d} stored: {:5d} created: {:5d} {:8.1f} notes/sec {:6.2f} api calls/note, rate limit reached: {}".format(
+            workers, stored_num, note_num, note_num / elapsed, sum(account.calls.values()) / max(1, note_num), account.rate_limit_reached_num))
+    print("    " + ", ".join(["{}: {}".format(name, num) for name, num in sorted(account.calls.items())]))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--work-dir", default=pathlib.Path(__file__).resolve().parent.parent / ".work_recipes", type=pathlib.Path, help="working directory of recipe_main.py")
+    parser.add_argument("--site", help="site of recipes in the recipe store")
+    parser.add_argument("--notes", default=300, type=int, help="max number of notes uploaded")
+    parser.add_argument("--workers", default="1,3,6", help="comma separated numbers of upload workers")
+    parser.add_argument("--latency", default=0.05, type=float, help="seconds of each api call")
+    parser.add_argument("--rate-limit", default=None, type=int, help="max api calls in --rate-limit-window seconds")
+    parser.add_argument("--rate-limit-window", default=1.0, type=float)
+    parser.add_argument("--no-notebook-mirror", action="store_true", help="check existed notes by findNotesMetadata")
+    parser.add_argument("--keep-images", action="store_true", help="download images of recipes")
+    args = parser.parse_args()
+
+    recipes = load_recipes(args)
+    for workers in [int(w) for w in args.workers.split(",")]:
+        bench(recipes, workers, args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 14:05:38 2026
+
+@author: yuki_next
+
+compare html5lib and lxml parse time over the cached detail pages in the work dir.
+run in the scraper directory:
+    python benchmarks/parser_benchmark.py --work-dir .work_recipes [sites...]
+"""
+import argparse
+import inspect
+import pathlib
+import pickle
+import sys
+import time
+
+import yaml
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+import recipe_crawler.crawlers
+import recipe_crawler.models
+
+def get_crawlers_map():
+    crawlers = [crawler_clazz() for _, crawler_clazz in inspect.getmembers(recipe_crawler.crawlers, inspect.isclass) if issubclass(crawler_clazz, recipe_crawler.crawlers.bases.RecipeCrawlerTemplate) and not inspect.isabstract(crawler_clazz)]
+    return dict([(crawler.site_name, crawler) for crawler in crawlers])
+
+def load_overview_recipes(cache_dir):
+    ret = dict() # key: Recipe.id, value: Recipe
+    store_filename = cache_dir / "_overviews.pickle"
+    if store_filename.exists():
+        with store_filename.open("rb") as fp:
+            for entry in pickle.load(fp).values():
+                ret.update(entry["recipes"])
+    return ret
+
+def get_overview_recipe(crawler, overview_recipes, recipe_id, target_fn):
+    if recipe_id in overview_recipes:
+        return overview_recipes[recipe_id]
+    recipe = recipe_crawler.models.Recipe()
+    recipe.id = recipe_id
+    recipe.program_name = crawler.program_name
+    return recipe
+
+def bench_site(crawler, args, site_config, parser_name):
+    site_config = dict(site_config, parser=parser_name, is_expand_entry_urls=False)
+    crawler.init(args, site_config, is_read_only=True) # reads the work dir of recipe_main.py, and writes nothing in it
+    overview_recipes = load_overview_recipes(crawler.cache_dir)
+
+    target_fns = [target_fn for target_fn in sorted(crawler.cache_dir.glob("[!_|.*]*"), key=lambda k: crawler._sortkey_cache_filename(k)) if crawler._is_valid_cache_filename(target_fn)]
+    if args.max_pages:
+        target_fns = target_fns[-args.max_pages:]
+
+    convert_sec = 0.0
+    extract_sec = 0.0
+    page_num = 0
+    error_num = 0
+    for target_fn in target_fns:
+        content = target_fn.read_bytes()
+        recipe_id = crawler._get_recipe_id_from_cache_file(target_fn)
+        overview_recipe = get_overview_recipe(crawler, overview_recipes, recipe_id, target_fn)
+        try:
+            t0 = time.perf_counter()
+            converted_content = crawler._convert_detail_content(content)
+            t1 = time.perf_counter()
+            list(crawler._recipe_details_generator(converted_content, overview_recipe))
+            t2 = time.perf_counter()
+        except Exception:
+            error_num += 1
+            continue
+        convert_sec += t1 - t0
+        extract_sec += t2 - t1
+        page_num += 1
+
+    return page_num, error_num, convert_sec, extract_sec
+
+def main():
+    parser = argparse.ArgumentParser()
+    root_dir = pathlib.Path(__file__).resolve().parent.parent
+    parser.add_argument("sites", nargs="*", help="site name in config yaml file. no input is select all sites which have cached pages.")
+    parser.add_argument("--config-yaml-filename", default=root_dir / "recipe_crawler_config.yml", type=pathlib.Path)
+    parser.add_argument("--work-dir", default=root_dir / ".work_recipes", type=pathlib.Path, help="working directory of recipe_main.py")
+    parser.add_argument("--max-pages", default=50, type=int, help="newest N pages per site. 0 is all pages.")
+    parser.add_argument("--parsers", nargs="+", default=["html5lib", "lxml"])
+    args = parser.parse_args()
+    args.processed_list_filename_postfix = "_processed_data.txt"
+    args.parse_workers = 1
+
+    config = yaml.safe_load(args.config_yaml_filename.open("r").read())
+    crawlers_map = get_crawlers_map()
+    sites = args.sites if len(args.sites) else [site for site in config.keys() if site in crawlers_map]
+
+    print("{:<28} {:<9} {:>6} {:>6} {:>10} {:>10} {:>10}".format("site", "parser", "pages", "errors", "convert ms", "extract ms", "pages/sec"))
+    for site in sites:
+        if not (site in config and site in crawlers_map):
+            print("not exist: {}".format(site), file=sys.stderr)
+            continue
+        for parser_name in args.parsers:
+            page_num, error_num, convert_sec, extract_sec = bench_site(crawlers_map[site], args, config[site], parser_name)
+            if page_num == 0:
+                print("{:<28} {:<9} {:>6} {:>6}".format(site, parser_name, page_num, error_num))
+                continue
+            print("{:<28} {:<9} {:>6} {:>6} {:>10.2f} {:>10.2f} {:>10.1f}".format(
+                    site, parser_name, page_num, error_num,
+                    convert_sec * 1000 / page_num, extract_sec * 1000 / page_num,
+                    page_num / (convert_sec + extract_sec)))
+
+if __name__ == "__main__":
+    main()
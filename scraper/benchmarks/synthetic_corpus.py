@@ -0,0 +1,684 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 26 10:12:45 2026
+
+@author: yuki_next
+
+write a synthetic corpus of every crawler for corpus_benchmark.py.
+the pages are made up in the layout each crawler expects (html, json and pdf), as the pages of the sites can not be shipped.
+overview pages are parsed by the crawler to get the recipe ids, the detail pages and the pages fetched while parsing.
+every detail page must yield recipes, or the site fails.
+
+run in the scraper directory, and update the baseline after that:
+    python benchmarks/synthetic_corpus.py [sites...]
+    python benchmarks/corpus_benchmark.py run --update-baseline
+"""
+import argparse
+import copy
+import hashlib
+import json
+import pathlib
+import pickle
+import shutil
+import sys
+import tempfile
+import urllib.parse
+
+import requests
+import yaml
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+import recipe_crawler.sessions
+from corpus_benchmark import crawler_args
+from parser_benchmark import get_crawlers_map, get_overview_recipe
+
+benchmark_dir = pathlib.Path(__file__).resolve().parent
+
+HTML = "text/html; charset=UTF-8"
+JSON = "application/json; charset=UTF-8"
+PDF = "application/pdf"
+
+def html_page(title, body, charset="utf-8"):
+    """
+    body in a page with the header and footer links, like the pages of the sites
+    """
+    nav = "\n".join(['<li><a href="/category/{0:02d}/">カテゴリ{0}</a></li>'.format(i) for i in range(40)])
+    footer = "\n".join(['<li><a href="/info/{0:02d}.html">お知らせ{0}</a></li>'.format(i) for i in range(20)])
+    return """<!DOCTYPE html>
+<html>
+<head>
+<meta http-equiv="Content-Type" content="text/html; charset={charset}">
+<title>{title}</title>
+</head>
+<body>
+<div id="header"><ul class="global-nav">
+{nav}
+</ul></div>
+<div id="contents">
+{body}
+</div>
+<div id="footer"><ul class="footer-nav">
+{footer}
+</ul><p class="copyright">Copyright synthetic corpus</p></div>
+</body>
+</html>
+""".format(charset=charset, title=title, nav=nav, body=body, footer=footer).encode(charset)
+
+def json_page(jdata):
+    return json.dumps(jdata, ensure_ascii=False, indent=1).encode("utf-8")
+
+def pdf_page(lines):
+    """
+    one page pdf of the lines.
+    the text is drawn with a Identity-H CID font and a ToUnicode cmap, so pdfminer extracts it without any font file.
+    """
+    chars = sorted(set("".join(lines)))
+    bfchars = list()
+    for i in range(0, len(chars), 100):
+        bfchars.append("{} beginbfchar\n{}\nendbfchar".format(
+                len(chars[i:i + 100]), "\n".join(["<{0:04X}> <{0:04X}>".format(ord(c)) for c in chars[i:i + 100]])))
+    to_unicode = """/CIDInit /ProcSet findresource begin
+12 dict begin
+begincmap
+/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) /Supplement 0 >> def
+/CMapName /Adobe-Identity-UCS def
+/CMapType 2 def
+1 begincodespacerange
+<0000> <FFFF>
+endcodespacerange
+{}
+endcmap
+CMapName currentdict /CMap defineresource pop
+end
+end""".format("\n".join(bfchars))
+
+    texts = ["BT", "/F1 10 Tf"]
+    for i, l in enumerate(lines):
+        texts.append("1 0 0 1 50 {} Tm <{}> Tj".format(800 - i * 16, "".join(["{:04X}".format(ord(c)) for c in l])))
+    texts.append("ET")
+    contents = "\n".join(texts)
+
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+        "<< /Type /Font /Subtype /Type0 /BaseFont /Synthetic /Encoding /Identity-H /DescendantFonts [6 0 R] /ToUnicode 7 0 R >>",
+        "<< /Length {} >>\nstream\n{}\nendstream".format(len(contents), contents),
+        "<< /Type /Font /Subtype /CIDFontType0 /BaseFont /Synthetic /CIDSystemInfo << /Registry (Adobe) /Ordering (Identity) /Supplement 0 >> /FontDescriptor 8 0 R /DW 1000 >>",
+        "<< /Length {} >>\nstream\n{}\nendstream".format(len(to_unicode), to_unicode),
+        "<< /Type /FontDescriptor /FontName /Synthetic /Flags 4 /FontBBox [0 -200 1000 800] /ItalicAngle 0 /Ascent 800 /Descent -200 /CapHeight 700 /StemV 80 >>",
+    ]
+    buf = b"%PDF-1.4\n"
+    offsets = list()
+    for i, obj in enumerate(objects):
+        offsets.append(len(buf))
+        buf += "{} 0 obj\n{}\nendobj\n".format(i + 1, obj).encode("ascii")
+    xref_offset = len(buf)
+    buf += "xref\n0 {}\n0000000000 65535 f \n".format(len(objects) + 1).encode("ascii")
+    buf += "".join(["{:010d} 00000 n \n".format(offset) for offset in offsets]).encode("ascii")
+    buf += "trailer\n<< /Size {} /Root 1 0 R >>\nstartxref\n{}\n%%EOF\n".format(len(objects) + 1, xref_offset).encode("ascii")
+    return buf
+
+class SyntheticSite(object):
+    """
+    pages of a site. key: url, value: (content, content type)
+    """
+    def __init__(self, site):
+        self.site = site
+        self.overview_urls = list()
+        self.pages = dict()
+
+    def add_overview(self, url, content, content_type=HTML):
+        self.overview_urls.append(url)
+        self.add(url, content, content_type)
+
+    def add(self, url, content, content_type=HTML):
+        self.pages[url] = (content, content_type)
+
+class PageServer(object):
+    """
+    replace recipe_crawler.sessions.get with the pages of the site, and keep the fetched urls
+    """
+    def __init__(self, synthetic_site):
+        self.synthetic_site = synthetic_site
+        self.fetched_urls = list()
+        self._get = None
+
+    def __enter__(self):
+        self._get = recipe_crawler.sessions.get
+        recipe_crawler.sessions.get = self.get
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        recipe_crawler.sessions.get = self._get
+        return False
+
+    def get(self, url, **kwargs):
+        res = requests.Response()
+        res.url = url
+        if url in self.synthetic_site.pages:
+            res.status_code = 200
+            res._content, res.headers["Content-Type"] = self.synthetic_site.pages[url]
+            if not url in self.fetched_urls:
+                self.fetched_urls.append(url)
+        else:
+            res.status_code = 404
+            res._content = b""
+        return res
+
+# pages of each site
+
+def make_aibamanabu(site, recipe_num=6):
+    entry_url = "https://www.tv-asahi.co.jp/aibamanabu/recipe/json-list/api/recipe-list.json"
+    items = list()
+    for i in range(recipe_num):
+        recipe_id = 1200 + i
+        items.append({"url": "detail/{}/".format(recipe_id), "title": "旬の野菜{}".format(i), "date": "2020年4月{}日".format(i + 1)})
+        dishes = list()
+        for j in range(2):
+            materials = "\n".join(["<dl><dt>野菜{}</dt>\n<dd>{}個</dd></dl>".format(k, k + 1) for k in range(6)])
+            steps = "\n".join(["<li>野菜{}を切って鍋に入れる。</li>".format(k) for k in range(5)])
+            dishes.append("""<div class="ttl">「旬の野菜の料理{j}」</div>
+<div class="photo"><img src="/aibamanabu/recipe/img/{recipe_id}_{j}.jpg" alt=""></div>
+<div>[材料]（4人分）</div>
+<div class="material">
+{materials}
+</div>
+<div>[作り方]</div>
+<ol>
+{steps}
+</ol>""".format(j=j, recipe_id=recipe_id, materials=materials, steps=steps))
+        site.add("https://www.tv-asahi.co.jp/aibamanabu/recipe/detail/{}/".format(recipe_id), html_page("相葉マナブ", """<h3>相葉マナブ 旬の野菜 第{}回</h3>
+<div class="recipe">
+{}
+</div>""".format(i, "\n".join(dishes))))
+    site.add_overview(entry_url, json_page(items), JSON)
+
+def make_danshigohan(site, recipe_num=6):
+    entry_url = "https://www.tv-tokyo.co.jp/danshigohan/recipe/"
+    items = list()
+    for i in range(recipe_num):
+        detail_url = "https://www.tv-tokyo.co.jp/danshigohan/recipe/202004{:02d}/{}.html".format(i + 1, i % 2 + 1)
+        items.append("""<div class="item"><a href="{}"><img src="/danshigohan/recipe/img/{}.jpg" alt=""><h4>男子ごはんの料理{}</h4></a>
+<div class="date">2020.04.{:02d}</div></div>""".format(detail_url, i, i, i + 1))
+        material_blocks = list()
+        step_blocks = list()
+        for j, material_title in enumerate(["材料（2人分）", "材料 タレ"]):
+            material_blocks.append("<h6>{}</h6>\n<ul>\n{}\n</ul>".format(material_title, "\n".join(
+                    ["<li><span>材料{}</span><span>{}g</span></li>".format(k, (k + 1) * 10) for k in range(6)])))
+            step_blocks.append("<h6>作り方</h6>\n<ul>\n{}\n</ul>".format("\n".join(
+                    ["<li>材料{}を炒める。</li>".format(k) for k in range(4)])))
+        site.add(detail_url, html_page("男子ごはん", """<div class="common_contents_box_mini"><img src="../img/{}.jpg" alt=""></div>
+<div class="recipe">
+{}
+{}
+</div>""".format(i, "\n".join(material_blocks), "\n".join(step_blocks))))
+    site.add_overview(entry_url, html_page("男子ごはん レシピ", "\n".join(items)))
+
+def make_ktv_niji(site, page_num=3):
+    for i in range(page_num):
+        entry_url = "https://www.ktv.jp/niji/2004{:02d}.html".format(i * 7 + 4)
+        recipes = list()
+        for j in range(2):
+            materials = "\n".join(["材料{}：{}g".format(k, (k + 1) * 10) for k in range(6)])
+            steps = "\n".join(["{} 材料{}を焼く。".format(k + 1, k) for k in range(4)])
+            recipes.append("""<div class="recipe-item"><h3>にじいろの料理{}</h3>
+<img src="/niji/img/blank.gif" style="background-image:url(/niji/img/{}_{}.jpg);" alt="">
+<p>料理研究家の一品</p>
+<p>【材料】（2人分）
+{}
+【作り方】
+{}</p></div>""".format(j, i, j, materials, steps))
+        site.add_overview(entry_url, html_page("にじいろジーン", """<div class="recipe"><h2>レシピ</h2>
+{}
+</div>""".format("\n".join(recipes))))
+
+def make_nhk_kamado(site, recipe_num=6):
+    entry_url = "https://www.nhk.or.jp/kamado/recipe.html"
+    items = list()
+    for i in range(recipe_num):
+        recipe_id = 150 + i
+        items.append("""<li><a href="recipe/{0}.html"><img src="images/{0}/thumb.jpg" alt=""></a>
+<p>2020年4月{1}日</p><p>No.{0}</p><p>お菓子の物語{0}</p><p>グレーテルのかまど</p></li>""".format(recipe_id, i + 1))
+        materials = "\n".join(["<tr><th>材料{}</th>\n<td>{}g</td></tr>".format(k, (k + 1) * 50) for k in range(8)])
+        steps = "\n".join(["""<tr><td><img src="../images/common/step{0:02d}.png" alt="{0}">生地を混ぜる。<img src="../images/{1}/recipe_process{0:02d}.jpg" alt=""></td></tr>""".format(k + 1, recipe_id) for k in range(5)])
+        site.add(urllib.parse.urljoin(entry_url, "recipe/{}.html".format(recipe_id)), html_page("グレーテルのかまど", """<h2>お菓子{0}</h2>
+<p class="plat"><img src="../images/{0}/recipe_plat.jpg" alt=""></p>
+<div class="sozai"><div class="sozai_inner"><table>
+{1}
+</table></div></div>
+<div class="kimete"><h4>おいしさの決め手</h4><div class="kimete_l"><p><b>バター</b>は冷やしておく。</p><p>焼き色を見る。</p></div></div>
+<table class="prepare"><tr><td><p class="txt">オーブンを180℃に予熱する。<br>型にバターを塗る。</p></td></tr></table>
+<table class="step"><tbody>
+{2}
+</tbody></table>""".format(recipe_id, materials, steps)))
+    site.add_overview(entry_url, html_page("グレーテルのかまど レシピ", '<ul class="recipeTable">\n{}\n</ul>'.format("\n".join(items))))
+
+def make_nhk_kiichi(site, dish_num=3):
+    entry_url = "https://www4.nhk.or.jp/bscon/23/"
+    dishes = list()
+    for j in range(dish_num):
+        materials = "<br>\n".join(["・材料{}…{}g".format(k, (k + 1) * 10) for k in range(6)])
+        steps = "<br>\n".join(["材料{}を煮る。".format(k) for k in range(4)])
+        dishes.append("""<section><h2>「割烹の一品{}」</h2><img src="/bscon/img/{}.jpg" alt="">
+<div class="option-media-row">【材料】（2人分）<br>
+{}<br>
+【作り方】<br>
+{}</div></section>""".format(j, j, materials, steps))
+    # the first and the last sections are not recipes
+    site.add_overview(entry_url, html_page("割烹Kiichiへようこそ", """<section><h1>板長稲塚の割烹Kiichiへようこそ</h1></section>
+<hr>
+<section><h2>1月1日放送 新春の献立</h2></section>
+{}
+<hr>
+<section><p>番組のご案内</p></section>""".format("\n".join(dishes))))
+
+def make_nhk_kobara_ka(site, dish_num=3):
+    entry_url = "https://www4.nhk.or.jp/kobara/23/"
+    dishes = list()
+    for j in range(dish_num):
+        materials = "<br>\n".join([" ".join(["材料{}:{}g".format(k * 2 + m, (k + 1) * 10) for m in range(2)]) for k in range(3)])
+        steps = "<br>\n".join(["{}. 材料{}を炒める。".format(k + 1, k) for k in range(4)])
+        dishes.append("""<section><h2>「小腹の一品{}」</h2><img src="/kobara/img/{}.jpg" alt="">
+<div class="option-media-row">＜材料＞（1人分）<br>
+{}<br>
+＜作り方＞<br>
+{}</div></section>""".format(j, j, materials, steps))
+    site.add_overview(entry_url, html_page("小腹すいてませんか？", """<section><p>番組のご案内</p></section>
+<section><h1>きじまりゅうたの小腹すいてませんか？</h1></section>
+<section><h2 class="option-sub-title">1月1日放送「お正月の小腹」</h2></section>
+{}""".format("\n".join(dishes))))
+
+def make_nhk_api_episodes(site, entry_url, series_url, episode_num, make_detail):
+    """
+    tvepisode json of api.nhk.jp, and the episode pages by make_detail(i)
+    """
+    result = list()
+    for i in range(episode_num):
+        episode_id = "SYN{:04d}".format(i)
+        detail_url = "{}/episode/te/{}/".format(series_url, episode_id)
+        result.append({
+            "id": episode_id,
+            "url": detail_url,
+            "identifierGroup": {"episodeName": "「回の名前{}」".format(i)},
+            "broadcastEvent": [
+                {"misc": {"releaseLevel": "reair"}, "identifierGroup": {"date": "2020-05-{:02d}".format(i + 1)}},
+                {"misc": {"releaseLevel": "original"}, "identifierGroup": {"date": "2020-04-{:02d}".format(i + 1)}},
+            ],
+        })
+        site.add(detail_url, html_page("エピソード", make_detail(i)))
+    site.add_overview(entry_url, json_page({"result": result}), JSON)
+
+def make_nhk_kobara_ka_2(site, episode_num=6):
+    def make_detail(i):
+        lines = ["■材料（2人分）", "材料0:100g 材料1:50g", "材料2:1個 材料3:少々", "■作り方"] + ["{}. 材料{}を焼く。".format(k + 1, k) for k in range(4)]
+        if i % 2:
+            return """<div class="faq"><div class="question"><h1>「小腹の一品{}」</h1></div>
+<ul class="answers">
+{}
+</ul></div>""".format(i, "\n".join(["<li>{}</li>".format(l) for l in lines]))
+        lines = [l.replace("■", "◎") for l in lines]
+        return """<div class="article"><p><span>小腹の一品{}レシピ</span></p>
+<ul>
+{}
+</ul></div>""".format(i, "\n".join(["<li>{}</li>".format(l) for l in lines]))
+    make_nhk_api_episodes(site, "https://api.nhk.jp/r6/sch/tvepisode/ts/9L67VX9RW1.json?offset=0&limit=10", "https://www.nhk.jp/p/kobara/ts/9L67VX9RW1", episode_num, make_detail)
+
+def make_nhk_kobara_ta(site, page_num=2):
+    for i in range(page_num):
+        entry_url = "https://www4.nhk.or.jp/P4131/{}/".format(22 + i)
+        def recipe_p(name):
+            materials = "<br>\n".join([" ".join(["{}{}:{}g".format(name, k * 2 + m, (k + 1) * 10) for m in range(2)]) for k in range(3)])
+            steps = "<br>\n".join(["{}. 材料{}を混ぜる。".format(k + 1, k) for k in range(4)])
+            return "<p>◎材料（2人分）<br>\n{}<br>\n＜作り方＞<br>\n{}</p>".format(materials, steps)
+        site.add_overview(entry_url, html_page("小腹がすきました！", """<section><p>番組のご案内</p></section>
+<section><h1>きじまりゅうたの小腹がすきました！</h1></section>
+<section><table><tr><td>放送予定</td></tr></table></section>
+<section><h2>「ひとつの料理{0}」</h2></section>
+<section><p>ポイント：火を止めてから混ぜる。<br>\n冷やしてもおいしい。</p></section>
+<section><img src="/P4131/img/{0}_0.jpg" alt="">{1}</section>
+<section><h2>「ふたつの料理{0}」</h2></section>
+<section><h3>ふたつの料理{0}の1</h3><img src="/P4131/img/{0}_1.jpg" alt="">{2}</section>
+<section><h3>ふたつの料理{0}の2</h3><img src="/P4131/img/{0}_2.jpg" alt="">{3}</section>""".format(i, recipe_p("野菜"), recipe_p("肉"), recipe_p("魚"))))
+
+def make_nhk_noukameshi(site, recipe_num=3):
+    entry_url = "https://www4.nhk.or.jp/manpuku/25/"
+    links = list()
+    for i in range(recipe_num):
+        detail_url = "https://www.nhk.or.jp/program/manpuku/recipe/dg0_2004{:02d}.pdf".format(i + 1)
+        links.append('<li>2020年4月{}日放送 <a href="{}">レシピ</a></li>'.format(i + 1, detail_url))
+        lines = ["まんぷく農家メシ！", "春キャベツの回{}".format(i), "初回放送 2020年4月{}日(水)".format(i + 1)]
+        for shop in range(2):
+            lines.append("{}軒目「農家{}」".format(shop + 1, shop))
+            for dish in "①②":
+                lines.append("料理{}：キャベツの料理{}".format(dish, shop))
+                lines.append("材料 キャベツ（200g）、塩（小さじ1）、(調味料)")
+                lines.append("作り方 ①キャベツを切る。")
+                lines.append("②塩でもむ。")
+                lines.append("③器に盛る。")
+        site.add(detail_url, pdf_page(lines), PDF)
+    site.add_overview(entry_url, html_page("まんぷく農家メシ！", '<ul class="recipes">\n{}\n</ul>'.format("\n".join(links))))
+
+def make_nhk_noukameshi_2(site, episode_num=6):
+    def make_detail(i):
+        lines = list()
+        for shop in range(2):
+            lines.append("{}軒目　「農家{}」".format(shop + 1, shop))
+            for dish in "①②":
+                lines.append("料理{}：野菜の料理{}".format(dish, shop))
+                lines.append("材料　野菜（200g）、塩（小さじ1）、しょうゆ")
+                lines.append("作り方　野菜を切る。")
+                lines.append("塩でもむ。")
+        return """<div class="headline">農家メシのレシピ</div>
+<ul><li><ul>
+{}
+</ul></li></ul>""".format("\n".join(["<li>{}</li>".format(l) for l in lines]))
+    make_nhk_api_episodes(site, "https://api.nhk.jp/r6/sch/tvepisode/ts/X8Y9NKXY43.json?offset=0&limit=10", "https://www.nhk.jp/p/manpuku/ts/X8Y9NKXY43", episode_num, make_detail)
+
+def make_nhk_umai(site, page_num=2, recipe_num=4):
+    for i in range(page_num):
+        entry_url = "http://www6.nhk.or.jp/umai/recipe/index{:02d}.html".format(i + 1)
+        links = list()
+        for j in range(recipe_num):
+            recipe_id = 300 + i * recipe_num + j
+            detail_url = "http://www6.nhk.or.jp/umai/recipe/recipe.html?i={}".format(recipe_id)
+            links.append('<li><a href="recipe.html?i={}"><img src="../img/recipe_2004{:02d}.jpg" alt="">うまいッ！{}</a></li>'.format(recipe_id, j + 1, recipe_id))
+            dishes = list()
+            for k in range(2):
+                materials = "\n".join(["・食材{}：{}g".format(m, (m + 1) * 10) for m in range(6)])
+                steps = "\n".join(["{}）食材{}を焼く。".format(m + 1, m) for m in range(4)])
+                dishes.append("<h4>うまい料理{}</h4>\n<p>材料（2人分）</p>\n<p>{}</p>\n<p>作り方</p>\n<p>{}</p>".format(k, materials, steps))
+            site.add(detail_url, html_page("うまいッ！", """<div class="recipe"><div class="recipe-box">
+<div class="photo"><img src="img/{}_0.jpg" alt=""></div>
+<div class="recipe-text">
+{}
+</div></div></div>""".format(recipe_id, "\n".join(dishes))))
+        site.add_overview(entry_url, html_page("うまいッ！ レシピ", '<ul class="recipes">\n{}\n</ul>'.format("\n".join(links))))
+
+def make_nikomaru(site, recipe_num=6):
+    entry_url = "http://www.ksb.co.jp/250/paradise/recipe/"
+    items = list()
+    for i in range(recipe_num):
+        detail_url = "http://www.ksb.co.jp/250/paradise/recipe/{}/".format(500 + i)
+        items.append('<li><a href="{}"><p class="name">にこまるの料理{}</p><p class="date">2020.04.{:02d}</p></a></li>'.format(detail_url, i, i + 1))
+        materials = "\n".join(["<li><span>材料{}</span><span>{}g</span></li>".format(k, (k + 1) * 10) for k in range(6)])
+        steps = "\n".join(["<li>材料{}を切る。\n火を通す。</li>".format(k) for k in range(4)])
+        site.add(detail_url, html_page("にこまるキッチン", """<div class="photo"><img src="/250/img/blank.gif" data-src="/250/img/{}.jpg" alt=""></div>
+<div class="material"><h4>材料（2人分）</h4><ul>
+{}
+<li><span> </span><span></span></li>
+</ul></div>
+<div class="make"><ol>
+{}
+</ol></div>""".format(i, materials, steps)))
+    site.add_overview(entry_url, html_page("にこまるキッチン レシピ", '<ul class="recipe-list">\n{}\n</ul>'.format("\n".join(items))))
+
+def make_oishimeshi(site, recipe_num=6):
+    entry_url = "https://www.csnet.coop/movies/recipemovie.cgi?template=index.html"
+    items = list()
+    for i in range(recipe_num):
+        detail_url = "https://www.csnet.coop/movies/recipemovie.cgi?template=detail.html&date=202004{:02d}".format(i + 1)
+        items.append('<div class="titletext"><p class="title"><a href="{}">おいしめしの料理{}</a></p></div>'.format(detail_url, i))
+        materials = "\n".join(["<tr><td>材料{}</td><td>{}g</td><td></td></tr>".format(k, (k + 1) * 10) for k in range(6)])
+        steps = "\n".join(["<tr><td>{}</td><td>材料{}を煮る。</td><td>{}</td></tr>".format(k + 1, k, "弱火で" if k % 2 else "") for k in range(5)])
+        site.add(detail_url, html_page("コープのおいしめし", """<div id="zairyou_box"><p>材料（2人分）</p><table>
+{}
+</table></div>
+<table class="recipe">
+{}
+</table>""".format(materials, steps), charset="euc-jp"), "text/html")
+    site.add_overview(entry_url, html_page("コープのおいしめし", "\n".join(items), charset="euc-jp"), "text/html")
+
+def make_oshaberi(site, week_num=2):
+    entry_url = "https://www.asahi.co.jp/oshaberi/main.html"
+    rows = list()
+    for w in range(week_num):
+        cells = list()
+        for d, weekday in enumerate(["mon", "tue", "wed", "thu", "fri"]):
+            program_date_str = "202004{:02d}".format(w * 7 + d + 6)
+            cells.append('<td><div class="{}"><a href="recipe/{}.html">4月{}日 おしゃべりの料理{}</a></div></td>'.format(weekday, program_date_str, w * 7 + d + 6, d))
+            materials = "\n".join(["<tr><td>材料{}</td>\n<td>{}グラム</td></tr>".format(k, (k + 1) * 10) for k in range(6)])
+            steps = "\n".join(["<tr><td>材料{}を炒める。</td></tr>".format(k) for k in range(4)])
+            site.add(urllib.parse.urljoin(entry_url, "recipe/{}.html".format(program_date_str)), html_page("おしゃべりクッキング", """<table class="title"><tr><td class="tema">春のおかず</td><td class="making">2人分</td></tr></table>
+<img src="../img/{}.jpg" alt="">
+<table class="text2">
+{}
+</table>
+<table class="text2">
+{}
+</table>""".format(program_date_str, steps, materials), charset="shift_jis"), "text/html; charset=Shift_JIS")
+        rows.append("<tr>{}</tr>".format("".join(cells)))
+    site.add_overview(entry_url, html_page("おしゃべりクッキング", "<table>\n{}\n</table>".format("\n".join(rows)), charset="shift_jis"), "text/html; charset=Shift_JIS")
+
+def make_rsk_cooking_recipe(site, recipe_num=6):
+    entry_url = "http://www.rsk.co.jp/tv/recipe/"
+    items = list()
+    for i in range(recipe_num):
+        program_date_str = "202004{:02d}".format(i + 1)
+        items.append('<div class="recipe-piece"><a href="{}.html"><img src="img/{}_s.jpg" alt="">クッキング・レシピ</a></div>'.format(program_date_str, program_date_str))
+        materials = "\n".join(["材料{}…{}グラム".format(k, (k + 1) * 10) for k in range(6)])
+        steps = "\n".join(["{}. 材料{}を煮る。".format(k + 1, k) for k in range(4)])
+        site.add(urllib.parse.urljoin(entry_url, "{}.html".format(program_date_str)), html_page("クッキング・レシピ", """<table class="title"><tr><td><strong>レシピの料理{}</strong></td><td align="right"><b>4人分</b></td></tr></table>
+<img src="img/{}.jpg" alt="">
+<div class="zairyo">
+{}
+監修：料理研究家
+</div>
+<table class="howto"><tr><td>作り方</td><td>
+{}
+監修：料理研究家
+</td></tr></table>
+<table class="navi"><tr><td>もどる</td></tr></table>""".format(i, program_date_str, materials, steps), charset="shift_jis"), "text/html")
+    site.add_overview(entry_url, html_page("クッキング・レシピ", "\n".join(items), charset="shift_jis"), "text/html")
+
+def make_tbs_obigohan(site, recipe_num=6):
+    entry_url = "https://www.tbs.co.jp/obigohan/calendar/"
+    items = list()
+    for i in range(recipe_num):
+        program_date_str = "202004{:02d}".format(i + 1)
+        items.append('<div class="waku"><a href="../recipe/{}.html">4月{}日</a></div>'.format(program_date_str, i + 1))
+        areas = list()
+        for j in range(2):
+            materials = "\n".join(["<tr><td>材料{}</td><td>{}g</td></tr>".format(k, (k + 1) * 10) for k in range(6)])
+            steps = "\n".join(['<p><span class="recipe_num">{}</span><span class="recipe_text">材料{}を焼く。</span></p>'.format(k + 1, k) for k in range(4)])
+            areas.append("""<section class="recipe_area">
+<h4>おびゴハンの料理{0}</h4>
+<div class="pic_sub photo0{0}"></div>
+<div class="material_box"><span class="people">（2人分）</span><table>
+{1}
+</table></div>
+<div class="recipe_main_box">
+{2}
+</div>
+<div class="point_box_wide"><span class="point">強火で焼く。
+焼きすぎない。</span></div>
+</section>""".format(j + 1, materials, steps))
+        areas.append('<section class="recipe_area"><p>関連するレシピ</p></section>')
+        site.add(urllib.parse.urljoin(entry_url, "../recipe/{}.html".format(program_date_str)), html_page("おびゴハン！", "\n".join(areas)))
+    site.add_overview(entry_url, html_page("おびゴハン！ カレンダー", '<div id="calendar">\n{}\n<div class="waku">休止</div>\n</div>'.format("\n".join(items))))
+
+def make_three_minutes_cooking(site, recipe_num=4):
+    entry_url = "http://www.ntv.co.jp/3min/airdate/"
+    items = list()
+    def detail_page(recipe_id, other_recipe_id):
+        materials = "\n".join(["<tr><td>材料{}</td><td>{}g</td></tr>".format(k, (k + 1) * 10) for k in range(6)])
+        steps = "\n".join(['<tr><td>{0}</td><td>材料{0}を炒める。<img src="../img/{1}_{0}.jpg" alt=""></td></tr>'.format(k + 1, recipe_id) for k in range(3)])
+        sub_steps = "\n".join(['<li>材料{}を混ぜる。</li>'.format(k) for k in range(3)])
+        other_recipe = '<div id="other-recipe"><a href="{}.html">もう1品</a></div>'.format(other_recipe_id) if other_recipe_id else ""
+        return html_page("キューピー3分クッキング", """<h3>3分の料理{0}</h3>
+<img id="thumbnail" src="../img/{0}.jpg" alt="">
+<div class="ingredient"><h4>材料（2人分）</h4><table>
+{1}
+</table></div>
+<div class="howto"><table>
+{2}
+<tr><td></td><td>ソースを作る<ol>
+{3}
+</ol></td></tr>
+</table></div>
+<div class="recipe-box"><p>・ポイント</p><p>・火を止めてから混ぜる。</p></div>
+{4}""".format(recipe_id, materials, steps, sub_steps, other_recipe))
+    for i in range(recipe_num):
+        recipe_id = "202004{:02d}".format(i + 1)
+        other_recipe_id = "{}_2".format(recipe_id)
+        items.append('<div class="waku"><a href="../recipe/{}.html">4月{}日</a></div>'.format(recipe_id, i + 1))
+        site.add(urllib.parse.urljoin(entry_url, "../recipe/{}.html".format(recipe_id)), detail_page(recipe_id, other_recipe_id))
+        site.add(urllib.parse.urljoin(entry_url, "../recipe/{}.html".format(other_recipe_id)), detail_page(other_recipe_id, None))
+    site.add_overview(entry_url, html_page("キューピー3分クッキング 放送日", "\n".join(items + ['<div class="waku">休止</div>'])))
+
+def make_three_minutes_cooking_2(site, recipe_num=4):
+    entry_url = "https://www.ntv.co.jp/3min/airdate/"
+    items = list()
+    def detail_page(detail_url, other_urls):
+        materials = "\n".join(["<li>材料{} {}g</li>".format(k, (k + 1) * 10) for k in range(6)])
+        steps = "\n".join(['<li><p>{0}</p><p>材料{0}を炒める。</p><img src="{1}img/{0}.jpg" alt=""></li>'.format(k + 1, detail_url) for k in range(4)])
+        sauce_steps = "\n".join(["<li>ソースの材料{}を混ぜる。</li>".format(k) for k in range(2)])
+        others = "\n".join(['<div class="detail-more-title"><a href="{}">もう1品</a></div>'.format(url) for url in other_urls])
+        return html_page("キューピー3分クッキング", """<meta property="og:image" content="{0}img/main.jpg">
+<p class="detail-title-name">3分の料理</p>
+<div class="detail-material"><div class="detail-head"><h2>材料（2人分）</h2></div><ul>
+<h4>ソース</h4>
+{1}
+</ul></div>
+<div class="detail-howto"><div class="detail-head"><h2>作り方</h2></div>
+<div class="howto-item"><ul>
+{2}
+</ul></div>
+<div class="howto-item"><ul>
+{3}
+</ul></div>
+<div class="points-item">焼きすぎない。</div>
+</div>
+<div class="detail-advice"><div class="detail-head"><h2>アドバイス</h2></div><ul>
+<li>作りおきできる。</li>
+<li>冷凍できる。</li>
+</ul></div>
+<div class="detail-related"><h2>関連1</h2><h2>関連2</h2><h2>関連3</h2><h2>関連4</h2></div>
+{4}""".format(detail_url, materials, steps, sauce_steps, others))
+    for i in range(recipe_num):
+        program_date_str = "202004{:02d}".format(i + 1)
+        detail_url = urllib.parse.urljoin(entry_url, "../recipe/{}/".format(program_date_str))
+        other_url = urllib.parse.urljoin(detail_url, "2/")
+        items.append('<a href="../recipe/{}/"><div class="result-title">4月{}日</div></a>'.format(program_date_str, i + 1))
+        site.add(detail_url, detail_page(detail_url, [other_url]))
+        site.add(other_url, detail_page(other_url, list()))
+    site.add_overview(entry_url, html_page("キューピー3分クッキング 放送日", "\n".join(items)))
+
+def make_tsc_grandmother_kitchen(site, recipe_num=6):
+    entry_url = "https://www.webtsc.com/prog/obaachan/recipe/"
+    items = list()
+    for i in range(recipe_num):
+        detail_url = "https://www.webtsc.com/prog/obaachan/recipe/{}/".format(700 + i)
+        items.append("""<article class="post-archive"><a href="{}"><h2>「おばあちゃんの料理{}」<br>岡山市</h2></a>
+<div class="recipe-archive-cast">おばあちゃん{}</div>
+<div class="recipe-onairs">2020年4月{}日放送</div></article>""".format(detail_url, i, i, i + 1))
+        boxes = list()
+        for j in range(2):
+            materials = "\n".join(["<tr><td>材料{}</td><td>{}g</td></tr>".format(k, (k + 1) * 10) for k in range(6)])
+            steps = "\n".join(["<li>材料{}を煮る。</li>".format(k) for k in range(4)])
+            boxes.append("""<section class="recipe-box"><h3>「台所の料理{}」</h3>
+<div class="recipe-material"><span>4人分</span><dl>
+<dt>材料（たれ）</dt><dd><table>
+{}
+</table></dd>
+</dl></div>
+<ol class="recipe-process-list">
+{}
+</ol></section>""".format(j, materials, steps))
+        boxes.append('<section class="recipe-box"><p>関連するレシピ</p></section>')
+        site.add(detail_url, html_page("おばあちゃんの台所", """<div class="recipe-food-img"><img src="https://www.webtsc.com/prog/obaachan/img/{}.jpg" alt=""></div>
+{}""".format(i, "\n".join(boxes))))
+    site.add_overview(entry_url, html_page("おばあちゃんの台所 レシピ", "\n".join(items)))
+
+site_makers = {
+    "aibamanabu": make_aibamanabu,
+    "danshigohan": make_danshigohan,
+    "ktv_niji": make_ktv_niji,
+    "nhk_kamado": make_nhk_kamado,
+    "nhk_kiichi": make_nhk_kiichi,
+    "nhk_kobara_ka": make_nhk_kobara_ka,
+    "nhk_kobara_ka_2": make_nhk_kobara_ka_2,
+    "nhk_kobara_ta": make_nhk_kobara_ta,
+    "nhk_noukameshi": make_nhk_noukameshi,
+    "nhk_noukameshi_2": make_nhk_noukameshi_2,
+    "nhk_umai": make_nhk_umai,
+    "nikomaru": make_nikomaru,
+    "oishimeshi": make_oishimeshi,
+    "oshaberi": make_oshaberi,
+    "rsk_cooking_recipe": make_rsk_cooking_recipe,
+    "tbs_obigohan": make_tbs_obigohan,
+    "three_minutes_cooking": make_three_minutes_cooking,
+    "three_minutes_cooking_2": make_three_minutes_cooking_2,
+    "tsc_grandmother_kitchen": make_tsc_grandmother_kitchen,
+}
+
+def write_site(site, site_config, crawler, corpus_dir):
+    synthetic_site = SyntheticSite(site)
+    site_makers[site](synthetic_site)
+
+    corpus = {"site": site, "overview_urls": synthetic_site.overview_urls, "responses": dict(), "details": list()}
+    details = list() # value: (filename, content)
+    overview_recipes = dict() # key: Recipe.id, value: Recipe
+    with tempfile.TemporaryDirectory() as tmp_dir, PageServer(synthetic_site) as page_server:
+        crawler.init(crawler_args(pathlib.Path(tmp_dir)), dict(site_config, is_expand_entry_urls=False))
+        recipes = dict() # key: Recipe.id, value: Recipe
+        for entry_url in synthetic_site.overview_urls:
+            content, content_type = synthetic_site.pages[entry_url]
+            crawler._content_type = content_type
+            try:
+                recipes.update(crawler._parse_overview_content(content, entry_url))
+            finally:
+                crawler._content_type = None
+
+        for recipe_id, recipe in recipes.items():
+            if not recipe.detail_url in synthetic_site.pages:
+                raise RuntimeError("{}: no detail page of {}: {}".format(site, recipe_id, recipe.detail_url))
+            content, content_type = synthetic_site.pages[recipe.detail_url]
+            target_fn = pathlib.Path(tmp_dir) / str(recipe_id)
+            recipe_id = crawler._get_recipe_id_from_cache_file(target_fn)
+            overview_recipe = get_overview_recipe(crawler, recipes, recipe_id, target_fn)
+            overview_recipes[recipe_id] = copy.deepcopy(overview_recipe)
+            detail_recipes = crawler._parse_detail_content(content, overview_recipe, content_type=content_type)
+            if not len(detail_recipes):
+                raise RuntimeError("{}: no recipe in the detail page of {}".format(site, recipe_id))
+            details.append((target_fn.name, content))
+            corpus["details"].append({"filename": target_fn.name, "recipe_id": recipe_id, "content_type": content_type})
+        fetched_urls = page_server.fetched_urls
+
+    if corpus_dir.exists():
+        shutil.rmtree(str(corpus_dir))
+    (corpus_dir / "responses").mkdir(parents=True)
+    (corpus_dir / "details").mkdir(parents=True)
+    for url in synthetic_site.overview_urls + [url for url in fetched_urls if not url in synthetic_site.overview_urls]:
+        content, content_type = synthetic_site.pages[url]
+        filename = hashlib.sha256(url.encode("utf-8")).hexdigest()[:16]
+        (corpus_dir / "responses" / filename).write_bytes(content)
+        corpus["responses"][url] = {"filename": filename, "status_code": 200, "content_type": content_type}
+    for filename, content in details:
+        (corpus_dir / "details" / filename).write_bytes(content)
+    with (corpus_dir / "overview_recipes.pickle").open("wb") as fp:
+        pickle.dump(overview_recipes, fp)
+    (corpus_dir / "corpus.json").write_text(json.dumps(corpus, ensure_ascii=False, indent=1))
+    print("{}: {} overview pages, {} detail pages, {} responses".format(site, len(corpus["overview_urls"]), len(corpus["details"]), len(corpus["responses"])))
+
+def main():
+    root_dir = benchmark_dir.parent
+    parser = argparse.ArgumentParser()
+    parser.add_argument("sites", nargs="*", help="site name in config yaml file. no input is all sites.")
+    parser.add_argument("--config-yaml-filename", default=root_dir / "recipe_crawler_config.yml", type=pathlib.Path)
+    parser.add_argument("--corpus-dir", default=benchmark_dir / "corpus", type=pathlib.Path)
+    args = parser.parse_args()
+
+    config = yaml.safe_load(args.config_yaml_filename.open("r").read())
+    crawlers_map = get_crawlers_map()
+    sites = args.sites if len(args.sites) else sorted(site_makers.keys())
+    for site in sites:
+        if not (site in config and site in crawlers_map and site in site_makers):
+            print("not exist: {}".format(site), file=sys.stderr)
+            return 1
+        write_site(site, config[site], crawlers_map[site], args.corpus_dir / site)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 15:20:44 2026
+
+@author: yuki_next
+
+compare per-note render time of jinja2.Template(source) on every note (old)
+and the shared precompiled environment (new).
+run in the scraper directory:
+    python benchmarks/template_benchmark.py --notes 500
+"""
+import argparse
+import datetime
+import pathlib
+import sys
+import time
+
+import jinja2
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+from recipe_crawler.models import Recipe, RecipeText
+import recipe_crawler.translators
+from recipe_crawler.translators import templates
+
+def create_sample_recipe(i):
+    recipe = Recipe()
+    recipe.id = i
+    recipe.detail_url = "https://example.com/recipe/{}/".format(i)
+    recipe.cooking_name = "肉じゃが{}".format(i)
+    recipe.cooking_name_sub = "定番の家庭料理"
+    recipe.program_name = "サンプル番組"
+    recipe.program_date = datetime.date(2020, 1, 1) + datetime.timedelta(days=i)
+    recipe.materials.extend([RecipeText("材料{}: {}g".format(j, j * 10)) for j in range(12)])
+    recipe.recipe_steps.extend([RecipeText("（{}）手順{}の説明。\n弱火で煮る。".format(j + 1, j + 1)) for j in range(8)])
+    recipe.important_points.extend([RecipeText("ポイント{}".format(j)) for j in range(3)])
+    return recipe
+
+def bench(render, recipes):
+    t0 = time.perf_counter()
+    for recipe in recipes:
+        render(recipe)
+    return (time.perf_counter() - t0) / len(recipes)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--notes", default=500, type=int, help="number of notes rendered")
+    args = parser.parse_args()
+
+    recipes = [create_sample_recipe(i) for i in range(args.notes)]
+    source = recipe_crawler.translators.EvernoteTranslator._template
+
+    old_sec = bench(lambda recipe: jinja2.Template(source).render(recipe=recipe, image_resources=dict()), recipes)
+    new_sec = bench(lambda recipe: templates.get_template("evernote_note").render(recipe=recipe, image_resources=dict()), recipes)
+
+    print("notes: {}".format(args.notes))
+    print("jinja2.Template per note : {:8.3f} ms/note".format(old_sec * 1000))
+    print("shared environment       : {:8.3f} ms/note".format(new_sec * 1000))
+    print("speedup                  : {:8.1f} x".format(old_sec / new_sec))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 16:47:52 2026
+
+@author: yuki_next
+"""
+
+import codecs
+import json
+import logging
+import re
+
+import chardet
+
+logger = logging.getLogger(__name__)
+
+SNIFF_BYTES = 4 * 1024 # prefix to look for BOM and <meta charset>
+CHARDET_SAMPLE_BYTES = 32 * 1024 # prefix given to chardet
+
+_BOMS = [ # utf-32 before utf-16. BOM_UTF32_LE starts with BOM_UTF16_LE
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+_RE_CONTENT_TYPE_CHARSET = re.compile(r"charset\s*=\s*[\"']?\s*([\w.:\-]+)", re.IGNORECASE)
+_RE_META_CHARSET = re.compile(rb"<meta[^>]+charset\s*=\s*[\"']?\s*([\w.:\-]+)", re.IGNORECASE)
+_RE_XML_ENCODING = re.compile(rb"^\s*<\?xml[^>]+encoding\s*=\s*[\"']([\w.:\-]+)[\"']")
+
+def _normalize(encoding):
+    if not encoding:
+        return None
+    try:
+        return codecs.lookup(encoding.decode("ascii") if isinstance(encoding, bytes) else encoding).name
+    except (LookupError, UnicodeDecodeError):
+        return None
+
+def encoding_from_content_type(content_type):
+    if not content_type:
+        return None
+    m = _RE_CONTENT_TYPE_CHARSET.search(content_type)
+    return _normalize(m.group(1)) if m else None
+
+def sniff_encoding(raw_content, sniff_bytes=SNIFF_BYTES):
+    for bom, encoding in _BOMS:
+        if raw_content.startswith(bom):
+            return encoding
+
+    head = raw_content[:sniff_bytes]
+    for regex in (_RE_XML_ENCODING, _RE_META_CHARSET):
+        m = regex.search(head)
+        if m:
+            encoding = _normalize(m.group(1))
+            if encoding:
+                return encoding
+    return None
+
+def detect_encoding(raw_content, sample_bytes=CHARDET_SAMPLE_BYTES):
+    return _normalize(chardet.detect(raw_content[:sample_bytes])["encoding"])
+
+class EncodingResolver(object):
+    """
+    resolve the encoding of a page in this order:
+    Content-Type charset recorded at fetch time, BOM / <meta charset> sniffing,
+    remembered encoding of the site, chardet over a prefix.
+    the Content-Type of cached pages is recorded in the cache manifest.
+    """
+    def __init__(self, store_filename):
+        self.store_filename = store_filename
+        self.site_encoding = None
+        self._is_dirty = False
+        if self.store_filename.exists():
+            try:
+                j = json.loads(self.store_filename.read_text())
+                self.site_encoding = j.get("site_encoding")
+            except ValueError:
+                logger.exception("broken encoding store. ignored: {}".format(self.store_filename))
+
+    def resolve(self, raw_content, content_type=None):
+        encoding = encoding_from_content_type(content_type)
+        if encoding is None:
+            encoding = sniff_encoding(raw_content)
+        if encoding is None and self.site_encoding:
+            return self.site_encoding
+        if encoding is None:
+            encoding = detect_encoding(raw_content)
+            logger.debug("chardet: {}".format(encoding))
+
+        if encoding and encoding != self.site_encoding and not encoding.startswith("utf-16") and not encoding.startswith("utf-32"):
+            self.site_encoding = encoding
+            self._is_dirty = True
+        return encoding
+
+    def save(self):
+        if not self._is_dirty:
+            return
+        self.store_filename.write_text(json.dumps({
+            "site_encoding": self.site_encoding,
+        }, indent=1, sort_keys=True))
+        self._is_dirty = False
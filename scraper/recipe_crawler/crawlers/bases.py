@@ -8,30 +8,64 @@ Created on Fri Aug 30 21:18:51 2019
 
 from abc import ABCMeta, abstractmethod
 
+import collections
+import concurrent.futures
+import copy
 import pathlib
+import traceback
 from bs4 import BeautifulSoup
-import requests
-import time
-import chardet
+import hashlib
 import logging
+import multiprocessing
+import requests
 import recipe_crawler.models
+import recipe_crawler.charset
+import recipe_crawler.fetcher
+import recipe_crawler.manifest
+import recipe_crawler.metrics
+import recipe_crawler.parse_cache
+import recipe_crawler.revalidation
+import recipe_crawler.sessions
 
 logger = logging.getLogger(__name__)
 
 class RecipeCrawlerTemplate(metaclass=ABCMeta):
     site_name = ""
+    parser_version = 1 # increment when the parser changes. cached parse results of the site are discarded.
+    soup_parsers = ("html5lib", "lxml", "auto") # "auto": lxml, and html5lib if the crawler fails with lxml
     _TABLE_REMOVE_KAKKO = str.maketrans({"「": "", "」": ""})
     _TABLE_REPLACE_MARUKAKKO = str.maketrans({"(": "（", ")":"）"})
     def __init__(self):
         pass
 
-    def init(self, args, site_config):
+    def __getstate__(self):
+        # for process pool workers. the fetcher holds locks, and both are not needed for parsing.
+        state = self.__dict__.copy()
+        state.pop("fetcher", None)
+        state.pop("manifest", None)
+        return state
+
+    def init(self, args, site_config, is_read_only=False):
+        """
+        is_read_only: for replay() only. nothing is written in the cache dir, even the manifest of an old cache dir.
+        """
         self.program_name = site_config["program_name"]
         self.cache_dir = args.work_dir / self.__class__.site_name
         if site_config.get("cache_dir"):
             self.cache_dir = args.work_dir / site_config["cache_dir"]
         
-        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        if not is_read_only:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest = recipe_crawler.manifest.CacheManifest(self.cache_dir, is_read_only=is_read_only)
+
+        self.parser = site_config.get("parser") or "html5lib"
+        if not self.parser in self.__class__.soup_parsers:
+            raise ValueError("{}: unknown parser: {}".format(self.__class__.site_name, self.parser))
+        self._soup_parser = "lxml" if self.parser == "auto" else self.parser
+
+        self.encoding_resolver = recipe_crawler.charset.EncodingResolver(self.cache_dir / "_encodings.json")
+        self._content_type = None # Content-Type header of the content being parsed
+        self.tls_verify = site_config.get("tls_verify", True) is not False
     
         self.entry_urls = site_config["entry_urls"]
         if site_config.get("is_expand_entry_urls", False):
@@ -40,6 +74,9 @@ class RecipeCrawlerTemplate(metaclass=ABCMeta):
         self.processed_list_filename = args.work_dir / "_{}{}".format(self.__class__.site_name, args.processed_list_filename_postfix)
         if site_config.get("processed_list_filename"):
             self.processed_list_filename = pathlib.Path(site_config["processed_list_filename"])
+
+        self.fetcher = recipe_crawler.fetcher.ConcurrentFetcher.from_site_config(site_config)
+        self.parse_workers = args.parse_workers
         
 
     def process(self):
@@ -47,11 +84,13 @@ class RecipeCrawlerTemplate(metaclass=ABCMeta):
         
         recipes = dict() # key: Recipe.id, value: Recipe
 
+        overview_store = recipe_crawler.revalidation.OverviewStore(self.cache_dir / "_overviews.pickle", self._parse_cache_version)
         for entry_url in self.entry_urls:
-            res = requests.get(entry_url, verify=False)
-            if res.ok:
-                converted_overview_content = self._convert_overview_content(res.content)
-                recipes.update(self._get_recipe_overviews(converted_overview_content, entry_url))
+            recipes.update(self._fetch_recipe_overviews(entry_url, overview_store))
+        overview_store.save()
+        overview_recipe_store = recipe_crawler.revalidation.OverviewRecipeStore(self.cache_dir / "_overview_recipes.pickle")
+        overview_recipe_store.update(recipes)
+        overview_recipe_store.save()
 
         processed_recipe_ids = set()
             
@@ -62,19 +101,52 @@ class RecipeCrawlerTemplate(metaclass=ABCMeta):
         recipes_num = len(recipes)
         recipes_num_digits = len(str(recipes_num))
         message_current_max = "({{:0{digits}d}}/{{:0{digits}d}})".format(digits=recipes_num_digits)
+        fetch_targets = list()
         for i, recipe in enumerate(recipes.values()):
             if self._is_existed_recipe(recipe):
                 logger.debug(("{} " + message_current_max + ": skip: {}").format(self.__class__.site_name, i + 1, recipes_num, recipe.id))
                 continue
-    
-            time.sleep(1)
-            res = requests.get(recipe.detail_url, verify=False)
-            if res.ok:
-                logger.info(("{} " + message_current_max + ": get : {}").format(self.__class__.site_name, i + 1, recipes_num, recipe.id))
-                (self.cache_dir / str(recipe.id)).open("wb").write(res.content)
+            fetch_targets.append(((i, recipe), recipe.detail_url))
+
+        with recipe_crawler.metrics.timer("detail_fetch", self.__class__.site_name):
+            for (i, recipe), res in self.fetcher.fetch_all(fetch_targets):
+                if res is not None and res.ok:
+                    logger.info(("{} " + message_current_max + ": get : {}").format(self.__class__.site_name, i + 1, recipes_num, recipe.id))
+                    cache_fn = self.cache_dir / str(recipe.id)
+                    with cache_fn.open("wb") as fp:
+                        fp.write(res.content)
+                    self.manifest.put(recipe.id, cache_fn.name, res.content, content_type=res.headers.get("Content-Type"))
+                    recipe_crawler.metrics.count("detail_pages_fetched", self.__class__.site_name)
+                    recipe_crawler.metrics.count("detail_bytes_fetched", self.__class__.site_name, len(res.content))
+                else:
+                    recipe_crawler.metrics.count("detail_fetch_failed", self.__class__.site_name)
         # get detail recipe info
+        for detail_recipe in self._process_cache_files(recipes, processed_recipe_ids):
+            yield detail_recipe
+
+    def replay(self, use_parsed_cache=False):
+        """
+        parse all cached detail pages again without network access.
+        overviews are the recipes of every overview page fetched by process(), of any parser version, and the processed list is ignored.
+        parsed cache is not read unless use_parsed_cache. nothing in the cache dir is written:
+        pages of unexpected format are not renamed, and neither the parsed cache nor the manifest status is updated.
+        """
+        logger.info("{}: replay start".format(self.__class__.site_name))
+        # work dirs crawled before the overview recipe store have only the snapshot of the current parser version
+        overview_store = recipe_crawler.revalidation.OverviewStore(self.cache_dir / "_overviews.pickle", self._parse_cache_version)
+        overview_recipe_store = recipe_crawler.revalidation.OverviewRecipeStore(self.cache_dir / "_overview_recipes.pickle")
+        recipes = overview_store.all_recipes()
+        recipes.update(overview_recipe_store.recipes)
+        if not len(recipes):
+            logger.warning("{}: no overview recipes: {}".format(self.__class__.site_name, overview_recipe_store.store_filename))
+        for detail_recipe in self._process_cache_files(recipes, set(), use_parsed_cache=use_parsed_cache, is_read_only=True):
+            yield detail_recipe
+
+    def _process_cache_files(self, recipes, processed_recipe_ids, use_parsed_cache=True, is_read_only=False):
+        parsed_recipe_cache = recipe_crawler.parse_cache.ParsedRecipeCache(self.cache_dir / "_parsed")
         skipped_recipe_ids = set()
-        for target_fn in sorted(self.cache_dir.glob("[!_|.*]*"), key=lambda k: self._sortkey_cache_filename(k)):
+        parse_targets = list() # value: (cache filename, recipe id)
+        for target_fn in sorted([self.cache_dir / filename for filename in self.manifest.filenames()], key=lambda k: self._sortkey_cache_filename(k)):
             if not self._is_valid_cache_filename(target_fn):
                 logger.debug("{}: skip file : {}".format(self.__class__.site_name, target_fn.name))
                 continue
@@ -89,28 +161,181 @@ class RecipeCrawlerTemplate(metaclass=ABCMeta):
                 logger.debug("{}: not exists in overview. skip recipe id: {}".format(self.__class__.site_name, recipe_id))
                 continue
             
-            try:
-                logger.info("{}: start : {}".format(self.__class__.site_name, recipe_id))
-                content = target_fn.open("rb").read()
-                converted_content = self._convert_detail_content(content)
-                for detail_recipe in self._recipe_details_generator(converted_content, recipes[recipe_id]):
+            parse_targets.append((target_fn, recipe_id))
+
+        for target_fn, recipe_id, detail_recipes, error_traceback in self._parse_cache_files(parse_targets, recipes, parsed_recipe_cache, use_parsed_cache=use_parsed_cache, is_read_only=is_read_only):
+            if error_traceback is None:
+                recipe_crawler.metrics.count("recipes", self.__class__.site_name, len(detail_recipes))
+                for detail_recipe in detail_recipes:
                     yield detail_recipe
-                
-            except AttributeError:
-                logger.exception("not expected format.")
+            else:
+                recipe_crawler.metrics.count("detail_parse_failed", self.__class__.site_name)
+                logger.error("not expected format.\n{}".format(error_traceback.rstrip()))
+                if is_read_only:
+                    continue
                 logger.info("{}: remove : {}".format(self.__class__.site_name, recipe_id))
                 new_target_fn = self._get_new_fn(target_fn, "_", 1)
                 logger.info("{}: rename : {} -> {}".format(self.__class__.site_name, target_fn.name, new_target_fn.name))
                 target_fn.rename(new_target_fn)
+                self.manifest.remove(target_fn.name)
+                parsed_recipe_cache.remove(target_fn.name)
+        if not is_read_only:
+            self.encoding_resolver.save()
         if len(skipped_recipe_ids):
             logger.warn("{}: not exists in overview. skip recipe id(s): {}".format(self.__class__.site_name, ",".join([str(id) for id in skipped_recipe_ids])))
     
+    def _fetch_recipe_overviews(self, entry_url, overview_store):
+        with recipe_crawler.metrics.timer("overview_fetch", self.__class__.site_name):
+            try:
+                res = self._http_get(entry_url, headers=overview_store.request_headers(entry_url))
+            except requests.exceptions.RequestException:
+                logger.exception("{}: overview fetch failed: {}".format(self.__class__.site_name, entry_url))
+                recipe_crawler.metrics.count("overview_fetch_failed", self.__class__.site_name)
+                return dict()
+        if res.status_code == 304:
+            logger.debug("{}: not modified : {}".format(self.__class__.site_name, entry_url))
+            recipe_crawler.metrics.count("overview_not_modified", self.__class__.site_name)
+            return overview_store.get_recipes(entry_url) or dict()
+        if not res.ok:
+            recipe_crawler.metrics.count("overview_fetch_failed", self.__class__.site_name)
+            return dict()
+
+        body_hash = hashlib.sha256(res.content).hexdigest()
+        stored_recipes = overview_store.get_recipes(entry_url, body_hash=body_hash)
+        if stored_recipes is not None:
+            logger.debug("{}: same content : {}".format(self.__class__.site_name, entry_url))
+            recipe_crawler.metrics.count("overview_same_content", self.__class__.site_name)
+            return stored_recipes
+
+        self._content_type = res.headers.get("Content-Type")
+        try:
+            overview_recipes = self._with_parser_fallback(self._parse_overview_content, res.content, entry_url)
+        finally:
+            self._content_type = None
+        overview_store.update(entry_url, res.headers, body_hash, overview_recipes)
+        return overview_recipes
+
+    def _parse_cache_files(self, parse_targets, recipes, parsed_recipe_cache, use_parsed_cache=True, is_read_only=False):
+        """
+        yield (cache filename, recipe id, detail recipes, traceback string of AttributeError or None) in parse_targets order.
+        parse in a process pool if parse_workers > 1. if not use_parsed_cache, all files are parsed again.
+        if is_read_only, neither the parsed cache nor the manifest is updated.
+        """
+        def prepare(target_fn, recipe_id):
+            # return (key, cached detail recipes or None, raw content or None). the file is read only if not cached.
+            logger.info("{}: start : {}".format(self.__class__.site_name, recipe_id))
+            manifest_entry = self.manifest.get(target_fn.name)
+            key = parsed_recipe_cache.make_key(None, self._parse_cache_version, recipes[recipe_id], content_hash=manifest_entry["sha256"])
+            detail_recipes = None
+            # the parsed cache file is opened only if the manifest says it was written with this key
+            if use_parsed_cache and self.manifest.is_parsed(target_fn.name, key):
+                detail_recipes = self._get_parsed_recipe_details(target_fn.name, key, parsed_recipe_cache)
+            if detail_recipes is not None:
+                return key, detail_recipes, None
+            try:
+                return key, None, target_fn.open("rb").read()
+            except FileNotFoundError:
+                logger.warning("{}: removed from cache dir : {}".format(self.__class__.site_name, target_fn.name))
+                if not is_read_only:
+                    self.manifest.remove(target_fn.name)
+                    parsed_recipe_cache.remove(target_fn.name)
+                return key, None, None
+
+        def finish(target_fn, recipe_id, key, detail_recipes, error_traceback):
+            if not is_read_only:
+                if error_traceback is None:
+                    parsed_recipe_cache.put(target_fn.name, key, detail_recipes)
+                    self.manifest.set_status(target_fn.name, "parsed", parse_key=key)
+                else:
+                    self.manifest.set_status(target_fn.name, "failed")
+            return target_fn, recipe_id, detail_recipes, error_traceback
+
+        if self.parse_workers <= 1:
+            for target_fn, recipe_id in parse_targets:
+                key, detail_recipes, content = prepare(target_fn, recipe_id)
+                if detail_recipes is not None:
+                    yield target_fn, recipe_id, detail_recipes, None
+                elif content is not None:
+                    detail_recipes, error_traceback = _parse_detail_content(self, content, recipes[recipe_id], self.manifest.get(target_fn.name)["content_type"])
+                    yield finish(target_fn, recipe_id, key, detail_recipes, error_traceback)
+            return
+
+        def resolve(pending_item):
+            target_fn, recipe_id, key, detail_recipes = pending_item
+            if isinstance(detail_recipes, concurrent.futures.Future):
+                # errors other than AttributeError in the crawler (e.g. pickling) are raised here
+                detail_recipes, error_traceback = detail_recipes.result()
+                return finish(target_fn, recipe_id, key, detail_recipes, error_traceback)
+            return target_fn, recipe_id, detail_recipes, None
+
+        max_pending = self.parse_workers * 4 # bound raw contents held in memory
+        pending = collections.deque() # value: (cache filename, recipe id, key, detail recipes or Future)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=self.parse_workers, mp_context=_parse_pool_context()) as executor:
+            for target_fn, recipe_id in parse_targets:
+                key, detail_recipes, content = prepare(target_fn, recipe_id)
+                if detail_recipes is None:
+                    if content is None:
+                        continue
+                    detail_recipes = executor.submit(_parse_detail_content, self, content, recipes[recipe_id], self.manifest.get(target_fn.name)["content_type"])
+                pending.append((target_fn, recipe_id, key, detail_recipes))
+
+                while max_pending <= len(pending):
+                    yield resolve(pending.popleft())
+
+            while len(pending):
+                yield resolve(pending.popleft())
+
+    def _get_parsed_recipe_details(self, cache_name, key, parsed_recipe_cache):
+        detail_recipes = parsed_recipe_cache.get(cache_name, key)
+        if detail_recipes is not None:
+            logger.debug("{}: parsed cache : {}".format(self.__class__.site_name, cache_name))
+            recipe_crawler.metrics.count("parsed_cache_hit", self.__class__.site_name)
+        return detail_recipes
+
+    @property
+    def _parse_cache_version(self):
+        return "{}-{}".format(self.__class__.parser_version, self.parser)
+
+    def _with_parser_fallback(self, parse_func, content, arg):
+        if self.parser != "auto":
+            return parse_func(content, arg)
+
+        try:
+            return parse_func(content, copy.deepcopy(arg))
+        except Exception:
+            logger.debug("{}: lxml failed. retry with html5lib.".format(self.__class__.site_name), exc_info=True)
+
+        self._soup_parser = "html5lib"
+        try:
+            return parse_func(content, arg)
+        finally:
+            self._soup_parser = "lxml"
+
+    def _parse_overview_content(self, content, entry_url):
+        with recipe_crawler.metrics.timer("convert_overview", self.__class__.site_name):
+            converted_overview_content = self._convert_overview_content(content)
+        with recipe_crawler.metrics.timer("extract_overview", self.__class__.site_name):
+            return self._get_recipe_overviews(converted_overview_content, entry_url)
+
+    def _parse_detail_content(self, content, overview_recipe, content_type=None):
+        self._content_type = content_type
+        try:
+            return self._with_parser_fallback(self._parse_detail_content_with_current_parser, content, overview_recipe)
+        finally:
+            self._content_type = None
+
+    def _parse_detail_content_with_current_parser(self, content, overview_recipe):
+        with recipe_crawler.metrics.timer("convert_detail", self.__class__.site_name):
+            converted_content = self._convert_detail_content(content)
+        with recipe_crawler.metrics.timer("extract_detail", self.__class__.site_name):
+            return list(self._recipe_details_generator(converted_content, overview_recipe))
+
     def _expand_entry_urls(self):
         return self.entry_urls
     
     def _is_existed_recipe(self, recipe):
         assert isinstance(recipe, recipe_crawler.models.Recipe)
-        return (self.cache_dir / str(recipe.id)).exists()
+        return str(recipe.id) in self.manifest
 
     def _get_new_fn(self, from_path, prefix_mark, prefix_times):
         prefix = prefix_mark * prefix_times
@@ -119,11 +344,25 @@ class RecipeCrawlerTemplate(metaclass=ABCMeta):
             return self._get_new_fn(from_path, prefix_mark, prefix_times + 1)
         return to_path
 
+    def _http_get(self, url, **kwargs):
+        if not self.tls_verify:
+            kwargs["verify"] = False
+        return recipe_crawler.sessions.get(url, **kwargs)
+
+    def _resolve_encoding(self, raw_content, content_type=None):
+        with recipe_crawler.metrics.timer("encoding", self.__class__.site_name):
+            return self.encoding_resolver.resolve(raw_content, content_type=content_type or self._content_type)
+
+    def _make_soup(self, raw_content, content_type=None):
+        encoding = self._resolve_encoding(raw_content, content_type)
+        with recipe_crawler.metrics.timer("soup", self.__class__.site_name):
+            return BeautifulSoup(raw_content, self._soup_parser, from_encoding=encoding)
+
     def _convert_overview_content(self, raw_content):
-        return BeautifulSoup(raw_content, "html5lib", from_encoding=chardet.detect(raw_content)["encoding"])
+        return self._make_soup(raw_content)
 
     def _convert_detail_content(self, raw_content):
-        return BeautifulSoup(raw_content, "html5lib", from_encoding=chardet.detect(raw_content)["encoding"])
+        return self._make_soup(raw_content)
         
 
     def _trans_to_recipe_id_from_str(self, target_id_str):
@@ -148,3 +387,19 @@ class RecipeCrawlerTemplate(metaclass=ABCMeta):
         must deepcopy "recipe" before use
         """
         pass
+
+def _parse_pool_context():
+    # not fork: this process runs fetch, upload and --jobs threads, and a forked child can inherit their held locks (logging, sessions)
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+def _parse_detail_content(crawler, content, overview_recipe, content_type=None):
+    """
+    entry point of process pool workers.
+    return (detail recipes, None), or (None, traceback string) if the content is not expected format.
+    """
+    try:
+        return crawler._parse_detail_content(content, overview_recipe, content_type), None
+    except AttributeError:
+        return None, traceback.format_exc()
@@ -13,7 +13,6 @@ import logging
 import dateutil
 import datetime
 import json
-import chardet
 import copy
 
 logger = logging.getLogger(__name__)
@@ -34,7 +33,7 @@ class NhkKobaraSuitemasenka2RecipeCrawler(bases.RecipeCrawlerTemplate):
         return target_fn.stem
 
     def _convert_overview_content(self, raw_content):
-        return json.loads(raw_content, encoding=chardet.detect(raw_content))
+        return json.loads(raw_content.decode(self._resolve_encoding(raw_content)))
 
     def _get_recipe_overviews(self, jdata, entry_url):
         recipes = dict() # key: Recipe.id, value: Recipe
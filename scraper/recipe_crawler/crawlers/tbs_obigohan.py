@@ -9,11 +9,9 @@ Created on Fri Aug 30 22:10:59 2019
 from . import bases
 from recipe_crawler.models import Recipe, RecipeText
 
-from bs4 import BeautifulSoup
 import re
 import logging
 import copy
-import requests
 import dateutil
 import urllib
 
@@ -25,9 +23,9 @@ class TbsObigohanRecipeCrawler(bases.RecipeCrawlerTemplate):
     def _expand_entry_urls(self):
         ret = set()
         def extract_back_url(target_url):
-            res = requests.get(target_url)
+            res = self._http_get(target_url)
             if res.ok:
-                soup = BeautifulSoup(res.content, "html5lib", from_encoding=res.apparent_encoding)
+                soup = self._make_soup(res.content, content_type=res.headers.get("Content-Type"))
                 back_btn = soup.select_one("#backBtn")
                 if back_btn:
                     back_url = urllib.parse.urljoin(target_url, back_btn.a["href"])
@@ -12,9 +12,7 @@ import urllib
 import re
 import logging
 import dateutil
-import requests
 import copy
-from bs4 import BeautifulSoup
 
 logger = logging.getLogger(__name__)
 
@@ -35,9 +33,9 @@ class ThreeMinCookingRecipeCrawler(bases.RecipeCrawlerTemplate):
 
     def _get_recipe_overviews(self, overview_soup, entry_url):
         def get_other_recipe(detail_url):
-            res = requests.get(detail_url, verify=False)
+            res = self._http_get(detail_url)
             if res.ok:
-                soup = BeautifulSoup(res.content, "html5lib", from_encoding=res.apparent_encoding)
+                soup = self._make_soup(res.content, content_type=res.headers.get("Content-Type"))
                 other_recipe_node = soup.select_one("#other-recipe")
                 if other_recipe_node:
                     other_recipe = Recipe()
@@ -12,9 +12,7 @@ import urllib
 import re
 import logging
 import dateutil
-import requests
 import copy
-from bs4 import BeautifulSoup
 
 logger = logging.getLogger(__name__)
 
@@ -36,9 +34,9 @@ class ThreeMinCooking2RecipeCrawler(bases.RecipeCrawlerTemplate):
     def _get_recipe_overviews(self, overview_soup, entry_url):
         def get_other_recipes(detail_url):
             ret = dict() # key: Recipe.id, value: Recipe
-            res = requests.get(detail_url, verify=False)
+            res = self._http_get(detail_url)
             if res.ok:
-                soup = BeautifulSoup(res.content, "html5lib", from_encoding=res.apparent_encoding)
+                soup = self._make_soup(res.content, content_type=res.headers.get("Content-Type"))
                 for other_recipe_node in soup.find_all("div", "detail-more-title"):
                     other_recipe = Recipe()
                     other_recipe.detail_url = urllib.parse.urljoin(detail_url, other_recipe_node.a["href"])
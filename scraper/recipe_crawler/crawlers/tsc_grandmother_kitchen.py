@@ -9,11 +9,9 @@ Created on Fri Aug 30 22:10:59 2019
 from . import bases
 from recipe_crawler.models import Recipe, RecipeText
 
-from bs4 import BeautifulSoup
 import re
 import logging
 import copy
-import requests
 import datetime
 
 logger = logging.getLogger(__name__)
@@ -24,9 +22,9 @@ class TscGrandmotherKitchenRecipeCrawler(bases.RecipeCrawlerTemplate):
     def _expand_entry_urls(self):
         ret = set()
         for entry_url in self.entry_urls:
-            res = requests.get(entry_url)
+            res = self._http_get(entry_url)
             if res.ok:
-                soup = BeautifulSoup(res.content, "html5lib", from_encoding=res.apparent_encoding)
+                soup = self._make_soup(res.content, content_type=res.headers.get("Content-Type"))
                 last_page_url = soup.find("div", "pagination").find_all("a")[-1]["href"]
                 page_url, last_page_num_str = re.search(r"(.*)/(\d+)/$", last_page_url).groups()
                 for page_num in range(1, int(last_page_num_str) + 1):
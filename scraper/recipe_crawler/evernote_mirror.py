@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 21:05:38 2026
+
+@author: yuki_next
+"""
+
+import collections
+import json
+import logging
+import threading
+
+import evernote.edam.notestore.ttypes as NSTypes
+
+logger = logging.getLogger(__name__)
+
+class NotebookMirror(object):
+    """
+    local copy of guid, title and source url of the notes in one evernote notebook.
+    it is kept up to date by incremental sync from the last update sequence number (USN),
+    so that the existence check of a note title is a lookup of an in-memory set.
+    """
+    sync_chunk_size = 100
+
+    def __init__(self, store_filename):
+        self.store_filename = store_filename
+        self.notebook_guid = None
+        self.usn = 0 # update sequence number of the account synced last time
+        self.synced_at = None # server time of the last sync. msec
+        self.notes = dict() # key: note guid, value: dict(title, source_url)
+        self._titles = collections.Counter()
+        self._lock = threading.RLock()
+
+        if self.store_filename.exists():
+            try:
+                j = json.loads(self.store_filename.read_text())
+                self.notebook_guid = j["notebook_guid"]
+                self.usn = j["usn"]
+                self.synced_at = j.get("synced_at")
+                self.notes.update(j["notes"])
+            except (ValueError, KeyError):
+                logger.exception("broken notebook mirror. ignored: {}".format(self.store_filename))
+                self._reset(None)
+        self._titles.update(note["title"] for note in self.notes.values())
+
+    def _reset(self, notebook_guid):
+        self.notebook_guid = notebook_guid
+        self.usn = 0
+        self.synced_at = None
+        self.notes.clear()
+        self._titles.clear()
+
+    def __contains__(self, title):
+        with self._lock:
+            return 0 < self._titles[title]
+
+    def __len__(self):
+        return len(self.notes)
+
+    def add(self, guid, title, source_url=None):
+        with self._lock:
+            self.remove(guid)
+            self.notes[guid] = {"title": title, "source_url": source_url}
+            self._titles[title] += 1
+
+    def remove(self, guid):
+        with self._lock:
+            note = self.notes.pop(guid, None)
+            if note is not None:
+                self._titles[note["title"]] -= 1
+                if self._titles[note["title"]] <= 0:
+                    del self._titles[note["title"]]
+
+    def sync(self, note_store, notebook_guid):
+        """
+        apply the changes of the account after the last sync.
+        full sync if the notebook is changed or the server requires it (fullSyncBefore).
+        """
+        with self._lock:
+            if notebook_guid != self.notebook_guid:
+                logger.info("notebook mirror: full sync of notebook {}".format(notebook_guid))
+                self._reset(notebook_guid)
+
+            sync_state = note_store.getSyncState()
+            if self.synced_at is not None and self.synced_at < sync_state.fullSyncBefore:
+                logger.info("notebook mirror: full sync is required by the server")
+                self._reset(notebook_guid)
+
+            if self.usn < sync_state.updateCount:
+                sync_filter = NSTypes.SyncChunkFilter(includeNotes=True, includeNoteAttributes=True, includeExpunged=True)
+                while self.usn < sync_state.updateCount:
+                    sync_chunk = note_store.getFilteredSyncChunk(self.usn, self.sync_chunk_size, sync_filter)
+                    self._apply_sync_chunk(sync_chunk)
+                    if sync_chunk.chunkHighUSN is None:
+                        break
+                    self.usn = sync_chunk.chunkHighUSN
+                logger.info("notebook mirror: {} notes at USN {}".format(len(self.notes), self.usn))
+
+            self.usn = max(self.usn, sync_state.updateCount)
+            self.synced_at = sync_state.currentTime
+            self.save()
+
+    def _apply_sync_chunk(self, sync_chunk):
+        for note in sync_chunk.notes or list():
+            if note.notebookGuid != self.notebook_guid or note.deleted or note.active == False:
+                self.remove(note.guid) # moved to another notebook or trash
+            else:
+                self.add(note.guid, note.title, source_url=note.attributes.sourceURL if note.attributes else None)
+        for guid in sync_chunk.expungedNotes or list():
+            self.remove(guid)
+
+    def save(self):
+        with self._lock:
+            tmp_filename = self.store_filename.with_name(self.store_filename.name + ".tmp")
+            tmp_filename.write_text(json.dumps({
+                "notebook_guid": self.notebook_guid,
+                "usn": self.usn,
+                "synced_at": self.synced_at,
+                "notes": self.notes,
+            }, ensure_ascii=False))
+            tmp_filename.replace(self.store_filename)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Oct 21 10:12:44 2026
+
+@author: yuki_next
+"""
+
+import concurrent.futures
+import http.client
+import logging
+import threading
+import time
+
+import evernote.edam.error.ttypes as Errors
+import evernote.edam.notestore.ttypes as NSTypes
+import evernote.edam.type.ttypes as Types
+import recipe_crawler.metrics
+from thrift.transport.TTransport import TTransportException
+
+logger = logging.getLogger(__name__)
+
+class EvernoteUploader(object):
+    """
+    queue of note store calls run by a few workers. each worker has its own note store made by note_store_factory.
+    when evernote answers RATE_LIMIT_REACHED, all workers pause for rateLimitDuration and the call is retried.
+    transient errors (connection errors, SHARD_UNAVAILABLE) are retried with exponential backoff.
+    createNote may have been done by the server before a connection error, so the note is looked up before it is retried.
+    at most workers * 2 calls are queued, so submit() blocks while the workers are busy.
+    """
+    _transient_errors = (TTransportException, OSError, http.client.HTTPException)
+    _transient_error_codes = (Errors.EDAMErrorCode.SHARD_UNAVAILABLE, )
+    created_note_lookup_num = 50 # latest notes of the notebook searched for a note created before a connection error
+
+    def __init__(self, note_store_factory, workers=3, max_retries=5, backoff_factor=1.0):
+        self.note_store_factory = note_store_factory
+        self.workers = workers
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+        self._queue_slots = threading.BoundedSemaphore(workers * 2)
+        self._local = threading.local() # note store of each worker
+        self._resume_at = 0 # time.monotonic() until which all workers pause
+        self._pause_lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    def submit(self, method_name, *args, **kwargs):
+        """
+        call note_store.<method_name>(*args, **kwargs) in a worker. return concurrent.futures.Future
+        """
+        self._queue_slots.acquire()
+        try:
+            future = self._executor.submit(self._call, method_name, recipe_crawler.metrics.current_site(), args, kwargs)
+        except Exception:
+            self._queue_slots.release()
+            raise
+        future.add_done_callback(lambda _: self._queue_slots.release())
+        return future
+
+    def call(self, method_name, *args, **kwargs):
+        return self.submit(method_name, *args, **kwargs).result()
+
+    def _get_note_store(self):
+        if getattr(self._local, "note_store", None) is None:
+            self._local.note_store = self.note_store_factory()
+        return self._local.note_store
+
+    def _pause(self, seconds):
+        with self._pause_lock:
+            resume_at = time.monotonic() + seconds
+            if self._resume_at < resume_at:
+                logger.warning("evernote rate limit reached. pause {} seconds".format(seconds))
+                self._resume_at = resume_at
+
+    def _wait_pause(self):
+        while True:
+            with self._pause_lock:
+                wait_seconds = self._resume_at - time.monotonic()
+            if wait_seconds <= 0:
+                return
+            time.sleep(wait_seconds)
+
+    def _find_created_note(self, note_store, note):
+        """
+        the note created by a createNote whose response was lost, or None.
+        matched by title and the created time set by the client. no search words, as the search index is updated later.
+        """
+        note_filter = NSTypes.NoteFilter(notebookGuid=note.notebookGuid, order=Types.NoteSortOrder.CREATED, ascending=False)
+        result_spec = NSTypes.NotesMetadataResultSpec(includeTitle=True, includeCreated=True, includeNotebookGuid=True)
+        metalist = note_store.findNotesMetadata(note_filter, 0, self.created_note_lookup_num, result_spec)
+        for meta_ in metalist.notes:
+            if meta_.title == note.title and meta_.created == note.created:
+                return Types.Note(guid=meta_.guid, title=meta_.title, created=meta_.created, notebookGuid=meta_.notebookGuid)
+        return None
+
+    def _call(self, method_name, site, args, kwargs):
+        # site: site of the thread which submitted the call, for metrics
+        retry_num = 0
+        is_maybe_sent = False # a connection error may come after the server has done the call
+        if method_name == "createNote" and args[0].created is None:
+            args[0].created = int(time.time() * 1000) # identifies the note in _find_created_note
+        while True:
+            self._wait_pause()
+            try:
+                note_store = self._get_note_store()
+                if is_maybe_sent and method_name == "createNote":
+                    created_note = self._find_created_note(note_store, args[0])
+                    if created_note is not None:
+                        logger.warning("note was created before the connection error. not retried: {}".format(created_note.title))
+                        return created_note
+                with recipe_crawler.metrics.timer("evernote_{}".format(method_name), site):
+                    return getattr(note_store, method_name)(*args, **kwargs)
+            except Errors.EDAMSystemException as e:
+                if e.errorCode == Errors.EDAMErrorCode.RATE_LIMIT_REACHED:
+                    recipe_crawler.metrics.count("evernote_rate_limit_reached", site)
+                    self._pause(e.rateLimitDuration or 1)
+                    continue # not counted as retry
+                if not e.errorCode in self._transient_error_codes or self.max_retries <= retry_num:
+                    raise
+                error = e
+            except self._transient_errors as e:
+                if self.max_retries <= retry_num:
+                    raise
+                self._local.note_store = None # reconnect
+                is_maybe_sent = True
+                error = e
+
+            recipe_crawler.metrics.count("evernote_retries", site)
+            backoff = self.backoff_factor * (2 ** retry_num)
+            retry_num += 1
+            logger.warning("{} failed. retry {}/{} after {} seconds: {!r}".format(method_name, retry_num, self.max_retries, backoff, error))
+            time.sleep(backoff)
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Thu Oct 22 08:37:51 2026
+
+@author: yuki_next
+"""
+
+import collections
+import copy
+import logging
+import threading
+import time
+import uuid
+
+import evernote.edam.error.ttypes as Errors
+import evernote.edam.notestore.ttypes as NSTypes
+import evernote.edam.type.ttypes as Types
+
+logger = logging.getLogger(__name__)
+
+class FakeEvernoteAccount(object):
+    """
+    in-process evernote account for benchmarks and runs without a real account.
+    note stores made by get_note_store() share the notes, notebooks and tags of the account.
+
+    latency: seconds added to every api call.
+    rate_limit: max api calls in rate_limit_window seconds. over it, RATE_LIMIT_REACHED is raised
+    with rateLimitDuration until the oldest call leaves the window. None is no limit.
+    """
+    def __init__(self, latency=0.0, rate_limit=None, rate_limit_window=60.0):
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.rate_limit_window = rate_limit_window
+        self.calls = collections.Counter() # key: method name, value: number of calls
+        self.rate_limit_reached_num = 0
+        self.notebooks = collections.OrderedDict() # key: guid, value: Types.Notebook
+        self.notes = collections.OrderedDict() # key: guid, value: Types.Note
+        self.tags = collections.OrderedDict() # key: guid, value: Types.Tag
+        self.expunged_notes = dict() # key: guid, value: usn
+        self.update_count = 0
+        self.full_sync_before = 0 # msec. clients synced before it must do a full sync
+        self._call_times = collections.deque()
+        self._lock = threading.RLock()
+
+    def get_note_store(self):
+        return FakeNoteStore(self)
+
+    def _begin_call(self, method_name):
+        with self._lock:
+            self.calls[method_name] += 1
+            if self.rate_limit is not None:
+                now = time.monotonic()
+                while len(self._call_times) and self.rate_limit_window <= now - self._call_times[0]:
+                    self._call_times.popleft()
+                if self.rate_limit <= len(self._call_times):
+                    self.rate_limit_reached_num += 1
+                    duration = max(1, int(self.rate_limit_window - (now - self._call_times[0]) + 0.999))
+                    raise Errors.EDAMSystemException(errorCode=Errors.EDAMErrorCode.RATE_LIMIT_REACHED, rateLimitDuration=duration)
+                self._call_times.append(now)
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _next_usn(self):
+        self.update_count += 1
+        return self.update_count
+
+class FakeEvernoteClient(object):
+    """
+    stand-in of evernote.api.client.EvernoteClient
+    """
+    def __init__(self, account):
+        self.account = account
+
+    def get_note_store(self):
+        return self.account.get_note_store()
+
+class FakeNoteStore(object):
+    """
+    subset of evernote NoteStore.Client used by recipe_main. the authentication token argument is omitted as the real client.
+    """
+    def __init__(self, account):
+        self.account = account
+
+    def _now(self):
+        return int(time.time() * 1000)
+
+    def _tag_guids(self, tag_names):
+        guids = list()
+        for tag_name in tag_names or list():
+            tag = next((tag for tag in self.account.tags.values() if tag.name == tag_name), None)
+            if tag is None:
+                tag = Types.Tag(guid=str(uuid.uuid4()), name=tag_name, updateSequenceNum=self.account._next_usn())
+                self.account.tags[tag.guid] = tag
+            guids.append(tag.guid)
+        return guids
+
+    def _get_note(self, guid):
+        note = self.account.notes.get(guid)
+        if note is None:
+            raise Errors.EDAMNotFoundException(identifier="Note.guid", key=guid)
+        return note
+
+    def listNotebooks(self):
+        self.account._begin_call("listNotebooks")
+        with self.account._lock:
+            return [copy.copy(notebook) for notebook in self.account.notebooks.values()]
+
+    def createNotebook(self, notebook):
+        self.account._begin_call("createNotebook")
+        with self.account._lock:
+            created = copy.copy(notebook)
+            created.guid = str(uuid.uuid4())
+            created.updateSequenceNum = self.account._next_usn()
+            self.account.notebooks[created.guid] = created
+            return copy.copy(created)
+
+    def listTags(self):
+        self.account._begin_call("listTags")
+        with self.account._lock:
+            return [copy.copy(tag) for tag in self.account.tags.values()]
+
+    def _filter_notes(self, note_filter):
+        notes = list()
+        words = (note_filter.words or "").split()
+        for note in self.account.notes.values():
+            if note_filter.notebookGuid and note.notebookGuid != note_filter.notebookGuid:
+                continue
+            if note.active != (not note_filter.inactive):
+                continue
+            if not all(word in note.title or word in (note.content or "") for word in words):
+                continue
+            notes.append(note)
+
+        sort_key = {
+            Types.NoteSortOrder.CREATED: lambda note: note.created,
+            Types.NoteSortOrder.UPDATED: lambda note: note.updated,
+            Types.NoteSortOrder.TITLE: lambda note: note.title,
+        }.get(note_filter.order, lambda note: note.created)
+        notes.sort(key=sort_key, reverse=not note_filter.ascending)
+        return notes
+
+    def findNotesMetadata(self, note_filter, offset, max_notes, result_spec):
+        self.account._begin_call("findNotesMetadata")
+        with self.account._lock:
+            notes = self._filter_notes(note_filter)
+            metas = list()
+            for note in notes[offset:offset + max_notes]:
+                meta_ = NSTypes.NoteMetadata(guid=note.guid)
+                if result_spec.includeTitle:
+                    meta_.title = note.title
+                if result_spec.includeTagGuids:
+                    meta_.tagGuids = list(note.tagGuids or list())
+                if result_spec.includeNotebookGuid:
+                    meta_.notebookGuid = note.notebookGuid
+                if result_spec.includeCreated:
+                    meta_.created = note.created
+                if result_spec.includeUpdated:
+                    meta_.updated = note.updated
+                if result_spec.includeAttributes:
+                    meta_.attributes = copy.copy(note.attributes)
+                metas.append(meta_)
+            return NSTypes.NotesMetadataList(startIndex=offset, totalNotes=len(notes), notes=metas, updateCount=self.account.update_count)
+
+    def findNotes(self, note_filter, offset, max_notes):
+        self.account._begin_call("findNotes")
+        with self.account._lock:
+            notes = self._filter_notes(note_filter)
+            return NSTypes.NoteList(startIndex=offset, totalNotes=len(notes), notes=[copy.copy(note) for note in notes[offset:offset + max_notes]], updateCount=self.account.update_count)
+
+    def createNote(self, note):
+        self.account._begin_call("createNote")
+        with self.account._lock:
+            created = copy.copy(note)
+            created.guid = str(uuid.uuid4())
+            created.created = created.created or self._now() # the client can set it, as the real service
+            created.updated = self._now()
+            created.active = True
+            if not created.notebookGuid:
+                created.notebookGuid = next(iter(self.account.notebooks), None)
+            created.tagGuids = list(created.tagGuids or list()) + self._tag_guids(created.tagNames)
+            created.tagNames = None
+            created.updateSequenceNum = self.account._next_usn()
+            self.account.notes[created.guid] = created
+            return copy.copy(created)
+
+    def updateNote(self, note):
+        self.account._begin_call("updateNote")
+        with self.account._lock:
+            updated = self._get_note(note.guid)
+            for name in ("title", "content", "resources", "attributes", "notebookGuid", "active"):
+                if getattr(note, name) is not None:
+                    setattr(updated, name, getattr(note, name))
+            if note.tagGuids is not None or note.tagNames is not None:
+                updated.tagGuids = list(note.tagGuids or list()) + self._tag_guids(note.tagNames)
+            updated.updated = self._now()
+            updated.updateSequenceNum = self.account._next_usn()
+            return copy.copy(updated)
+
+    def getNote(self, guid, with_content, with_resources_data, with_resources_recognition, with_resources_alternate_data):
+        self.account._begin_call("getNote")
+        with self.account._lock:
+            note = copy.copy(self._get_note(guid))
+            if not with_content:
+                note.content = None
+            return note
+
+    def getNoteTagNames(self, guid):
+        self.account._begin_call("getNoteTagNames")
+        with self.account._lock:
+            return [self.account.tags[tag_guid].name for tag_guid in self._get_note(guid).tagGuids or list()]
+
+    def expungeNote(self, guid):
+        self.account._begin_call("expungeNote")
+        with self.account._lock:
+            self._get_note(guid)
+            del self.account.notes[guid]
+            usn = self.account._next_usn()
+            self.account.expunged_notes[guid] = usn
+            return usn
+
+    def getSyncState(self):
+        self.account._begin_call("getSyncState")
+        with self.account._lock:
+            return NSTypes.SyncState(currentTime=self._now(), fullSyncBefore=self.account.full_sync_before, updateCount=self.account.update_count, uploaded=0)
+
+    def getFilteredSyncChunk(self, after_usn, max_entries, sync_filter):
+        self.account._begin_call("getFilteredSyncChunk")
+        with self.account._lock:
+            entries = list() # (usn, kind, value)
+            if sync_filter.includeNotes:
+                entries.extend([(note.updateSequenceNum, "note", note) for note in self.account.notes.values() if after_usn < note.updateSequenceNum])
+            if sync_filter.includeNotebooks:
+                entries.extend([(notebook.updateSequenceNum, "notebook", notebook) for notebook in self.account.notebooks.values() if after_usn < notebook.updateSequenceNum])
+            if sync_filter.includeTags:
+                entries.extend([(tag.updateSequenceNum, "tag", tag) for tag in self.account.tags.values() if after_usn < tag.updateSequenceNum])
+            if sync_filter.includeExpunged:
+                entries.extend([(usn, "expunged_note", guid) for guid, usn in self.account.expunged_notes.items() if after_usn < usn])
+            entries.sort(key=lambda entry: entry[0])
+            entries = entries[:max_entries]
+
+            def chunk_notes():
+                notes = list()
+                for _, kind, note in entries:
+                    if kind == "note":
+                        note = copy.copy(note)
+                        note.content = None
+                        note.resources = None
+                        if not sync_filter.includeNoteAttributes:
+                            note.attributes = None
+                        notes.append(note)
+                return notes
+
+            return NSTypes.SyncChunk(
+                    currentTime=self._now(),
+                    chunkHighUSN=entries[-1][0] if len(entries) else None,
+                    updateCount=self.account.update_count,
+                    notes=chunk_notes(),
+                    notebooks=[copy.copy(value) for _, kind, value in entries if kind == "notebook"],
+                    tags=[copy.copy(value) for _, kind, value in entries if kind == "tag"],
+                    expungedNotes=[value for _, kind, value in entries if kind == "expunged_note"],
+                    )
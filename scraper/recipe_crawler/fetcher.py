@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 10:12:31 2026
+
+@author: yuki_next
+"""
+
+import concurrent.futures
+import logging
+import threading
+import time
+import urllib
+
+import requests
+import recipe_crawler.sessions
+
+logger = logging.getLogger(__name__)
+
+class HostRateLimiter(object):
+    """
+    limit requests to one host: at most "concurrency" requests in flight,
+    and each request starts at least "interval" seconds after the previous one.
+    """
+    def __init__(self, interval=1.0, concurrency=1):
+        self.interval = max(0.0, float(interval))
+        self.concurrency = max(1, int(concurrency))
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._next_start = 0.0
+
+    def tighten(self, interval, concurrency):
+        """
+        keep the stricter limits of the sites sharing this host
+        """
+        with self._condition:
+            self.interval = max(self.interval, float(interval))
+            self.concurrency = min(self.concurrency, max(1, int(concurrency)))
+
+    def __enter__(self):
+        with self._condition:
+            while self.concurrency <= self._in_flight:
+                self._condition.wait()
+            self._in_flight += 1
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.interval
+        if now < start:
+            time.sleep(start - now)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify()
+        return False
+
+_limiters = dict() # key: host, value: HostRateLimiter. shared by all crawlers, so sites crawled in parallel (--jobs) keep the host limits
+_limiters_lock = threading.Lock()
+
+def get_host_limiter(host, interval=1.0, concurrency=1):
+    with _limiters_lock:
+        if not host in _limiters:
+            _limiters[host] = HostRateLimiter(interval, concurrency)
+        else:
+            _limiters[host].tighten(interval, concurrency)
+        return _limiters[host]
+
+class ConcurrentFetcher(object):
+    """
+    download urls concurrently in a thread pool, keeping per host limits.
+    """
+    def __init__(self, interval=1.0, concurrency=1, verify=True):
+        self.interval = interval
+        self.concurrency = concurrency
+        self.verify = verify # False: skip TLS verification
+
+    @classmethod
+    def from_site_config(cls, site_config):
+        interval = site_config.get("fetch_interval")
+        concurrency = site_config.get("fetch_concurrency")
+        return cls(
+                interval=1.0 if interval is None else interval,
+                concurrency=1 if concurrency is None else concurrency,
+                verify=site_config.get("tls_verify", True) is not False)
+
+    def _get_limiter(self, url):
+        return get_host_limiter(urllib.parse.urlparse(url).netloc, self.interval, self.concurrency)
+
+    def fetch(self, url):
+        with self._get_limiter(url):
+            if not self.verify:
+                return recipe_crawler.sessions.get(url, verify=False)
+            return recipe_crawler.sessions.get(url)
+
+    def fetch_all(self, items):
+        """
+        items: iterable of (key, url)
+        yield (key, response) in completed order. response is None if the request failed.
+        """
+        items = list(items)
+        if len(items) == 0:
+            return
+
+        hosts = set([urllib.parse.urlparse(url).netloc for _, url in items])
+        max_workers = max(1, len(hosts) * max(1, int(self.concurrency)))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            future_to_key = dict([(executor.submit(self.fetch, url), key) for key, url in items])
+            for future in concurrent.futures.as_completed(future_to_key):
+                key = future_to_key[future]
+                try:
+                    yield key, future.result()
+                except requests.exceptions.RequestException:
+                    logger.exception("fetch failed.")
+                    yield key, None
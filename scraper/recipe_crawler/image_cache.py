@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 08:14:26 2026
+
+@author: yuki_next
+"""
+
+import collections
+import hashlib
+import json
+import logging
+import threading
+import time
+
+import recipe_crawler.sessions
+
+logger = logging.getLogger(__name__)
+
+class ImageCache(object):
+    """
+    on-disk image store. image bodies are stored once per content hash under objects/,
+    and _index.json maps source urls to them with http validators.
+    least recently used urls are evicted when the total size exceeds max_bytes.
+    the index is saved every save_every changed urls and by close().
+    """
+    def __init__(self, cache_dir, max_bytes=1024 * 1024 * 1024, max_age=30 * 24 * 60 * 60, save_every=100):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age = max_age # seconds until revalidation. None is never revalidate.
+        self.save_every = save_every
+        self.index_filename = cache_dir / "_index.json"
+        self.urls = collections.OrderedDict() # key: source url, value: dict(sha256, etag, last_modified, fetched_at, last_access). least recently used first
+        self.blobs = dict() # key: sha256, value: size
+        self._refs = collections.Counter() # key: sha256, value: number of urls
+        self._total_bytes = 0
+        self._changed_num = 0 # changes not saved
+        self._lock = threading.RLock()
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        if self.index_filename.exists():
+            try:
+                j = json.loads(self.index_filename.read_text())
+                self.urls.update(sorted(j.get("urls", dict()).items(), key=lambda item: item[1]["last_access"]))
+                self.blobs.update(j.get("blobs", dict()))
+            except ValueError:
+                logger.exception("broken image cache index. ignored: {}".format(self.index_filename))
+        self._refs.update([entry["sha256"] for entry in self.urls.values()])
+        self._total_bytes = sum(self.blobs.values())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    @property
+    def total_bytes(self):
+        return self._total_bytes
+
+    def _blob_filename(self, sha256):
+        return self.cache_dir / "objects" / sha256[:2] / sha256
+
+    def _read_blob(self, entry):
+        try:
+            return self._blob_filename(entry["sha256"]).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def _write_blob(self, sha256, content):
+        blob_filename = self._blob_filename(sha256)
+        blob_filename.parent.mkdir(parents=True, exist_ok=True)
+        tmp_filename = blob_filename.with_name("{}.{}.tmp".format(blob_filename.name, threading.get_ident()))
+        tmp_filename.write_bytes(content)
+        tmp_filename.replace(blob_filename)
+
+    def _touch(self, source_url, entry):
+        entry["last_access"] = time.time()
+        self.urls.move_to_end(source_url)
+        self._changed()
+
+    def _changed(self):
+        self._changed_num += 1
+        if self.save_every <= self._changed_num:
+            self.save()
+
+    def get(self, source_url):
+        """
+        return image bytes of source_url, or None if it can not be fetched.
+        """
+        with self._lock:
+            entry = self.urls.get(source_url)
+        content = self._read_blob(entry) if entry else None
+        if content is not None:
+            with self._lock:
+                if self.urls.get(source_url) is entry:
+                    self._touch(source_url, entry)
+            if self.max_age is None or time.time() - entry["fetched_at"] < self.max_age:
+                logger.debug("image cache hit: {}".format(source_url))
+                return content
+
+        headers = dict()
+        if content is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        logger.debug("get: {}".format(source_url))
+        res = recipe_crawler.sessions.get(source_url, headers=headers)
+        if res.status_code == 304 and content is not None:
+            with self._lock:
+                entry["fetched_at"] = time.time()
+                self._changed()
+            return content
+        if not res.ok:
+            return None
+
+        self.put(source_url, res.content, etag=res.headers.get("ETag"), last_modified=res.headers.get("Last-Modified"))
+        return res.content
+
+    def put(self, source_url, content, etag=None, last_modified=None):
+        sha256 = hashlib.sha256(content).hexdigest()
+        with self._lock:
+            is_stored = sha256 in self.blobs
+        if not is_stored:
+            self._write_blob(sha256, content) # out of the lock, not to block other downloads
+
+        with self._lock:
+            if not sha256 in self.blobs:
+                if is_stored: # evicted meanwhile
+                    self._write_blob(sha256, content)
+                self.blobs[sha256] = len(content)
+                self._total_bytes += len(content)
+            else:
+                logger.debug("image cache dedup: {}".format(source_url))
+
+            now = time.time()
+            old_entry = self.urls.pop(source_url, None)
+            self.urls[source_url] = {
+                "sha256": sha256,
+                "etag": etag,
+                "last_modified": last_modified,
+                "fetched_at": now,
+                "last_access": now,
+            }
+            self._refs[sha256] += 1
+            if old_entry:
+                self._release_blob(old_entry["sha256"])
+
+            self._evict()
+            self._changed()
+
+    def _release_blob(self, sha256):
+        self._refs[sha256] -= 1
+        if 0 < self._refs[sha256]:
+            return
+        del self._refs[sha256]
+        size = self.blobs.pop(sha256, None)
+        if size is not None:
+            self._total_bytes -= size
+            blob_filename = self._blob_filename(sha256)
+            if blob_filename.exists():
+                blob_filename.unlink()
+
+    def _evict(self):
+        if self.max_bytes is None:
+            return
+        while self.max_bytes < self._total_bytes and len(self.urls):
+            source_url, entry = self.urls.popitem(last=False)
+            self._release_blob(entry["sha256"])
+            logger.debug("image cache evict: {}".format(source_url))
+
+    def save(self):
+        with self._lock:
+            if self._changed_num == 0 and self.index_filename.exists():
+                return
+            tmp_filename = self.index_filename.with_name(self.index_filename.name + ".tmp")
+            tmp_filename.write_text(json.dumps({"urls": self.urls, "blobs": self.blobs}))
+            tmp_filename.replace(self.index_filename)
+            self._changed_num = 0
+
+    def close(self):
+        self.save()
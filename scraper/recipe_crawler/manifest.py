@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 19:33:08 2026
+
+@author: yuki_next
+"""
+
+import datetime
+import hashlib
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+class CacheManifest(object):
+    """
+    list of the cached pages in cache_dir, kept in cache_dir/_manifest.jsonl.
+    key: cache filename, value: dict(id, filename, size, sha256, fetched_at, content_type, status, parse_key)
+    status: "fetched", "parsed" or "failed"
+    parse_key: key of the parsed recipe cache written when the page was parsed. only with status "parsed"
+
+    each update is appended as one json line, and the file is compacted when it gets long.
+    if the file does not exist, it is built once from the cache_dir listing.
+    if is_read_only, the file is neither compacted nor built, the listing is kept in memory, and updates are not allowed.
+    """
+    _compact_ratio = 2
+
+    def __init__(self, cache_dir, is_read_only=False):
+        self.cache_dir = cache_dir
+        self.manifest_filename = cache_dir / "_manifest.jsonl"
+        self.is_read_only = is_read_only
+        self.entries = dict()
+        self._line_num = 0
+
+        if self.manifest_filename.exists():
+            self._load()
+        else:
+            self.rebuild()
+
+    def _load(self):
+        with self.manifest_filename.open("r") as fp:
+            for l in fp:
+                if not len(l.strip()):
+                    continue
+                self._line_num += 1
+                try:
+                    entry = json.loads(l)
+                except ValueError:
+                    logger.warning("broken manifest line. ignored: {}".format(l.strip()))
+                    continue
+                if entry.get("removed"):
+                    self.entries.pop(entry["filename"], None)
+                else:
+                    self.entries[entry["filename"]] = entry
+
+        if not self.is_read_only and self._compact_ratio * max(1, len(self.entries)) < self._line_num:
+            self.compact()
+
+    def rebuild(self):
+        logger.info("build manifest: {}".format(self.cache_dir))
+        self.entries.clear()
+        for target_fn in self.cache_dir.glob("[!_|.*]*"):
+            if not target_fn.is_file():
+                continue
+            stat = target_fn.stat()
+            self.entries[target_fn.name] = {
+                "id": target_fn.name,
+                "filename": target_fn.name,
+                "size": stat.st_size,
+                "sha256": hashlib.sha256(target_fn.read_bytes()).hexdigest(),
+                "fetched_at": datetime.datetime.fromtimestamp(stat.st_mtime).isoformat(),
+                "content_type": None,
+                "status": "fetched",
+            }
+        if not self.is_read_only:
+            self.compact()
+
+    def compact(self):
+        assert not self.is_read_only
+        tmp_filename = self.manifest_filename.with_name(self.manifest_filename.name + ".tmp")
+        with tmp_filename.open("w") as fp:
+            for entry in self.entries.values():
+                fp.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        tmp_filename.replace(self.manifest_filename)
+        self._line_num = len(self.entries)
+
+    def _append(self, entry):
+        assert not self.is_read_only
+        with self.manifest_filename.open("a") as fp:
+            fp.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._line_num += 1
+
+    def __contains__(self, filename):
+        return filename in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def filenames(self):
+        return list(self.entries.keys())
+
+    def get(self, filename):
+        return self.entries.get(filename)
+
+    def put(self, recipe_id, filename, content, content_type=None):
+        entry = {
+            "id": str(recipe_id),
+            "filename": filename,
+            "size": len(content),
+            "sha256": hashlib.sha256(content).hexdigest(),
+            "fetched_at": datetime.datetime.now().isoformat(),
+            "content_type": content_type,
+            "status": "fetched",
+        }
+        self.entries[filename] = entry
+        self._append(entry)
+
+    def set_status(self, filename, status, parse_key=None):
+        entry = self.entries.get(filename)
+        if entry is None or (entry["status"] == status and entry.get("parse_key") == parse_key):
+            return
+        entry["status"] = status
+        entry.pop("parse_key", None)
+        if parse_key is not None:
+            entry["parse_key"] = parse_key
+        self._append(entry)
+
+    def is_parsed(self, filename, parse_key):
+        """
+        True if the page may have a parsed recipe cache of parse_key.
+        entries written before parse_key was recorded are checked against the parsed cache itself.
+        """
+        entry = self.entries.get(filename)
+        return entry is not None and entry["status"] == "parsed" and entry.get("parse_key") in (None, parse_key)
+
+    def remove(self, filename):
+        if self.entries.pop(filename, None) is not None:
+            self._append({"filename": filename, "removed": True})
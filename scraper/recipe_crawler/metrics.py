@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Fri Oct 23 15:26:03 2026
+
+@author: yuki_next
+
+timers and counters of the crawl pipeline, tagged by site.
+nothing is recorded until enable() is called. while disabled, timer() returns a shared no-op context.
+
+    with recipe_crawler.metrics.timer("soup", site):
+        ...
+    recipe_crawler.metrics.count("detail_pages_fetched", site)
+
+if site is None, the site set by tagged() in the current thread is used.
+stages run in process pool workers (--parse-workers) are not recorded.
+"""
+
+import datetime
+import json
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_enabled = False
+_lock = threading.Lock()
+_local = threading.local() # site of the current thread
+_timers = dict() # key: (stage, site), value: [count, total seconds, max seconds]
+_counters = dict() # key: (name, site), value: number
+_started_at = None
+
+def enable():
+    global _enabled, _started_at
+    _enabled = True
+    _started_at = datetime.datetime.now()
+
+def is_enabled():
+    return _enabled
+
+def reset():
+    with _lock:
+        _timers.clear()
+        _counters.clear()
+
+class _NullContext(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+_null_context = _NullContext()
+
+class _Timer(object):
+    def __init__(self, stage, site):
+        self.stage = stage
+        self.site = site
+        self._start = None
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        observe(self.stage, time.perf_counter() - self._start, self.site)
+        return False
+
+class _Tagged(object):
+    def __init__(self, site):
+        self.site = site
+        self._previous = None
+
+    def __enter__(self):
+        self._previous = getattr(_local, "site", None)
+        _local.site = self.site
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _local.site = self._previous
+        return False
+
+def current_site():
+    return getattr(_local, "site", None)
+
+def tagged(site):
+    """
+    default site of timers and counters in this thread
+    """
+    if not _enabled:
+        return _null_context
+    return _Tagged(site)
+
+def timer(stage, site=None):
+    if not _enabled:
+        return _null_context
+    return _Timer(stage, site)
+
+def observe(stage, seconds, site=None):
+    if not _enabled:
+        return
+    key = (stage, site or current_site() or "")
+    with _lock:
+        value = _timers.get(key)
+        if value is None:
+            _timers[key] = [1, seconds, seconds]
+        else:
+            value[0] += 1
+            value[1] += seconds
+            value[2] = max(value[2], seconds)
+
+def count(name, site=None, value=1):
+    if not _enabled:
+        return
+    key = (name, site or current_site() or "")
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+def summary():
+    with _lock:
+        return {
+            "started_at": _started_at.isoformat() if _started_at else None,
+            "finished_at": datetime.datetime.now().isoformat(),
+            "timers": [{"stage": stage, "site": site, "count": value[0], "total_sec": value[1], "max_sec": value[2]} for (stage, site), value in sorted(_timers.items())],
+            "counters": [{"name": name, "site": site, "value": value} for (name, site), value in sorted(_counters.items())],
+        }
+
+def _write_atomic(filename, text):
+    filename.parent.mkdir(parents=True, exist_ok=True)
+    tmp_filename = filename.with_name(filename.name + ".tmp")
+    tmp_filename.write_text(text)
+    tmp_filename.replace(filename)
+
+def write_json(filename):
+    _write_atomic(filename, json.dumps(summary(), ensure_ascii=False, indent=1))
+    logger.info("metrics: {}".format(filename))
+
+def _prometheus_labels(**labels):
+    return ",".join(['{}="{}"'.format(key, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for key, value in labels.items()])
+
+def write_prometheus(filename):
+    """
+    textfile for the node_exporter textfile collector
+    """
+    s = summary()
+    lines = list()
+    lines.append("# HELP recipe_crawler_stage_seconds_total seconds spent in the stage during the last run")
+    lines.append("# TYPE recipe_crawler_stage_seconds_total counter")
+    lines.extend(["recipe_crawler_stage_seconds_total{{{}}} {}".format(_prometheus_labels(stage=t["stage"], site=t["site"]), t["total_sec"]) for t in s["timers"]])
+    lines.append("# HELP recipe_crawler_stage_calls_total times the stage ran during the last run")
+    lines.append("# TYPE recipe_crawler_stage_calls_total counter")
+    lines.extend(["recipe_crawler_stage_calls_total{{{}}} {}".format(_prometheus_labels(stage=t["stage"], site=t["site"]), t["count"]) for t in s["timers"]])
+    lines.append("# HELP recipe_crawler_stage_max_seconds longest single run of the stage during the last run")
+    lines.append("# TYPE recipe_crawler_stage_max_seconds gauge")
+    lines.extend(["recipe_crawler_stage_max_seconds{{{}}} {}".format(_prometheus_labels(stage=t["stage"], site=t["site"]), t["max_sec"]) for t in s["timers"]])
+    lines.append("# HELP recipe_crawler_events_total counters of the last run")
+    lines.append("# TYPE recipe_crawler_events_total counter")
+    lines.extend(["recipe_crawler_events_total{{{}}} {}".format(_prometheus_labels(name=c["name"], site=c["site"]), c["value"]) for c in s["counters"]])
+    lines.append("# HELP recipe_crawler_last_run_timestamp_seconds end time of the last run")
+    lines.append("# TYPE recipe_crawler_last_run_timestamp_seconds gauge")
+    lines.append("recipe_crawler_last_run_timestamp_seconds {}".format(time.time()))
+    _write_atomic(filename, "\n".join(lines) + "\n")
+    logger.info("metrics: {}".format(filename))
@@ -24,6 +24,23 @@ class Recipe(object):
 
     def __repr__(self):
         return self.__class__.__name__ + pprint.pformat(self.__dict__)
+
+    def to_dict(self):
+        """
+        json serializable dict. program_date is in ISO 8601 format.
+        """
+        return {
+            "id": self.id,
+            "detail_url": self.detail_url,
+            "image_urls": list(self.image_urls),
+            "cooking_name": self.cooking_name,
+            "cooking_name_sub": self.cooking_name_sub,
+            "program_name": self.program_name,
+            "program_date": self.program_date.isoformat() if self.program_date else None,
+            "materials": [recipe_text.to_dict() for recipe_text in self.materials],
+            "recipe_steps": [recipe_text.to_dict() for recipe_text in self.recipe_steps],
+            "important_points": [recipe_text.to_dict() for recipe_text in self.important_points],
+        }
     
 class RecipeText(object):
     def __init__(self, text, image_urls=None, important_points=None):
@@ -32,4 +49,11 @@ class RecipeText(object):
         self.important_points = important_points if important_points else []
 
     def __repr__(self):
-        return self.__class__.__name__ + pprint.pformat(self.__dict__)
\ No newline at end of file
+        return self.__class__.__name__ + pprint.pformat(self.__dict__)
+
+    def to_dict(self):
+        return {
+            "text": self.text,
+            "image_urls": list(self.image_urls),
+            "important_points": [important_point.to_dict() if isinstance(important_point, RecipeText) else important_point for important_point in self.important_points],
+        }
\ No newline at end of file
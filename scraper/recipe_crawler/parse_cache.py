@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 09:21:14 2026
+
+@author: yuki_next
+"""
+
+import hashlib
+import logging
+import pickle
+
+import recipe_crawler.models
+
+logger = logging.getLogger(__name__)
+
+class ParsedRecipeCache(object):
+    """
+    parsed detail recipes per cache file.
+    valid while the raw cache file, the crawler's parser_version and the fields set in the overview recipe are unchanged.
+    """
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+
+    @staticmethod
+    def make_key(raw_content, parser_version, overview_recipe, content_hash=None):
+        if content_hash is None:
+            content_hash = hashlib.sha256(raw_content).hexdigest()
+        overview_hash = hashlib.sha256(pickle.dumps(ParsedRecipeCache._overview_fields(overview_recipe))).hexdigest()
+        return "{}:{}:{}".format(parser_version, content_hash, overview_hash)
+
+    @staticmethod
+    def _overview_fields(overview_recipe):
+        """
+        sorted (name, value) of the overview recipe. program_date not set by the crawler is dropped,
+        as the default is today and the key would change every day.
+        """
+        fields = dict(overview_recipe.__dict__)
+        default_program_date = recipe_crawler.models.Recipe().program_date
+        if type(fields.get("program_date")) is type(default_program_date) and fields["program_date"] == default_program_date:
+            del fields["program_date"]
+        return sorted(fields.items())
+
+    def _store_filename(self, cache_name):
+        return self.store_dir / "{}.pickle".format(cache_name)
+
+    def get(self, cache_name, key):
+        store_filename = self._store_filename(cache_name)
+        if not store_filename.exists():
+            return None
+        try:
+            with store_filename.open("rb") as fp:
+                stored_key, recipes = pickle.load(fp)
+        except Exception:
+            logger.exception("broken parsed recipe cache. ignored: {}".format(store_filename))
+            return None
+        if stored_key != key:
+            return None
+        return recipes
+
+    def put(self, cache_name, key, recipes):
+        self.store_dir.mkdir(parents=True, exist_ok=True) # not made until the first put. replay writes nothing
+        store_filename = self._store_filename(cache_name)
+        tmp_filename = store_filename.with_name(store_filename.name + ".tmp")
+        with tmp_filename.open("wb") as fp:
+            pickle.dump((key, recipes), fp)
+        tmp_filename.replace(store_filename)
+
+    def remove(self, cache_name):
+        store_filename = self._store_filename(cache_name)
+        if store_filename.exists():
+            store_filename.unlink()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 24 10:41:37 2026
+
+@author: yuki_next
+"""
+
+import cProfile
+import io
+import logging
+import pstats
+import tracemalloc
+
+logger = logging.getLogger(__name__)
+
+class SiteProfiler(object):
+    """
+    cProfile and tracemalloc of the crawl of a site. files are written to profile_dir on exit:
+        cprofile.pstats   dump for pstats / snakeviz
+        cprofile.txt      top functions sorted by tottime and cumtime
+        tracemalloc.txt   top lines of memory allocated during the crawl, and the peak
+    cProfile records only the thread which entered the profiler,
+    so calls run in the evernote upload workers and the parse process pool are not included.
+    """
+    def __init__(self, profile_dir, cpu=True, memory=False, top_num=30, traceback_limit=1):
+        self.profile_dir = profile_dir
+        self.cpu = cpu
+        self.memory = memory
+        self.top_num = top_num
+        self.traceback_limit = traceback_limit
+        self.stats = None # pstats.Stats
+        self.memory_top_stats = None # list of tracemalloc.StatisticDiff
+        self.memory_peak = None
+        self._profile = None
+        self._snapshot = None
+        self._tracemalloc_started = False
+
+    def __enter__(self):
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        if self.memory:
+            if tracemalloc.is_tracing() and not hasattr(tracemalloc, "reset_peak"):
+                tracemalloc.stop() # python < 3.9 has no reset_peak. the peak is cleared by restarting
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.traceback_limit)
+                self._tracemalloc_started = True
+            else:
+                tracemalloc.reset_peak()
+            self._snapshot = self._take_snapshot()
+        if self.cpu:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._profile is not None:
+            self._profile.disable()
+        if self._snapshot is not None:
+            self._write_memory() # before pstats allocates
+        if self._profile is not None:
+            self._write_cpu()
+        return False
+
+    def _take_snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, cProfile.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                ])
+
+    def _write_cpu(self):
+        filename = self.profile_dir / "cprofile.pstats"
+        self._profile.dump_stats(str(filename))
+        self.stats = pstats.Stats(self._profile)
+        with (self.profile_dir / "cprofile.txt").open("w") as fp:
+            stats = pstats.Stats(self._profile, stream=fp)
+            stats.sort_stats("tottime").print_stats(self.top_num)
+            stats.sort_stats("cumulative").print_stats(self.top_num)
+        logger.info("cprofile: {}".format(filename))
+
+    def _write_memory(self):
+        snapshot = self._take_snapshot()
+        _, self.memory_peak = tracemalloc.get_traced_memory()
+        if self._tracemalloc_started:
+            tracemalloc.stop()
+        self.memory_top_stats = snapshot.compare_to(self._snapshot, "lineno")[:self.top_num]
+        self._snapshot = None
+
+        filename = self.profile_dir / "tracemalloc.txt"
+        with filename.open("w") as fp:
+            fp.write("peak: {:.1f} MiB\n".format(self.memory_peak / 1024 / 1024))
+            fp.write("top {} lines of allocated memory (size diff from the start of the crawl):\n".format(self.top_num))
+            for stat in self.memory_top_stats:
+                fp.write("{}\n".format(stat))
+        logger.info("tracemalloc: {}".format(filename))
+
+    def report(self, top_num=15):
+        """
+        top hot functions by tottime, and top allocations
+        """
+        stream = io.StringIO()
+        if self.stats is not None:
+            self.stats.stream = stream
+            self.stats.sort_stats("tottime").print_stats(top_num)
+        if self.memory_top_stats is not None:
+            stream.write("memory peak: {:.1f} MiB\n".format(self.memory_peak / 1024 / 1024))
+            for stat in self.memory_top_stats[:top_num]:
+                stream.write("{}\n".format(stat))
+        stream.write("profile: {}\n".format(self.profile_dir))
+        return stream.getvalue()
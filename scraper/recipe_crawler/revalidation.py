@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 16:02:47 2026
+
+@author: yuki_next
+"""
+
+import logging
+import pickle
+
+logger = logging.getLogger(__name__)
+
+class OverviewStore(object):
+    """
+    persistent http validators and overview results of entry urls.
+    key: entry url, value: dict(version, etag, last_modified, body_hash, recipes)
+    entries stored by another parser version are ignored.
+    """
+    def __init__(self, store_filename, version=None):
+        self.store_filename = store_filename
+        self.version = version
+        self.entries = dict()
+        self._is_dirty = False
+        if self.store_filename.exists():
+            try:
+                with self.store_filename.open("rb") as fp:
+                    self.entries.update(pickle.load(fp))
+            except Exception:
+                logger.exception("broken overview store. ignored: {}".format(self.store_filename))
+
+    def _get_entry(self, url):
+        entry = self.entries.get(url)
+        if entry is None or entry.get("version") != self.version:
+            return None
+        return entry
+
+    def request_headers(self, url):
+        entry = self._get_entry(url)
+        if entry is None:
+            return dict()
+
+        headers = dict()
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def get_recipes(self, url, body_hash=None):
+        """
+        return stored overview recipes, or None.
+        if body_hash is given, return them only if the body is the same as last time.
+        """
+        entry = self._get_entry(url)
+        if entry is None:
+            return None
+        if body_hash is not None and entry.get("body_hash") != body_hash:
+            return None
+        return entry["recipes"]
+
+    def all_recipes(self):
+        """
+        overview recipes of all stored entry urls, without network access. key: Recipe.id, value: Recipe
+        """
+        recipes = dict()
+        for url in sorted(self.entries.keys()):
+            entry = self._get_entry(url)
+            if entry is not None:
+                recipes.update(entry["recipes"])
+        return recipes
+
+    def update(self, url, response_headers, body_hash, recipes):
+        self.entries[url] = {
+            "version": self.version,
+            "etag": response_headers.get("ETag"),
+            "last_modified": response_headers.get("Last-Modified"),
+            "body_hash": body_hash,
+            "recipes": recipes,
+        }
+        self._is_dirty = True
+
+    def save(self):
+        if not self._is_dirty:
+            return
+        tmp_filename = self.store_filename.with_name(self.store_filename.name + ".tmp")
+        with tmp_filename.open("wb") as fp:
+            pickle.dump(self.entries, fp)
+        tmp_filename.replace(self.store_filename)
+        self._is_dirty = False
+
+class OverviewRecipeStore(object):
+    """
+    persistent overview recipes of every entry url ever fetched. key: Recipe.id, value: Recipe
+    not versioned and never shrinks, so cached detail pages can be parsed again after a parser change
+    or after their recipes are gone from the overview pages.
+    """
+    def __init__(self, store_filename):
+        self.store_filename = store_filename
+        self.recipes = dict()
+        self._is_dirty = False
+        if self.store_filename.exists():
+            try:
+                with self.store_filename.open("rb") as fp:
+                    self.recipes.update(pickle.load(fp))
+            except Exception:
+                logger.exception("broken overview recipe store. ignored: {}".format(self.store_filename))
+
+    def update(self, recipes):
+        """
+        add the recipes. a stored recipe of the same id is replaced by the latest one
+        """
+        self.recipes.update(recipes)
+        self._is_dirty = True
+
+    def save(self):
+        if not self._is_dirty:
+            return
+        tmp_filename = self.store_filename.with_name(self.store_filename.name + ".tmp")
+        with tmp_filename.open("wb") as fp:
+            pickle.dump(self.recipes, fp)
+        tmp_filename.replace(self.store_filename)
+        self._is_dirty = False
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 13:40:05 2026
+
+@author: yuki_next
+
+shared http layer. all network access of crawlers and translators goes through get().
+one pooled keep-alive requests.Session is kept per host.
+"""
+
+import logging
+import threading
+import urllib
+
+import requests
+import requests.adapters
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+_config = {
+    "verify": True, # TLS verification. sites can opt out by "tls_verify: false" in the config yaml
+    "timeout": (10, 60), # (connect, read) seconds
+    "pool_connections": 4,
+    "pool_maxsize": 10,
+    "retries": 3,
+    "backoff_factor": 0.5,
+}
+_sessions = dict() # key: host, value: requests.Session
+_lock = threading.Lock()
+
+def configure(**kwargs):
+    """
+    update default settings. keys: verify, timeout, pool_connections, pool_maxsize, retries, backoff_factor
+    existing sessions are closed and recreated with the new settings.
+    """
+    unknown_keys = set(kwargs.keys()) - set(_config.keys())
+    if len(unknown_keys):
+        raise ValueError("unknown session config: {}".format(",".join(sorted(unknown_keys))))
+
+    with _lock:
+        _config.update(dict([(k, v) for k, v in kwargs.items() if v is not None]))
+        _close_all()
+
+def _create_session():
+    retry = Retry(
+            total=_config["retries"],
+            backoff_factor=_config["backoff_factor"],
+            status_forcelist=(429, 500, 502, 503, 504),
+            raise_on_status=False)
+    adapter = requests.adapters.HTTPAdapter(
+            pool_connections=_config["pool_connections"],
+            pool_maxsize=_config["pool_maxsize"],
+            max_retries=retry)
+
+    session = requests.Session()
+    session.verify = _config["verify"]
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def get_session(url):
+    host = urllib.parse.urlparse(url).netloc
+    with _lock:
+        if not host in _sessions:
+            logger.debug("create session: {}".format(host))
+            _sessions[host] = _create_session()
+        return _sessions[host]
+
+def get(url, **kwargs):
+    kwargs.setdefault("timeout", _config["timeout"])
+    return get_session(url).get(url, **kwargs)
+
+def _close_all():
+    for session in _sessions.values():
+        session.close()
+    _sessions.clear()
+
+def close_all():
+    with _lock:
+        _close_all()
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 09:41:17 2026
+
+@author: yuki_next
+"""
+
+import datetime
+import logging
+import pickle
+import re
+import sqlite3
+import threading
+import unicodedata
+
+logger = logging.getLogger(__name__)
+
+_RE_WORD = re.compile(r"[^\W_]+")
+
+def _words(text):
+    return _RE_WORD.findall(unicodedata.normalize("NFKC", text).lower())
+
+def to_bigrams(text):
+    """
+    split text into character bigrams for the search index. japanese text has no spaces between words.
+    the last character of each word is also added alone, so that a one character query matches it by prefix.
+    """
+    tokens = list()
+    for word in _words(text):
+        tokens.extend([word[i:i + 2] for i in range(len(word) - 1)])
+        tokens.append(word[-1])
+    return " ".join(tokens)
+
+def to_search_query(query):
+    """
+    fts5 query of the words in query. all words must be matched.
+    """
+    phrases = list()
+    for word in _words(query):
+        if len(word) == 1:
+            phrases.append('"{}"*'.format(word))
+        else:
+            phrases.append('"{}"'.format(" ".join([word[i:i + 2] for i in range(len(word) - 1)])))
+    return " AND ".join(phrases)
+
+def _recipe_texts(recipe):
+    """
+    texts of the columns of the search index: cooking_name, cooking_name_sub, materials, steps, important_points
+    """
+    def recipe_text_lines(recipe_texts):
+        lines = list()
+        for recipe_text in recipe_texts:
+            lines.append(recipe_text.text or "")
+            lines.extend(recipe_text.important_points)
+        return "\n".join(lines)
+
+    return (
+        recipe.cooking_name or "",
+        recipe.cooking_name_sub or "",
+        recipe_text_lines(recipe.materials),
+        recipe_text_lines(recipe.recipe_steps),
+        recipe_text_lines(recipe.important_points),
+    )
+
+class RecipeStore(object):
+    """
+    local archive of crawled recipes in one sqlite file.
+    a recipe is identified by (site, recipe id, cooking name), as one detail page can have several recipes.
+    put() buffers recipes and they are written in one transaction per batch_size recipes or on flush().
+
+    recipes_fts is the full text search index of the recipes, updated with them.
+    its rowid is the rowid of recipes, and texts are stored as character bigrams.
+    """
+    _schema = """
+CREATE TABLE IF NOT EXISTS recipes (
+    site TEXT NOT NULL,
+    recipe_id TEXT NOT NULL,
+    cooking_name TEXT NOT NULL,
+    program_name TEXT,
+    program_date TEXT,
+    detail_url TEXT,
+    stored_at TEXT NOT NULL,
+    recipe BLOB NOT NULL,
+    PRIMARY KEY (site, recipe_id, cooking_name)
+);
+CREATE INDEX IF NOT EXISTS recipes_site ON recipes (site);
+CREATE INDEX IF NOT EXISTS recipes_program_name ON recipes (program_name);
+CREATE INDEX IF NOT EXISTS recipes_program_date ON recipes (program_date);
+CREATE INDEX IF NOT EXISTS recipes_recipe_id ON recipes (recipe_id);
+"""
+    _schema_fts = """
+CREATE VIRTUAL TABLE IF NOT EXISTS recipes_fts USING fts5 (
+    cooking_name, cooking_name_sub, materials, steps, important_points,
+    tokenize="unicode61 remove_diacritics 0"
+);
+"""
+
+    def __init__(self, db_filename, batch_size=100):
+        self.db_filename = db_filename
+        self.batch_size = batch_size
+        self._pending = list()
+        self._lock = threading.RLock()
+
+        self._conn = sqlite3.connect(str(db_filename), check_same_thread=False) # shared by sites crawled in parallel. guarded by _lock
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self._schema)
+        self.search_enabled = self._create_search_index()
+        self._conn.commit()
+
+    def _create_search_index(self):
+        is_existed = self._conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'recipes_fts'").fetchone() is not None
+        try:
+            self._conn.executescript(self._schema_fts)
+        except sqlite3.OperationalError:
+            logger.warning("sqlite3 has no fts5. search is disabled: {}".format(sqlite3.sqlite_version))
+            return False
+        if not is_existed:
+            self.rebuild_search_index()
+        return True
+
+    def rebuild_search_index(self):
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM recipes_fts")
+                for rowid, recipe_blob in self._conn.execute("SELECT rowid, recipe FROM recipes").fetchall():
+                    self._insert_search_index(rowid, pickle.loads(recipe_blob))
+
+    def _insert_search_index(self, rowid, recipe):
+        self._conn.execute("INSERT INTO recipes_fts (rowid, cooking_name, cooking_name_sub, materials, steps, important_points) VALUES (?, ?, ?, ?, ?, ?)",
+                           [rowid] + [to_bigrams(text) for text in _recipe_texts(recipe)])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    @staticmethod
+    def _date_to_str(program_date):
+        if program_date is None:
+            return None
+        return "{:%Y-%m-%d}".format(program_date)
+
+    def put(self, site, recipe):
+        row = (
+            site,
+            str(recipe.id),
+            recipe.cooking_name or "",
+            recipe.program_name,
+            self.__class__._date_to_str(recipe.program_date),
+            recipe.detail_url,
+            datetime.datetime.now().isoformat(),
+            pickle.dumps(recipe),
+        )
+        with self._lock:
+            self._pending.append((row, recipe))
+            if self.batch_size <= len(self._pending):
+                self.flush()
+
+    def flush(self):
+        with self._lock:
+            if len(self._pending) == 0:
+                return
+            with self._conn:
+                if not self.search_enabled:
+                    self._conn.executemany("INSERT OR REPLACE INTO recipes VALUES (?, ?, ?, ?, ?, ?, ?, ?)", [row for row, _ in self._pending])
+                else:
+                    for row, recipe in self._pending:
+                        old_row = self._conn.execute("SELECT rowid FROM recipes WHERE site = ? AND recipe_id = ? AND cooking_name = ?", row[:3]).fetchone()
+                        if old_row is not None:
+                            self._conn.execute("DELETE FROM recipes_fts WHERE rowid = ?", old_row)
+                        rowid = self._conn.execute("INSERT OR REPLACE INTO recipes VALUES (?, ?, ?, ?, ?, ?, ?, ?)", row).lastrowid
+                        self._insert_search_index(rowid, recipe)
+            logger.debug("store {} recipes: {}".format(len(self._pending), self.db_filename))
+            self._pending.clear()
+
+    def close(self):
+        with self._lock:
+            if self._conn is None:
+                return
+            self.flush()
+            self._conn.close()
+            self._conn = None
+
+    def _select(self, columns, site=None, program_name=None, recipe_id=None, date_from=None, date_to=None):
+        wheres = list()
+        params = list()
+        if site is not None:
+            wheres.append("site = ?")
+            params.append(site)
+        if program_name is not None:
+            wheres.append("program_name = ?")
+            params.append(program_name)
+        if recipe_id is not None:
+            wheres.append("recipe_id = ?")
+            params.append(str(recipe_id))
+        if date_from is not None:
+            wheres.append("? <= program_date")
+            params.append(self.__class__._date_to_str(date_from))
+        if date_to is not None:
+            wheres.append("program_date <= ?")
+            params.append(self.__class__._date_to_str(date_to))
+
+        sql = "SELECT {} FROM recipes".format(columns)
+        if len(wheres):
+            sql += " WHERE " + " AND ".join(wheres)
+        return sql, params
+
+    def find(self, site=None, program_name=None, recipe_id=None, date_from=None, date_to=None, limit=None):
+        """
+        return recipes matched all given conditions, newest program date first.
+        date_from and date_to are inclusive.
+        """
+        sql, params = self._select("recipe", site=site, program_name=program_name, recipe_id=recipe_id, date_from=date_from, date_to=date_to)
+        sql += " ORDER BY program_date DESC, site, recipe_id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            self.flush()
+            rows = self._conn.execute(sql, params).fetchall()
+        return [pickle.loads(row[0]) for row in rows]
+
+    def get(self, site, recipe_id):
+        """
+        return recipes of the detail page as dict. key: cooking name, value: recipe
+        """
+        return dict([(recipe.cooking_name, recipe) for recipe in self.find(site=site, recipe_id=recipe_id)])
+
+    def count(self, site=None, program_name=None, date_from=None, date_to=None):
+        sql, params = self._select("COUNT(*)", site=site, program_name=program_name, date_from=date_from, date_to=date_to)
+        with self._lock:
+            self.flush()
+            return self._conn.execute(sql, params).fetchone()[0]
+
+    def search(self, query, site=None, limit=20):
+        """
+        full text search of cooking names, materials, steps and important points.
+        return list of (site, recipe), best match first.
+        """
+        if not self.search_enabled:
+            return list()
+        search_query = to_search_query(query)
+        if not len(search_query):
+            return list()
+
+        sql = "SELECT recipes.site, recipes.recipe FROM recipes_fts JOIN recipes ON recipes.rowid = recipes_fts.rowid WHERE recipes_fts MATCH ?"
+        params = [search_query]
+        if site is not None:
+            sql += " AND recipes.site = ?"
+            params.append(site)
+        sql += " ORDER BY bm25(recipes_fts) LIMIT ?"
+        params.append(limit)
+
+        with self._lock:
+            self.flush()
+            rows = self._conn.execute(sql, params).fetchall()
+        return [(row[0], pickle.loads(row[1])) for row in rows]
+
+    def sites(self):
+        with self._lock:
+            self.flush()
+            return [row[0] for row in self._conn.execute("SELECT DISTINCT site FROM recipes ORDER BY site")]
+
+    def migrate_pickle_dir(self, site, pickle_dir):
+        """
+        import <recipe id>.pickle files written by the old store_local.
+        the directory is renamed to <pickle_dir>.migrated, so it is imported only once.
+        """
+        recipe_num = 0
+        for pickle_filename in sorted(pickle_dir.glob("*.pickle")):
+            try:
+                with pickle_filename.open("rb") as fp:
+                    recipes = pickle.load(fp)
+            except Exception:
+                logger.exception("broken pickle. ignored: {}".format(pickle_filename))
+                continue
+            for recipe in recipes.values():
+                self.put(site, recipe)
+                recipe_num += 1
+        self.flush()
+
+        migrated_dir = pickle_dir.with_name(pickle_dir.name + ".migrated")
+        pickle_dir.rename(migrated_dir)
+        logger.info("migrate {} recipes: {} -> {}".format(recipe_num, pickle_dir, self.db_filename))
+        return recipe_num
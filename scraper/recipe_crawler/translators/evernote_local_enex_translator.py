@@ -7,29 +7,26 @@ Created on Wed Jun 10 07:08:21 2020
 """
 
 import recipe_crawler.models
-import jinja2
+import recipe_crawler.metrics
 import logging
-import evernote.edam.type.ttypes as Types
 import pytz
 import datetime
 import base64
+import io
+import json
+from recipe_crawler.translators import templates
 
 logger = logging.getLogger(__name__)
 
-def bin_to_base64(b_data):
-    return base64.b64encode(b_data).decode('utf-8')
-
 class EvernoteLocalEnexTranslator(object):
-    _template = """<?xml version="1.0" encoding="UTF-8"?>
+    _template_header = """<?xml version="1.0" encoding="UTF-8"?>
 <!DOCTYPE en-export SYSTEM "http://xml.evernote.com/pub/evernote-export3.dtd">
-<en-export>
-{%- for enex_note in enex_notes %}
-{{ enex_note }}
-{%- endfor %}
-</en-export>
-"""
+<en-export>"""
+
+    _template_footer = """
+</en-export>"""
     
-    _template_note = """<note><title>{{ note.title }}</title><content><![CDATA[{{ note.content }}]]></content>
+    _template_note_head = """<note><title>{{ note.title }}</title><content><![CDATA[{{ note.content }}]]></content>
 <created>{{ note.created }} </created><updated>{{ note.updated }}</updated>
 {%- for tag in note.tagNames %}
 <tag>{{ tag }}</tag>
@@ -41,8 +38,9 @@ class EvernoteLocalEnexTranslator(object):
 {%- endif %}
 </note-attributes>
 {%- endif %}
-{%- for resource in note.resources %}
-<resource><data encoding="base64">{{ bin_to_base64(resource.data.body) }}
+"""
+
+    _template_resource_tail = """
 </data><mime>{{ resource.mime }}</mime><width>{{ resource.width }}</width><height>{{ resource.height }}</height>
 <resource-attributes>
 {%- if resource.attributes.sourceURL %}
@@ -55,33 +53,209 @@ class EvernoteLocalEnexTranslator(object):
 {%- endif %}
 </resource-attributes>
 </resource>
-{%- endfor %}
-</note>
 """
-    def __init__(self, recipe, site_config):
+
+    base64_chunk_size = 3 * 64 * 1024 # multiple of 3, so encoded chunks are joined without padding
+
+    def __init__(self, recipe, site_config, translated_note=None):
         assert isinstance(recipe, recipe_crawler.models.Recipe)
         self.recipe = recipe
         self.site_config = site_config
+        self._translated_note = translated_note
 
-    @staticmethod
-    def merge(enexs):
-        return jinja2.Template(__class__._template).render(enex_notes=enexs)
+    @property
+    def translated_note(self):
+        if self._translated_note is None:
+            self._translated_note = recipe_crawler.translators.EvernoteTranslator(self.recipe, self.site_config).translate()
+        return self._translated_note
 
     @property
     def enex(self):
-        trans = recipe_crawler.translators.EvernoteTranslator(self.recipe, self.site_config)
-        note_title = trans.title
+        fp = io.StringIO()
+        title = self.write_enex(fp)
+        return title, fp.getvalue()
 
-        logger.info("create note: {}".format(note_title))
-        resources, body = trans.body_resources
-        attributes = trans.attributes
-        
-        note = Types.Note(title=note_title, content=body, resources=resources.values(), attributes=attributes)
-        note.tagNames = trans.tag_names
+    def write_enex(self, fp):
+        """
+        write the <note> element to fp and return the note title.
+        resource bodies are base64 encoded chunk by chunk into fp.
+        """
+        translated_note = self.translated_note
+
+        logger.info("create note: {}".format(translated_note.title))
+        note = translated_note.to_note()
         note.created = datetime.datetime.now().astimezone(pytz.timezone("UTC")).strftime("%Y%m%dT%H%M%SZ")
         note.updated = note.created
+
+        with recipe_crawler.metrics.timer("render_enex"):
+            fp.write(templates.get_template("enex_note_head").render(note=note))
+            resource_tail_template = templates.get_template("enex_resource_tail")
+            for resource in note.resources:
+                fp.write('\n<resource><data encoding="base64">')
+                body = memoryview(resource.data.body)
+                for i in range(0, len(body), self.base64_chunk_size):
+                    fp.write(base64.b64encode(body[i:i + self.base64_chunk_size]).decode("ascii"))
+                fp.write(resource_tail_template.render(resource=resource))
+            fp.write("\n</note>")
         
-        tmpl = jinja2.Template(self.__class__._template_note)
-        
-        tmpl.globals['bin_to_base64'] = bin_to_base64
-        return note.title, tmpl.render(note=note)
+        return note.title
+
+class EnexWriter(object):
+    """
+    write notes into one enex file as they come, so only one note is kept in memory.
+    the header is written with the first note and no file is made without notes.
+    the file is written as .tmp and renamed on close. if output_filename is taken, "-2", "-3", ... is added to the name.
+    if an exception is raised in the with block, the .tmp is removed.
+    stored_recipe_ids: ids of the recipes in the renamed file
+    """
+    def __init__(self, output_filename):
+        self.output_filename = output_filename
+        self.note_titles = list()
+        self.stored_recipe_ids = list()
+        self._recipe_ids = list()
+        self._tmp_filename = output_filename.with_name("{}.{}.tmp".format(output_filename.name, id(self)))
+        self._fp = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+    def write(self, enex_translator):
+        if self._fp is None:
+            self._fp = self._tmp_filename.open("w", encoding="utf-8")
+            self._fp.write(templates.get_template("enex_header").render())
+
+        self._fp.write("\n")
+        title = enex_translator.write_enex(self._fp)
+        self.note_titles.append(title)
+        self._recipe_ids.append(enex_translator.recipe.id)
+        return title
+
+    @property
+    def size(self):
+        return self._fp.tell() if self._fp is not None else 0
+
+    def close(self):
+        if self._fp is None:
+            return
+        self._fp.write(templates.get_template("enex_footer").render())
+        self._fp.close()
+        self._fp = None
+
+        output_filename = _reserve_filename(self.output_filename.parent, self.output_filename.stem, self.output_filename.suffix)
+        self._tmp_filename.replace(output_filename)
+        self.output_filename = output_filename
+        self.stored_recipe_ids.extend(self._recipe_ids)
+        logger.info("store enex: {} ({} notes)".format(output_filename, len(self.note_titles)))
+
+    def abort(self):
+        """
+        remove the unfinished file. its notes are not stored.
+        """
+        if self._fp is None:
+            return
+        self._fp.close()
+        self._fp = None
+        self._tmp_filename.unlink()
+        logger.warning("enex not stored: {} ({} notes)".format(self.output_filename, len(self.note_titles)))
+
+class RotatingEnexWriter(object):
+    """
+    EnexWriter which rolls over to the next <basename>.partNN.enex
+    when a part reaches max_bytes or max_notes. None is no limit.
+    <basename>.index.json lists the notes of each part, so that a failed import can be resumed from the part.
+    if <basename>.index.json is taken, "-2", "-3", ... is added to the basename of the parts and the index.
+    if an exception is raised in the with block, the unfinished part is removed and the finished parts are kept.
+    stored_recipe_ids: ids of the recipes in the finished parts
+    """
+    def __init__(self, store_dirname, basename, max_bytes=None, max_notes=None):
+        self.store_dirname = store_dirname
+        self.basename = basename
+        self.max_bytes = max_bytes
+        self.max_notes = max_notes
+        self.index_filename = None # reserved with the first note
+        self.parts = list() # dict(filename, notes=list of dict(id, title))
+        self.stored_recipe_ids = list()
+        self._writer = None
+        self._notes = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            if self._writer is not None:
+                self._writer.abort()
+                self._writer = None
+                self._notes = None
+            if self.index_filename is not None and not len(self.parts):
+                self.index_filename.unlink() # reserved, and no part finished
+        return False
+
+    def _is_full(self):
+        if self.max_notes and self.max_notes <= len(self._notes):
+            return True
+        if self.max_bytes and self.max_bytes <= self._writer.size:
+            return True
+        return False
+
+    def write(self, enex_translator):
+        if self._writer is not None and self._is_full():
+            self._close_part()
+        if self.index_filename is None:
+            self.index_filename = _reserve_filename(self.store_dirname, self.basename, ".index.json")
+            self.basename = self.index_filename.name[:-len(".index.json")]
+        if self._writer is None:
+            self._writer = EnexWriter(self.store_dirname / "{}.part{:02d}.enex".format(self.basename, len(self.parts) + 1))
+            self._notes = list()
+
+        title = self._writer.write(enex_translator)
+        self._notes.append({"id": enex_translator.recipe.id, "title": title})
+        return title
+
+    def _close_part(self):
+        self._writer.close()
+        self.stored_recipe_ids.extend(self._writer.stored_recipe_ids)
+        self.parts.append({
+            "filename": self._writer.output_filename.name,
+            "notes": self._notes,
+        })
+        self._writer = None
+        self._notes = None
+        self._save_index()
+
+    def _save_index(self):
+        tmp_filename = self.index_filename.with_name(self.index_filename.name + ".tmp")
+        tmp_filename.write_text(json.dumps({"parts": self.parts}, ensure_ascii=False, indent=1, default=str))
+        tmp_filename.replace(self.index_filename)
+
+    def close(self):
+        if self._writer is not None:
+            self._close_part()
+
+def _reserve_filename(dirname, stem, suffix):
+    """
+    create dirname/<stem><suffix> empty and return it. if it exists, "-2", "-3", ... is added to the stem.
+    sites which share the program name may store at the same time, so the name is taken by exclusive create.
+    """
+    i = 1
+    while True:
+        reserved_filename = dirname / "{}{}".format(stem if i == 1 else "{}-{}".format(stem, i), suffix)
+        try:
+            reserved_filename.open("x").close()
+            return reserved_filename
+        except FileExistsError:
+            i += 1
+
+templates.register_template("enex_header", EvernoteLocalEnexTranslator._template_header)
+templates.register_template("enex_footer", EvernoteLocalEnexTranslator._template_footer)
+templates.register_template("enex_note_head", EvernoteLocalEnexTranslator._template_note_head)
+templates.register_template("enex_resource_tail", EvernoteLocalEnexTranslator._template_resource_tail)
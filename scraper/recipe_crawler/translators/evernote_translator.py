@@ -7,19 +7,40 @@ Created on Fri Aug 30 21:26:59 2019
 """
 
 import recipe_crawler.models
-import jinja2
 import logging
 import evernote.edam.type.ttypes as Types
-import requests
+import recipe_crawler.sessions
+import recipe_crawler.metrics
+from recipe_crawler.translators import templates
 import pathlib
 import urllib
 import hashlib
 import mimetypes
+import concurrent.futures
 
 logger = logging.getLogger(__name__)
 
+class TranslatedNote(object):
+    """
+    evernote note contents of one recipe. made once by EvernoteTranslator.translate()
+    and used by both the cloud and the local enex paths.
+    """
+    def __init__(self, title, body, resources, attributes, tag_names):
+        self.title = title
+        self.body = body # ENML
+        self.resources = resources # key: image_url, value: Types.Resource
+        self.attributes = attributes
+        self.tag_names = tag_names
+
+    def to_note(self, notebook_guid=None):
+        note = Types.Note(title=self.title, content=self.body, resources=list(self.resources.values()), attributes=self.attributes, notebookGuid=notebook_guid)
+        note.tagNames = list(self.tag_names)
+        return note
+
 class EvernoteTranslator(object):
     default_tag_names = ["recipe", "レシピ"]
+    image_cache = None # recipe_crawler.image_cache.ImageCache. if None, images are always downloaded.
+    image_fetch_workers = 4 # max concurrent image downloads per recipe
     
     _template = """<?xml version="1.0" encoding="UTF-8"?>
 <!DOCTYPE en-note SYSTEM "http://xml.evernote.com/pub/enml2.dtd">
@@ -88,6 +109,14 @@ class EvernoteTranslator(object):
         assert isinstance(recipe, recipe_crawler.models.Recipe)
         self.recipe = recipe
         self.site_config = site_config
+        self._body_resources = None
+        self._translated_note = None
+
+    def translate(self):
+        if self._translated_note is None:
+            resources, body = self.body_resources
+            self._translated_note = TranslatedNote(self.title, body, resources, self.attributes, self.tag_names)
+        return self._translated_note
 
     @property
     def title(self):
@@ -98,17 +127,23 @@ class EvernoteTranslator(object):
 
     @property
     def body_resources(self):
-        image_resources = dict() # key: image_url, value: resource
-        
-        image_resources.update(self.__class__._get_create_evernote_resource_dict(self.recipe.image_urls))
+        if self._body_resources is None:
+            self._body_resources = self._create_body_resources()
+        return self._body_resources
 
+    def _create_body_resources(self):
+        image_urls = list(self.recipe.image_urls)
         for material in self.recipe.materials:
-            image_resources.update(self.__class__._get_create_evernote_resource_dict(material.image_urls))
-        
+            image_urls.extend(material.image_urls)
         for recipe_step in self.recipe.recipe_steps:
-            image_resources.update(self.__class__._get_create_evernote_resource_dict(recipe_step.image_urls))
+            image_urls.extend(recipe_step.image_urls)
+
+        with recipe_crawler.metrics.timer("image_download"):
+            image_resources = self.__class__._get_create_evernote_resource_dict(image_urls) # key: image_url, value: resource
+        recipe_crawler.metrics.count("images", value=len(image_resources))
         
-        return image_resources, jinja2.Template(self.__class__._template).render(recipe=self.recipe, image_resources=image_resources)
+        with recipe_crawler.metrics.timer("render_note"):
+            return image_resources, templates.get_template("evernote_note").render(recipe=self.recipe, image_resources=image_resources)
     
     @property
     def attributes(self):
@@ -130,22 +165,32 @@ class EvernoteTranslator(object):
 
     @staticmethod
     def _get_create_evernote_resource_dict(source_urls):
+        source_urls = list(dict.fromkeys(source_urls)) # unique, keep order
         ret = dict()
-        for source_url in source_urls:
-            resource = EvernoteTranslator._get_create_evernote_resource(source_url)
-            if resource:
-                ret[source_url] = resource
+        if len(source_urls) == 0:
+            return ret
+
+        max_workers = min(EvernoteTranslator.image_fetch_workers, len(source_urls))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for source_url, resource in zip(source_urls, executor.map(EvernoteTranslator._get_create_evernote_resource, source_urls)):
+                if resource:
+                    ret[source_url] = resource
         
         return ret
 
     @staticmethod
     def _get_create_evernote_resource(source_url):
-        logger.debug("get: {}".format(source_url))
-        res = requests.get(source_url)
-        if res.ok:
+        if EvernoteTranslator.image_cache is not None:
+            content = EvernoteTranslator.image_cache.get(source_url)
+        else:
+            logger.debug("get: {}".format(source_url))
+            res = recipe_crawler.sessions.get(source_url)
+            content = res.content if res.ok else None
+
+        if content is not None:
             attachment_filename = pathlib.Path(urllib.parse.urlparse(source_url).path).name
             return EvernoteTranslator._create_evernote_resource(
-                        attachment_filename, res.content, source_url=source_url)
+                        attachment_filename, content, source_url=source_url)
     
     @staticmethod
     def _create_evernote_resource(attachment_filename, byte_data, source_url=None):
@@ -162,4 +207,5 @@ class EvernoteTranslator(object):
                         fileName=attachment_filename,
                         ),
                 )
-    
+
+templates.register_template("evernote_note", EvernoteTranslator._template)
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 13:52:19 2026
+
+@author: yuki_next
+
+jinja2 environment shared by all note templates. each template is compiled once per process.
+"""
+
+import logging
+
+import jinja2
+
+logger = logging.getLogger(__name__)
+
+_sources = dict() # key: template name, value: template source
+environment = jinja2.Environment(loader=jinja2.DictLoader(_sources))
+
+def register_template(name, source):
+    _sources[name] = source
+
+def get_template(name):
+    return environment.get_template(name)
+
+def enable_bytecode_cache(cache_dir):
+    """
+    store compiled templates in cache_dir. call before the first render.
+    """
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    environment.bytecode_cache = jinja2.FileSystemBytecodeCache(str(cache_dir))
+    logger.debug("jinja2 bytecode cache: {}".format(cache_dir))
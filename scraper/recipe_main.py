@@ -6,7 +6,9 @@ Created on Tue Aug  6 21:30:16 2019
 @author: yuki_next
 """
 import argparse
+import concurrent.futures
 import datetime
+import functools
 import logging
 import logging.config
 import logging.handlers
@@ -14,17 +16,24 @@ import yaml
 import collections
 import pathlib
 import sys
+import threading
 import inspect
 import json
 import time
 import dateutil.parser
 import pprint
-import pickle
-import math
 
 import recipe_crawler.models
 import recipe_crawler.translators
 import recipe_crawler.crawlers
+import recipe_crawler.image_cache
+import recipe_crawler.metrics
+import recipe_crawler.profiler
+import recipe_crawler.sessions
+import recipe_crawler.stores
+import recipe_crawler.evernote_mirror
+import recipe_crawler.evernote_uploader
+import recipe_crawler.fake_note_store
 
 from evernote.api.client import EvernoteClient
 import evernote.edam.type.ttypes as Types
@@ -41,15 +50,23 @@ yaml.add_constructor('tag:yaml.org,2002:map', lambda loader, node: collections.O
 logging.config.dictConfig(yaml.safe_load(pathlib.Path('recipe_crawler_logging.yml').open("r").read()))
 logger = logging.getLogger(__name__)
 
-def create_enex(recipes, args, site_config):
+def create_evernote_client(evernote_cred):
+    if evernote_cred.get("fake_account") is not None:
+        return recipe_crawler.fake_note_store.FakeEvernoteClient(evernote_cred["fake_account"])
+    return EvernoteClient(token=evernote_cred["developer_token"], sandbox=evernote_cred["is_sandbox"])
 
-    for recipe in recipes():
-        trans = recipe_crawler.translators.EvernoteLocalEnexTranslator(recipe, site_config)
-        
-        yield recipe, trans.enex
+def create_evernote_uploader(evernote_cred, workers=3):
+    def note_store_factory():
+        client = create_evernote_client(evernote_cred)
+        return client.get_note_store()
+    
+    return recipe_crawler.evernote_uploader.EvernoteUploader(note_store_factory, workers=workers)
+
+def store_evernote(recipes, args, site_config, evernote_cred, is_note_exist_check=True, sink_lock=None, notebook_mirror=None, uploader=None):
+    if sink_lock is None:
+        sink_lock = threading.RLock()
 
-def store_evernote(recipes, args, site_config, evernote_cred, is_note_exist_check=True):
-    client = EvernoteClient(token=evernote_cred["developer_token"], sandbox=evernote_cred["is_sandbox"])
+    client = create_evernote_client(evernote_cred)
     note_store = None
     try:
         note_store = client.get_note_store()
@@ -61,52 +78,111 @@ def store_evernote(recipes, args, site_config, evernote_cred, is_note_exist_chec
         return
 
     notebook_name = evernote_cred["notebook_name"]
-    notebooks = note_store.listNotebooks()
-    target_notebook = None
-    for notebook in notebooks:
-        if notebook_name == notebook.name:
-            target_notebook = notebook
-            break
-    
-    if target_notebook is None:
-        logger.info("create notebook: {}".format(notebook_name))
-        target_notebook = Types.Notebook()
-        target_notebook.name = notebook_name
-        target_notebook = note_store.createNotebook(target_notebook)
-
-    # for processed_list_filename, recipe in recipes(args, site_config):
-    for recipe in recipes():
-        trans = recipe_crawler.translators.EvernoteTranslator(recipe, site_config)
-        note_title = trans.title
-
-        is_note_exist = False
-        if is_note_exist_check:
-            note_filter = NSTypes.NoteFilter()
-            note_filter.notebookGuid = target_notebook.guid
-            note_filter.words = note_title
-            resultSpec = NSTypes.NotesMetadataResultSpec()
-            resultSpec.includeTitle = True
-            metalist = note_store.findNotesMetadata(note_filter, 0, 10, resultSpec)
-    
-            for meta_ in metalist.notes:
-                if note_title == meta_.title:
+    with sink_lock:
+        notebooks = note_store.listNotebooks()
+        target_notebook = None
+        for notebook in notebooks:
+            if notebook_name == notebook.name:
+                target_notebook = notebook
+                break
+        
+        if target_notebook is None:
+            logger.info("create notebook: {}".format(notebook_name))
+            target_notebook = Types.Notebook()
+            target_notebook.name = notebook_name
+            target_notebook = note_store.createNotebook(target_notebook)
+
+        if is_note_exist_check and notebook_mirror is not None:
+            notebook_mirror.sync(note_store, target_notebook.guid)
+
+    is_own_uploader = uploader is None
+    if is_own_uploader:
+        uploader = create_evernote_uploader(evernote_cred)
+
+    def finish(recipe, future, note):
+        """
+        return recipe if its note is created or skipped, None if failed.
+        """
+        if future is None:
+            recipe_crawler.metrics.count("notes_skipped")
+            return recipe
+        try:
+            created_note = future.result()
+        except Exception:
+            logger.exception("failed to create note: {}".format(note.title))
+            recipe_crawler.metrics.count("notes_failed")
+            return None
+        recipe_crawler.metrics.count("notes_created")
+        if notebook_mirror is not None:
+            notebook_mirror.add(created_note.guid, created_note.title, source_url=note.attributes.sourceURL)
+        return recipe
+
+    pending = collections.deque() # (recipe, future of createNote or None if skipped, note). yielded in order
+    submitted_titles = set()
+    try:
+        # for processed_list_filename, recipe in recipes(args, site_config):
+        for recipe in recipes():
+            trans = recipe_crawler.translators.EvernoteTranslator(recipe, site_config)
+            note_title = trans.title
+
+            with sink_lock:
+                is_note_exist = False
+                if is_note_exist_check and (note_title in submitted_titles or (notebook_mirror is not None and note_title in notebook_mirror)):
                     logger.debug("skip: {} exists.".format(note_title))
                     is_note_exist = True
-                    break
-        if not is_note_exist:
-            logger.info("create note: {}".format(note_title))
-            resources, body = trans.body_resources
-            attributes = trans.attributes
-            note = Types.Note(title=note_title, content=body, resources=resources.values(), attributes=attributes, notebookGuid=target_notebook.guid)
-            note.tagNames = trans.tag_names
-            note_store.createNote(note)
-            time.sleep(1)
+                elif is_note_exist_check and notebook_mirror is None:
+                    note_filter = NSTypes.NoteFilter()
+                    note_filter.notebookGuid = target_notebook.guid
+                    note_filter.words = note_title
+                    resultSpec = NSTypes.NotesMetadataResultSpec()
+                    resultSpec.includeTitle = True
+                    metalist = uploader.call("findNotesMetadata", note_filter, 0, 10, resultSpec)
             
-        yield recipe
+                    for meta_ in metalist.notes:
+                        if note_title == meta_.title:
+                            logger.debug("skip: {} exists.".format(note_title))
+                            is_note_exist = True
+                            break
+            if is_note_exist:
+                pending.append((recipe, None, None))
+            else:
+                logger.info("create note: {}".format(note_title))
+                note = trans.translate().to_note(notebook_guid=target_notebook.guid)
+                submitted_titles.add(note_title)
+                pending.append((recipe, uploader.submit("createNote", note), note))
+
+            while len(pending) and (pending[0][1] is None or pending[0][1].done()):
+                finished_recipe = finish(*pending.popleft())
+                if finished_recipe:
+                    yield finished_recipe
+
+        while len(pending):
+            finished_recipe = finish(*pending.popleft())
+            if finished_recipe:
+                yield finished_recipe
+    finally:
+        if is_own_uploader:
+            uploader.close()
+        if notebook_mirror is not None:
+            notebook_mirror.save()
     
 
-def change_tag_evernote(args, evernote_cred):
-    client = EvernoteClient(token=evernote_cred["developer_token"], sandbox=evernote_cred["is_sandbox"])
+@functools.lru_cache(maxsize=None)
+def _change_tag_name(tag_name):
+    """
+    program date tag (e.g. 2019.08.06) to year and month tags. other tags are kept.
+    year and month tags (e.g. 2019, 2019.08) are not dates, as parse() fills the missing day from its default.
+    """
+    try:
+        program_date = dateutil.parser.parse(tag_name, default=datetime.datetime(2000, 1, 1))
+        if program_date != dateutil.parser.parse(tag_name, default=datetime.datetime(2001, 2, 2)):
+            return (tag_name, )
+        return ("{:%Y}".format(program_date), "{:%Y.%m}".format(program_date))
+    except (ValueError, OverflowError):
+        return (tag_name, )
+
+def change_tag_evernote(args, evernote_cred, uploader=None):
+    client = create_evernote_client(evernote_cred)
     note_store = client.get_note_store()
     
     notebook_name = evernote_cred["notebook_name"]
@@ -116,55 +192,87 @@ def change_tag_evernote(args, evernote_cred):
         if notebook_name == notebook.name:
             target_notebook = notebook
             break
+    if target_notebook is None:
+        logger.error("not exists notebook: {}".format(notebook_name))
+        return
+
+    tag_names = dict([(tag.guid, tag.name) for tag in note_store.listTags()]) # key: tag guid, value: tag name
+
+    is_own_uploader = uploader is None
+    if is_own_uploader:
+        uploader = create_evernote_uploader(evernote_cred)
 
     note_filter = NSTypes.NoteFilter()
     note_filter.notebookGuid = target_notebook.guid
+    note_filter.order = Types.NoteSortOrder.CREATED # not changed by updateNote
+    result_spec = NSTypes.NotesMetadataResultSpec(includeTitle=True, includeTagGuids=True)
 
-    notes_per_page = 50
-    note_list = note_store.findNotes(note_filter, 0, 1)
-    note_num = note_list.totalNotes
-    max_page_num = math.ceil(note_num / notes_per_page)
-    note_num_digits = len(str(note_num))
-    message_current_max = "({{:0{digits}d}}/{{:0{digits}d}})".format(digits=note_num_digits)
-    for page_num in range(0, max_page_num):
-        note_list = note_store.findNotes(note_filter, notes_per_page * page_num, notes_per_page * (page_num + 1))
-        
-        for i, note in enumerate(note_list.notes):
-            logger.info((message_current_max + ": {}").format(notes_per_page * page_num + i + 1, note_num, note.title))
-            current_tag_names = note_store.getNoteTagNames(note.guid)
-            new_tag_names = set()
-            for current_tag_name in current_tag_names:
-                try:
-                    program_date = dateutil.parser.parse(current_tag_name)
-                    new_tag_names.add("{:%Y}".format(program_date))
-                    new_tag_names.add("{:%Y.%m}".format(program_date))
-                except:
-                    new_tag_names.add(current_tag_name)
-                    
-            logger.info("change tags: {}->{}".format(current_tag_names, new_tag_names))
-            note.tagGuids.clear()
-            note.content = None
-            note.resources = None
-            note.tagNames = new_tag_names
-            note_store.updateNote(note)
+    notes_per_page = 250 # max of findNotesMetadata
+    changes = list() # (note metadata, current tag names, new tag names)
+    offset = 0
+    note_num = None
+    try:
+        while note_num is None or offset < note_num:
+            metalist = uploader.call("findNotesMetadata", note_filter, offset, notes_per_page, result_spec)
+            note_num = metalist.totalNotes
+            if not len(metalist.notes):
+                break
+            offset += len(metalist.notes)
+            logger.info("fetch notes: {}/{}".format(offset, note_num))
 
-def store_local(store_dirname, recipe):
-    pickle_filename = store_dirname / "{}.pickle".format(recipe.id)
+            for meta_ in metalist.notes:
+                current_tag_names = set([tag_names[tag_guid] for tag_guid in meta_.tagGuids or list() if tag_guid in tag_names])
+                new_tag_names = set()
+                for current_tag_name in current_tag_names:
+                    new_tag_names.update(_change_tag_name(current_tag_name))
+                if new_tag_names != current_tag_names:
+                    changes.append((meta_, current_tag_names, new_tag_names))
 
-    recipes = dict()
+        logger.info("change tags of {}/{} notes{}".format(len(changes), note_num, " (dry run)" if args.dry_run else ""))
+        message_current_max = "({{:0{digits}d}}/{{:0{digits}d}})".format(digits=len(str(len(changes))))
+        for i, (meta_, current_tag_names, new_tag_names) in enumerate(changes):
+            logger.info((message_current_max + ": {}: {}->{}").format(i + 1, len(changes), meta_.title, sorted(current_tag_names), sorted(new_tag_names)))
 
-    if pickle_filename.exists():
-        recipes.update(pickle.load(pickle_filename.open("rb")))
+        if args.dry_run:
+            return
 
-    recipes[recipe.cooking_name] = recipe
+        future_to_meta = dict()
+        for meta_, _, new_tag_names in changes:
+            note = Types.Note(guid=meta_.guid, title=meta_.title, tagGuids=list(), tagNames=sorted(new_tag_names))
+            future_to_meta[uploader.submit("updateNote", note)] = meta_
+        
+        failed_num = 0
+        for future in concurrent.futures.as_completed(future_to_meta):
+            try:
+                future.result()
+            except Exception:
+                failed_num += 1
+                logger.exception("failed to change tags: {}".format(future_to_meta[future].title))
+        logger.info("changed tags of {} notes. {} failed".format(len(changes) - failed_num, failed_num))
+    finally:
+        if is_own_uploader:
+            uploader.close()
 
-    with pickle_filename.open("wb") as fp:
-        pickle.dump(recipes, fp)
+def store_local_enex(store_dirname, program_title, recipes, site_config, max_bytes=None, max_notes=None, on_stored=None):
+    """
+    yield each recipe written to the enex.
+    on_stored is called with the ids of the recipes in the finished enex files, also when the export fails halfway.
+    """
+    basename = "{}.{:%Y%m%d-%H%M}".format(program_title, datetime.datetime.now())
+    if max_bytes or max_notes:
+        enex_writer = recipe_crawler.translators.RotatingEnexWriter(store_dirname, basename, max_bytes=max_bytes, max_notes=max_notes)
+    else:
+        enex_writer = recipe_crawler.translators.EnexWriter(store_dirname / "{}.enex".format(basename))
 
-def store_local_enex(store_dirname, program_title, enexs):
-    merged_enex = recipe_crawler.translators.EvernoteLocalEnexTranslator.merge(enexs)
-    output_filename = store_dirname / "{}.{:%Y%m%d-%H%M}.enex".format(program_title, datetime.datetime.now())
-    output_filename.write_text(merged_enex)
+    try:
+        with enex_writer:
+            for recipe in recipes():
+                enex_writer.write(recipe_crawler.translators.EvernoteLocalEnexTranslator(recipe, site_config))
+                recipe_crawler.metrics.count("enex_notes")
+                yield recipe
+    finally:
+        if on_stored is not None:
+            on_stored(enex_writer.stored_recipe_ids)
 
 def _get_evernote_credential(credential_json_filename):
     if not credential_json_filename.exists():
@@ -193,7 +301,93 @@ def _get_evernote_credential(credential_json_filename):
     else:
         logger.debug('"sandbox" or "developer_token" or "notebook_name" are not exists in "evernote" section in credential file: {}'.format(credential_json_filename))
 
+def run_site(crawler, args, site_config, evernote_cred, sink_lock, recipe_store, notebook_mirror=None, uploader=None, jsonl_fp=None):
+    with recipe_crawler.metrics.tagged(crawler.site_name), recipe_crawler.metrics.timer("site_total"):
+        if args.parse_only:
+            site_config = dict(site_config, is_expand_entry_urls=False) # expanding may access entry urls
+        crawler.init(args, site_config, is_read_only=args.parse_only)
+        recipe_pickle_dir = crawler.cache_dir / "_pickle" # stored by old versions
+        if not args.parse_only and recipe_pickle_dir.is_dir():
+            recipe_store.migrate_pickle_dir(crawler.site_name, recipe_pickle_dir)
+    
+        try:
+            if args.parse_only:
+                logger.info("parse cached pages only")
+                start_time = time.perf_counter()
+                recipes_num = 0
+                for recipe in crawler.replay(use_parsed_cache=args.parse_only_use_parsed_cache):
+                    if jsonl_fp is None:
+                        recipe_store.put(crawler.site_name, recipe)
+                    else:
+                        with sink_lock:
+                            jsonl_fp.write(json.dumps({"site": crawler.site_name, "recipe": recipe.to_dict()}, ensure_ascii=False) + "\n")
+                    recipes_num += 1
+                logger.info("{}: {} recipes parsed in {:.1f} seconds".format(crawler.site_name, recipes_num, time.perf_counter() - start_time))
+            elif args.use_local:
+                logger.info("store local enex")
+                enex_dir = args.work_dir / "_enex"
+                enex_dir.mkdir(parents=True, exist_ok=True)
+                def append_processed_list(processed_recipe_ids):
+                    # only the recipes in the finished enex files. the others are exported again by the next run
+                    recipe_store.flush() # stored before marked as processed
+                    with sink_lock:
+                        with crawler.processed_list_filename.open("a") as fp:
+                            for processed_recipe_id in processed_recipe_ids:
+                                fp.write("{}\n".format(processed_recipe_id))
+
+                for recipe in store_local_enex(enex_dir, site_config["program_name"], crawler.process, site_config,
+                                               max_bytes=args.enex_max_mb * 1024 * 1024, max_notes=args.enex_max_notes, on_stored=append_processed_list):
+                    recipe_store.put(crawler.site_name, recipe)
+            else:
+                for recipe in store_evernote(crawler.process, args, site_config, evernote_cred, is_note_exist_check=not args.no_check_existed_note, sink_lock=sink_lock, notebook_mirror=notebook_mirror, uploader=uploader):
+                    if recipe:
+                        # stored before marked as processed. one commit per note is small beside its upload
+                        recipe_store.put(crawler.site_name, recipe)
+                        recipe_store.flush()
+                        if not args.fake_evernote: # not uploaded actually
+                            with sink_lock:
+                                with crawler.processed_list_filename.open("a") as fp:
+                                    fp.write("{}\n".format(recipe.id))
+        finally:
+            if recipe_store is not None: # None with --parse-only-jsonl
+                recipe_store.flush()
+
+def write_metrics(args):
+    if not recipe_crawler.metrics.is_enabled():
+        return
+    recipe_crawler.metrics.write_json(args.work_dir / "_metrics" / "metrics.{:%Y%m%d-%H%M%S}.json".format(datetime.datetime.now()))
+    if args.metrics_prometheus_file:
+        recipe_crawler.metrics.write_prometheus(args.metrics_prometheus_file)
+
+def search_main(argv):
+    parser = argparse.ArgumentParser(prog="{} search".format(sys.argv[0]), description="full text search of crawled recipes")
+    root_dir = pathlib.Path(sys.argv[0]).parent
+    parser.add_argument("query", nargs="+", help="words in cooking names, materials, steps or important points. all words must be matched.")
+    parser.add_argument("--work-dir", default=root_dir / ".work_recipes", type=pathlib.Path, help="working directory")
+    parser.add_argument("--site", help="site name in config yaml file")
+    parser.add_argument("--limit", default=20, type=int)
+
+    args = parser.parse_args(argv)
+    db_filename = args.work_dir / "_recipes.sqlite3"
+    if not db_filename.exists():
+        logger.error("not exists recipe store: {}".format(db_filename))
+        return
+
+    with recipe_crawler.stores.RecipeStore(db_filename) as recipe_store:
+        start_time = time.perf_counter()
+        results = recipe_store.search(" ".join(args.query), site=args.site, limit=args.limit)
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+
+    for site, recipe in results:
+        program_date = "{:%Y.%m.%d}".format(recipe.program_date) if recipe.program_date else "-"
+        print("{} {}「{}」 [{}] {}".format(program_date, recipe.program_name, recipe.cooking_name, site, recipe.detail_url))
+    print("{} recipes ({:.1f} ms)".format(len(results), elapsed_ms))
+
 def main():
+    if 1 < len(sys.argv) and sys.argv[1] == "search":
+        search_main(sys.argv[2:])
+        return
+
     parser = argparse.ArgumentParser()
     root_dir = pathlib.Path(sys.argv[0]).parent
     parser.add_argument("sites", nargs="*", help="site name in config yaml file. no input is select all sites. if specified explicitly, it is executed regardless of the 'enable' value.")
@@ -202,11 +396,49 @@ def main():
     parser.add_argument("--work-dir", default=root_dir / ".work_recipes", type=pathlib.Path, help="working directory")
     parser.add_argument("--credential-json-filename", default=root_dir / "recipe_crawler_cred.json", type=pathlib.Path)
     parser.add_argument("--no-check-existed-note", action="store_true", help="no check existed notes and append new note. if do not check existed note and skip.")
+    parser.add_argument("--no-notebook-mirror", action="store_true", help="check existed notes by searching titles on Evernote instead of the local notebook mirror synced in work dir")
+    parser.add_argument("--evernote-workers", default=3, type=int, help="number of notes uploaded to Evernote concurrently")
+    parser.add_argument("--change-tag", action="store_true", help="change program date tags of notes in the Evernote notebook to year and month tags, and exit")
+    parser.add_argument("--dry-run", action="store_true", help="with --change-tag, only show the tags to be changed")
+    parser.add_argument("--fake-evernote", action="store_true", help="upload notes to an in-process fake Evernote account instead of the real one")
+    parser.add_argument("--fake-evernote-latency", default=0.0, type=float, help="seconds added to each api call of --fake-evernote")
     parser.add_argument("--processed-list-filename-postfix", default="_processed_data.txt")
     parser.add_argument("--use-local", action="store_true", help="store local enex file. do not sync cloud evernote")
+    parser.add_argument("--parse-only", action="store_true", help="parse all cached pages again without network access, Evernote or enex. overviews are read from the last crawl and the processed list is ignored. results are stored in the recipe store, or --parse-only-jsonl.")
+    parser.add_argument("--parse-only-jsonl", type=pathlib.Path, help="with --parse-only, write recipes to this jsonl file instead of the recipe store")
+    parser.add_argument("--parse-only-use-parsed-cache", action="store_true", help="with --parse-only, use cached parse results of the same parser version")
+    parser.add_argument("--enex-max-mb", default=0, type=int, help="split local enex files into <program>.<timestamp>.partNN.enex of this size. 0 is no limit.")
+    parser.add_argument("--enex-max-notes", default=0, type=int, help="split local enex files into parts of this number of notes. 0 is no limit.")
+    parser.add_argument("--metrics", action="store_true", help="write timers and counters of each stage to work dir/_metrics/metrics.<timestamp>.json")
+    parser.add_argument("--metrics-prometheus-file", type=pathlib.Path, help="also write the metrics as a prometheus textfile (node_exporter textfile collector)")
+    parser.add_argument("--profile", action="store_true", help="profile each site by cProfile into work dir/_profiles/<site>/<timestamp> and show the hot functions at the end. sites are crawled one by one.")
+    parser.add_argument("--profile-memory", action="store_true", help="trace memory allocations of each site by tracemalloc into work dir/_profiles/<site>/<timestamp>")
+    parser.add_argument("--jobs", default=1, type=int, help="number of sites crawled in parallel")
+    parser.add_argument("--parse-workers", default=1, type=int, help="number of processes to parse cached detail pages. 1 is no parallel parsing.")
+    parser.add_argument("--image-cache-max-mb", default=1024, type=int, help="max size of the image cache in work dir. 0 is no image cache.")
+    parser.add_argument("--template-bytecode-cache", action="store_true", help="store compiled note templates in work dir")
+    parser.add_argument("--no-tls-verify", action="store_true", help="skip TLS verification of all requests. to skip only some sites, set \"tls_verify: false\" in config yaml")
+    parser.add_argument("--http-timeout", default=60.0, type=float, help="read timeout seconds of http requests")
+    parser.add_argument("--http-pool-size", default=10, type=int, help="max keep-alive connections per host")
+    parser.add_argument("--http-retries", default=3, type=int, help="retry count of http requests on connection errors and 429/5xx")
 
     args = parser.parse_args()
     args.work_dir.mkdir(parents=True, exist_ok=True)
+    if args.metrics or args.metrics_prometheus_file:
+        recipe_crawler.metrics.enable()
+    if (args.profile or args.profile_memory) and 1 < args.jobs:
+        logger.warning("--jobs is ignored while profiling")
+        args.jobs = 1
+    recipe_crawler.sessions.configure(
+            verify=not args.no_tls_verify,
+            timeout=(10, args.http_timeout),
+            pool_maxsize=args.http_pool_size,
+            retries=args.http_retries)
+    if args.template_bytecode_cache and not args.parse_only: # --parse-only translates no notes
+        recipe_crawler.translators.templates.enable_bytecode_cache(args.work_dir / "_jinja2")
+    if 0 < args.image_cache_max_mb and not args.parse_only:
+        recipe_crawler.translators.EvernoteTranslator.image_cache = recipe_crawler.image_cache.ImageCache(
+                args.work_dir / "_images", max_bytes=args.image_cache_max_mb * 1024 * 1024)
     
     if not args.config_yaml_filename.exists():
         logger.error("not exists config file: {}".format(args.config_yaml_filename))
@@ -233,46 +465,86 @@ def main():
         return
     
     evernote_cred = _get_evernote_credential(args.credential_json_filename)
-    # change_tag_evernote(args, evernote_cred)
+    if args.fake_evernote:
+        logger.info("use fake evernote account. notes are not uploaded")
+        evernote_cred = {
+            "is_sandbox": True,
+            "developer_token": None,
+            "notebook_name": evernote_cred["notebook_name"] if evernote_cred else "recipe",
+            "fake_account": recipe_crawler.fake_note_store.FakeEvernoteAccount(latency=args.fake_evernote_latency),
+        }
+    if args.change_tag:
+        if evernote_cred is None:
+            logger.error("no evernote credential: {}".format(args.credential_json_filename))
+            return
+        change_tag_evernote(args, evernote_cred)
+        return
 
     if args.sites is None or len(args.sites) == 0:
         args.sites = [key for key in config.keys() if config[key].get("enable", True)] # True if 'enable' is omitted
     
+    site_targets = list()
     for site in args.sites:
         if site in config and site in crawlers_map:
-            site_config = config[site]
-            
-            crawler = crawlers_map[site]
-            crawler.init(args, site_config)
-            recipe_pickle_dir = crawler.cache_dir / "_pickle"
-            recipe_pickle_dir.mkdir(parents=True, exist_ok=True)
-            
-            if args.use_local:
-                logger.info("store local enex")
-                enexs = list()
-                processed_recipes = list()
-                for recipe, (enex_title, enex) in create_enex(crawler.process, args, site_config):
-                    store_local(recipe_pickle_dir, recipe)
-                    enexs.append(enex)
-                    processed_recipes.append(recipe)
-                
-                enex_dir = args.work_dir / "_enex"
-                enex_dir.mkdir(parents=True, exist_ok=True)
-                if len(enexs):
-                    store_local_enex(enex_dir, site_config["program_name"], enexs)
-
-                for proecssed_recipe in processed_recipes:
-                    with crawler.processed_list_filename.open("a") as fp:
-                        fp.write("{}\n".format(proecssed_recipe.id))
-            else:
-                for recipe in store_evernote(crawler.process, args, site_config, evernote_cred, is_note_exist_check=not args.no_check_existed_note):
-                    if recipe:
-                        with crawler.processed_list_filename.open("a") as fp:
-                            fp.write("{}\n".format(recipe.id))
-                        
-                        store_local(recipe_pickle_dir, recipe)
+            site_targets.append((site, config[site], crawlers_map[site]))
         else:
             logger.warning("not exist: {}".format(site))
 
+    sink_lock = threading.RLock() # serialize outputs of sites crawled in parallel
+    notebook_mirror = None
+    uploader = None # shared by all sites, as the rate limit is per account
+    if not args.use_local and not args.parse_only:
+        if not args.no_notebook_mirror:
+            notebook_mirror = recipe_crawler.evernote_mirror.NotebookMirror(args.work_dir / ("_evernote_mirror.fake.json" if args.fake_evernote else "_evernote_mirror.json"))
+        if evernote_cred:
+            uploader = create_evernote_uploader(evernote_cred, workers=args.evernote_workers)
+
+    site_profilers = list() # (site, recipe_crawler.profiler.SiteProfiler)
+    jsonl_fp = None
+    if args.parse_only and args.parse_only_jsonl:
+        args.parse_only_jsonl.parent.mkdir(parents=True, exist_ok=True)
+        jsonl_fp = args.parse_only_jsonl.open("w", encoding="utf-8")
+    recipe_store = None
+    try:
+        if jsonl_fp is None: # --parse-only-jsonl writes only the jsonl file
+            recipe_store = recipe_crawler.stores.RecipeStore(args.work_dir / "_recipes.sqlite3")
+        if args.jobs <= 1:
+            profile_timestamp = "{:%Y%m%d-%H%M%S}".format(datetime.datetime.now())
+            for site, site_config, crawler in site_targets:
+                try:
+                    if args.profile or args.profile_memory:
+                        site_profiler = recipe_crawler.profiler.SiteProfiler(args.work_dir / "_profiles" / site / profile_timestamp, cpu=args.profile, memory=args.profile_memory)
+                        site_profilers.append((site, site_profiler))
+                        with site_profiler:
+                            run_site(crawler, args, site_config, evernote_cred, sink_lock, recipe_store, notebook_mirror, uploader, jsonl_fp)
+                    else:
+                        run_site(crawler, args, site_config, evernote_cred, sink_lock, recipe_store, notebook_mirror, uploader, jsonl_fp)
+                    logger.info("{}: done".format(site))
+                except Exception:
+                    logger.exception("{}: failed".format(site))
+            return
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=args.jobs) as executor:
+            future_to_site = dict([(executor.submit(run_site, crawler, args, site_config, evernote_cred, sink_lock, recipe_store, notebook_mirror, uploader, jsonl_fp), site) for site, site_config, crawler in site_targets])
+            for future in concurrent.futures.as_completed(future_to_site):
+                try:
+                    future.result()
+                    logger.info("{}: done".format(future_to_site[future]))
+                except Exception:
+                    logger.exception("{}: failed".format(future_to_site[future]))
+    finally:
+        if uploader is not None:
+            uploader.close()
+        if recipe_store is not None:
+            recipe_store.close()
+        if jsonl_fp is not None:
+            jsonl_fp.close()
+        if recipe_crawler.translators.EvernoteTranslator.image_cache is not None:
+            recipe_crawler.translators.EvernoteTranslator.image_cache.close()
+        write_metrics(args)
+        for site, site_profiler in site_profilers:
+            print("===== {} =====".format(site))
+            print(site_profiler.report())
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 25 10:02:15 2026
+
+@author: yuki_next
+"""
+
+import datetime
+import importlib
+import os
+import pathlib
+import shutil
+import sys
+
+import pytest
+
+scraper_dir = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(scraper_dir))
+
+from recipe_crawler.models import Recipe, RecipeText
+
+@pytest.fixture
+def make_recipe():
+    def _make_recipe(recipe_id, cooking_name=None, materials=(), recipe_steps=(), program_date=datetime.date(2020, 1, 1)):
+        recipe = Recipe()
+        recipe.id = recipe_id
+        recipe.detail_url = "https://example.com/recipe/{}/".format(recipe_id)
+        recipe.cooking_name = cooking_name or "料理{}".format(recipe_id)
+        recipe.program_name = "テスト番組"
+        recipe.program_date = program_date
+        recipe.materials.extend([RecipeText(text) for text in materials])
+        recipe.recipe_steps.extend([RecipeText(text) for text in recipe_steps])
+        return recipe
+    return _make_recipe
+
+@pytest.fixture(scope="session")
+def recipe_main(tmp_path_factory):
+    # recipe_main reads recipe_crawler_logging.yml in the current directory and writes logs/ on import
+    log_dir = tmp_path_factory.mktemp("recipe_main")
+    shutil.copy(str(scraper_dir / "recipe_crawler_logging.yml"), str(log_dir))
+    (log_dir / "logs").mkdir()
+    cwd = pathlib.Path.cwd()
+    try:
+        os.chdir(str(log_dir))
+        return importlib.import_module("recipe_main")
+    finally:
+        os.chdir(str(cwd))
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 25 11:14:20 2026
+
+@author: yuki_next
+"""
+
+import base64
+import json
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from recipe_crawler.translators import EvernoteLocalEnexTranslator, EvernoteTranslator
+from recipe_crawler.translators.evernote_local_enex_translator import EnexWriter, RotatingEnexWriter
+
+site_config = {"program_name": "テスト番組"}
+
+@pytest.fixture
+def translators(make_recipe):
+    return [EvernoteLocalEnexTranslator(make_recipe(i, materials=["材料{}".format(j) for j in range(5)], recipe_steps=["手順"]), site_config) for i in range(7)]
+
+def note_titles(enex_filename):
+    return [note.findtext("title") for note in ET.parse(str(enex_filename)).getroot().findall("note")]
+
+def test_write(tmp_path, translators):
+    with EnexWriter(tmp_path / "program.enex") as writer:
+        titles = [writer.write(translator) for translator in translators]
+        assert writer.stored_recipe_ids == list() # not stored until closed
+
+    assert note_titles(tmp_path / "program.enex") == titles
+    assert writer.stored_recipe_ids == list(range(7))
+    assert [fn.name for fn in tmp_path.iterdir()] == ["program.enex"]
+
+def test_no_notes_no_file(tmp_path):
+    with EnexWriter(tmp_path / "program.enex"):
+        pass
+    assert list(tmp_path.iterdir()) == list()
+
+def test_exception_not_stored(tmp_path, translators):
+    with pytest.raises(RuntimeError):
+        with EnexWriter(tmp_path / "program.enex") as writer:
+            writer.write(translators[0])
+            raise RuntimeError("crawler failed")
+    assert list(tmp_path.iterdir()) == list()
+    assert writer.stored_recipe_ids == list()
+
+def test_existing_file_not_overwritten(tmp_path, translators):
+    (tmp_path / "program.enex").write_text("other site")
+    with EnexWriter(tmp_path / "program.enex") as writer:
+        writer.write(translators[0])
+    assert (tmp_path / "program.enex").read_text() == "other site"
+    assert writer.output_filename.name == "program-2.enex"
+    assert len(note_titles(tmp_path / "program-2.enex")) == 1
+
+def test_split_by_notes(tmp_path, translators):
+    with RotatingEnexWriter(tmp_path, "program", max_notes=3) as writer:
+        titles = [writer.write(translator) for translator in translators]
+
+    assert sorted(fn.name for fn in tmp_path.glob("*.enex")) == ["program.part01.enex", "program.part02.enex", "program.part03.enex"]
+    assert note_titles(tmp_path / "program.part01.enex") == titles[0:3]
+    assert note_titles(tmp_path / "program.part02.enex") == titles[3:6]
+    assert note_titles(tmp_path / "program.part03.enex") == titles[6:7]
+    assert not list(tmp_path.glob("*.tmp"))
+
+def test_index(tmp_path, translators):
+    with RotatingEnexWriter(tmp_path, "program", max_notes=4) as writer:
+        titles = [writer.write(translator) for translator in translators]
+
+    index = json.loads((tmp_path / "program.index.json").read_text())
+    assert [part["filename"] for part in index["parts"]] == ["program.part01.enex", "program.part02.enex"]
+    assert [note["id"] for note in index["parts"][0]["notes"]] == [0, 1, 2, 3]
+    assert [note["title"] for part in index["parts"] for note in part["notes"]] == titles
+
+def test_split_by_bytes(tmp_path, translators):
+    with EnexWriter(tmp_path / "single.enex") as writer:
+        writer.write(translators[0])
+        one_note_bytes = writer.size
+
+    with RotatingEnexWriter(tmp_path, "program", max_bytes=one_note_bytes * 2) as writer:
+        for translator in translators:
+            writer.write(translator)
+
+    part_filenames = sorted(tmp_path.glob("program.part*.enex"))
+    assert 2 < len(part_filenames)
+    assert sum(len(note_titles(fn)) for fn in part_filenames) == len(translators)
+
+def test_no_limit_single_part(tmp_path, translators):
+    with RotatingEnexWriter(tmp_path, "program") as writer:
+        for translator in translators:
+            writer.write(translator)
+    assert [fn.name for fn in tmp_path.glob("*.enex")] == ["program.part01.enex"]
+    assert len(note_titles(tmp_path / "program.part01.enex")) == len(translators)
+
+def test_no_notes_no_files(tmp_path):
+    with RotatingEnexWriter(tmp_path, "program", max_notes=3):
+        pass
+    assert list(tmp_path.iterdir()) == list()
+
+def test_existing_part_not_overwritten(tmp_path, translators):
+    (tmp_path / "program.part01.enex").write_text("other site")
+    with RotatingEnexWriter(tmp_path, "program") as writer:
+        writer.write(translators[0])
+    assert (tmp_path / "program.part01.enex").read_text() == "other site"
+    assert len(note_titles(tmp_path / "program.part01-2.enex")) == 1
+
+def test_same_basename_at_the_same_time(tmp_path, translators):
+    # sites which share the program name, stored in parallel
+    with RotatingEnexWriter(tmp_path, "program", max_notes=2) as writer1, RotatingEnexWriter(tmp_path, "program", max_notes=2) as writer2:
+        titles1 = [writer1.write(translator) for translator in translators[:3]]
+        titles2 = [writer2.write(translator) for translator in translators[3:]]
+
+    assert writer1.index_filename.name == "program.index.json"
+    assert writer2.index_filename.name == "program-2.index.json"
+    for writer, titles in ((writer1, titles1), (writer2, titles2)):
+        index = json.loads(writer.index_filename.read_text())
+        assert [part["filename"] for part in index["parts"]] == ["{}.part01.enex".format(writer.basename), "{}.part02.enex".format(writer.basename)]
+        assert [title for part in index["parts"] for title in note_titles(tmp_path / part["filename"])] == titles
+
+def test_exception_keeps_finished_parts(tmp_path, translators):
+    with pytest.raises(RuntimeError):
+        with RotatingEnexWriter(tmp_path, "program", max_notes=2) as writer:
+            for translator in translators[:3]:
+                writer.write(translator)
+            raise RuntimeError("crawler failed")
+    assert sorted(fn.name for fn in tmp_path.iterdir()) == ["program.index.json", "program.part01.enex"]
+    assert writer.stored_recipe_ids == [0, 1]
+
+def test_exception_before_first_part(tmp_path, translators):
+    with pytest.raises(RuntimeError):
+        with RotatingEnexWriter(tmp_path, "program", max_notes=2) as writer:
+            writer.write(translators[0])
+            raise RuntimeError("crawler failed")
+    assert list(tmp_path.iterdir()) == list()
+
+def test_resource_data(tmp_path, translators):
+    translator = translators[0]
+    translator.base64_chunk_size = 3 * 100
+    data = bytes(range(256)) * 10 # over some chunks, and not a multiple of 3
+    translator.translated_note.resources = {"https://example.com/image.png": EvernoteTranslator._create_evernote_resource("image.png", data)}
+
+    with EnexWriter(tmp_path / "resource.enex") as writer:
+        writer.write(translator)
+    encoded = ET.parse(str(tmp_path / "resource.enex")).getroot().findtext("note/resource/data")
+    assert base64.b64decode("".join(encoded.split())) == data
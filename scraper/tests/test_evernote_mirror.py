@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 25 10:08:41 2026
+
+@author: yuki_next
+"""
+
+import evernote.edam.type.ttypes as Types
+import pytest
+
+from recipe_crawler.evernote_mirror import NotebookMirror
+from recipe_crawler.fake_note_store import FakeEvernoteAccount
+
+@pytest.fixture
+def account():
+    return FakeEvernoteAccount()
+
+@pytest.fixture
+def note_store(account):
+    return account.get_note_store()
+
+@pytest.fixture
+def notebooks(note_store):
+    return note_store.createNotebook(Types.Notebook(name="recipe")), note_store.createNotebook(Types.Notebook(name="other"))
+
+def create_note(note_store, notebook, title, source_url=None):
+    return note_store.createNote(Types.Note(title=title, notebookGuid=notebook.guid, attributes=Types.NoteAttributes(sourceURL=source_url)))
+
+def test_full_sync(tmp_path, note_store, notebooks):
+    recipe_notebook, other_notebook = notebooks
+    created = [create_note(note_store, recipe_notebook, "料理{}".format(i), "https://example.com/{}".format(i)) for i in range(250)]
+    create_note(note_store, other_notebook, "別のノート")
+
+    mirror = NotebookMirror(tmp_path / "mirror.json")
+    mirror.sync_chunk_size = 30 # several chunks
+    mirror.sync(note_store, recipe_notebook.guid)
+
+    assert len(mirror) == 250
+    assert "料理0" in mirror and "料理249" in mirror
+    assert not "別のノート" in mirror
+    assert mirror.notes[created[3].guid] == {"title": "料理3", "source_url": "https://example.com/3"}
+    assert mirror.usn == note_store.getSyncState().updateCount
+
+def test_saved_and_loaded(tmp_path, note_store, notebooks):
+    recipe_notebook, _ = notebooks
+    create_note(note_store, recipe_notebook, "料理")
+    mirror = NotebookMirror(tmp_path / "mirror.json")
+    mirror.sync(note_store, recipe_notebook.guid)
+
+    loaded = NotebookMirror(tmp_path / "mirror.json")
+    assert "料理" in loaded
+    assert loaded.usn == mirror.usn
+    assert loaded.notebook_guid == recipe_notebook.guid
+
+def test_incremental_sync(tmp_path, account, note_store, notebooks):
+    recipe_notebook, _ = notebooks
+    create_note(note_store, recipe_notebook, "料理1")
+    mirror = NotebookMirror(tmp_path / "mirror.json")
+    mirror.sync(note_store, recipe_notebook.guid)
+
+    create_note(note_store, recipe_notebook, "料理2")
+    account.calls.clear()
+    mirror = NotebookMirror(tmp_path / "mirror.json")
+    mirror.sync(note_store, recipe_notebook.guid)
+
+    assert "料理1" in mirror and "料理2" in mirror
+    assert account.calls["getFilteredSyncChunk"] == 1
+
+def test_no_change(tmp_path, account, note_store, notebooks):
+    recipe_notebook, _ = notebooks
+    create_note(note_store, recipe_notebook, "料理")
+    mirror = NotebookMirror(tmp_path / "mirror.json")
+    mirror.sync(note_store, recipe_notebook.guid)
+
+    account.calls.clear()
+    mirror.sync(note_store, recipe_notebook.guid)
+    assert account.calls["getFilteredSyncChunk"] == 0
+    assert "料理" in mirror
+
+def test_expunged_trashed_moved_and_renamed(tmp_path, note_store, notebooks):
+    recipe_notebook, other_notebook = notebooks
+    expunged, trashed, moved, renamed, kept = [create_note(note_store, recipe_notebook, title) for title in ("削除", "ゴミ箱", "移動", "改名前", "そのまま")]
+    mirror = NotebookMirror(tmp_path / "mirror.json")
+    mirror.sync(note_store, recipe_notebook.guid)
+    assert len(mirror) == 5
+
+    note_store.expungeNote(expunged.guid)
+    note_store.updateNote(Types.Note(guid=trashed.guid, title=trashed.title, active=False))
+    note_store.updateNote(Types.Note(guid=moved.guid, title=moved.title, notebookGuid=other_notebook.guid))
+    note_store.updateNote(Types.Note(guid=renamed.guid, title="改名後"))
+    mirror.sync(note_store, recipe_notebook.guid)
+
+    assert not "削除" in mirror
+    assert not "ゴミ箱" in mirror
+    assert not "移動" in mirror
+    assert not "改名前" in mirror
+    assert "改名後" in mirror
+    assert "そのまま" in mirror
+    assert set(mirror.notes.keys()) == set([renamed.guid, kept.guid])
+
+def test_full_sync_before_resets(tmp_path, account, note_store, notebooks):
+    recipe_notebook, _ = notebooks
+    create_note(note_store, recipe_notebook, "料理")
+    mirror = NotebookMirror(tmp_path / "mirror.json")
+    mirror.sync(note_store, recipe_notebook.guid)
+    mirror.add("stale-guid", "同期されていないノート") # only in the mirror
+
+    account.full_sync_before = mirror.synced_at + 1
+    account.calls.clear()
+    mirror.sync(note_store, recipe_notebook.guid)
+
+    assert not "同期されていないノート" in mirror
+    assert "料理" in mirror
+    assert 0 < account.calls["getFilteredSyncChunk"]
+
+def test_notebook_changed_resets(tmp_path, note_store, notebooks):
+    recipe_notebook, other_notebook = notebooks
+    create_note(note_store, recipe_notebook, "料理")
+    create_note(note_store, other_notebook, "別のノート")
+    mirror = NotebookMirror(tmp_path / "mirror.json")
+    mirror.sync(note_store, recipe_notebook.guid)
+
+    mirror.sync(note_store, other_notebook.guid)
+    assert not "料理" in mirror
+    assert "別のノート" in mirror
+
+def test_same_title_counted(tmp_path):
+    mirror = NotebookMirror(tmp_path / "mirror.json")
+    mirror.add("guid1", "料理")
+    mirror.add("guid2", "料理")
+    mirror.remove("guid1")
+    assert "料理" in mirror
+    mirror.remove("guid2")
+    assert not "料理" in mirror
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 25 14:20:37 2026
+
+@author: yuki_next
+"""
+
+import evernote.edam.type.ttypes as Types
+import pytest
+from thrift.transport.TTransport import TTransportException
+
+from recipe_crawler.evernote_uploader import EvernoteUploader
+from recipe_crawler.fake_note_store import FakeEvernoteAccount, FakeNoteStore
+
+class FlakyNoteStore(FakeNoteStore):
+    """
+    createNote fails with a connection error the first failures["num"] times,
+    after the note is created if is_response_lost, or before it otherwise.
+    failures is shared by the note stores made again after the errors.
+    """
+    def __init__(self, account, failures, is_response_lost=True):
+        super().__init__(account)
+        self.failures = failures
+        self.is_response_lost = is_response_lost
+
+    def createNote(self, note):
+        if self.failures["num"] <= 0:
+            return super().createNote(note)
+        self.failures["num"] -= 1
+        if self.is_response_lost:
+            super().createNote(note)
+        raise TTransportException(message="connection reset")
+
+@pytest.fixture
+def account():
+    return FakeEvernoteAccount()
+
+@pytest.fixture
+def notebook(account):
+    return account.get_note_store().createNotebook(Types.Notebook(name="recipe"))
+
+def create_uploader(account, fail_num, is_response_lost):
+    failures = {"num": fail_num}
+    return EvernoteUploader(lambda: FlakyNoteStore(account, failures, is_response_lost), workers=1, max_retries=3, backoff_factor=0)
+
+def test_lost_response_not_duplicated(account, notebook):
+    with create_uploader(account, fail_num=2, is_response_lost=True) as uploader:
+        created_note = uploader.call("createNote", Types.Note(title="料理", notebookGuid=notebook.guid))
+
+    assert len(account.notes) == 1
+    assert created_note.guid in account.notes
+    assert created_note.title == "料理"
+
+def test_failed_before_sent_retried(account, notebook):
+    with create_uploader(account, fail_num=2, is_response_lost=False) as uploader:
+        created_note = uploader.call("createNote", Types.Note(title="料理", notebookGuid=notebook.guid))
+
+    assert len(account.notes) == 1
+    assert created_note.guid in account.notes
+
+def test_same_title_notes_not_mixed_up(account, notebook):
+    old_note = account.get_note_store().createNote(Types.Note(title="料理", notebookGuid=notebook.guid, created=1000))
+    with create_uploader(account, fail_num=1, is_response_lost=False) as uploader:
+        created_note = uploader.call("createNote", Types.Note(title="料理", notebookGuid=notebook.guid))
+
+    assert len(account.notes) == 2
+    assert created_note.guid != old_note.guid
+
+def test_retry_limit(account, notebook):
+    with create_uploader(account, fail_num=10, is_response_lost=False) as uploader:
+        with pytest.raises(TTransportException):
+            uploader.call("createNote", Types.Note(title="料理", notebookGuid=notebook.guid))
+    assert len(account.notes) == 0
+
+def test_rate_limit_paused_and_retried(notebook):
+    account = FakeEvernoteAccount(rate_limit=2, rate_limit_window=1.0)
+    account.notebooks.update(dict([(notebook.guid, notebook)]))
+    with EvernoteUploader(account.get_note_store, workers=2, backoff_factor=0) as uploader:
+        futures = [uploader.submit("createNote", Types.Note(title="料理{}".format(i), notebookGuid=notebook.guid)) for i in range(4)]
+        created_notes = [future.result() for future in futures]
+
+    assert len(account.notes) == 4
+    assert 0 < account.rate_limit_reached_num
+    assert sorted(note.title for note in created_notes) == ["料理0", "料理1", "料理2", "料理3"]
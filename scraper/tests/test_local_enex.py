@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 26 18:02:37 2026
+
+@author: yuki_next
+"""
+
+import pytest
+
+site_config = {"program_name": "テスト番組"}
+
+def recipes_then_fail(make_recipe, num):
+    def recipes():
+        for i in range(num):
+            yield make_recipe(i)
+        raise RuntimeError("crawler failed")
+    return recipes
+
+def export(recipe_main, tmp_path, recipes, **kwargs):
+    stored_recipe_ids = list()
+    exported = list()
+    with pytest.raises(RuntimeError):
+        for recipe in recipe_main.store_local_enex(tmp_path, "program", recipes, site_config, on_stored=stored_recipe_ids.extend, **kwargs):
+            exported.append(recipe.id)
+    return exported, stored_recipe_ids
+
+def test_failed_export_not_stored(recipe_main, tmp_path, make_recipe):
+    exported, stored_recipe_ids = export(recipe_main, tmp_path, recipes_then_fail(make_recipe, 3))
+    assert exported == [0, 1, 2]
+    assert stored_recipe_ids == list() # not in the processed list, and exported again by the next run
+    assert list(tmp_path.iterdir()) == list()
+
+def test_failed_export_keeps_finished_parts(recipe_main, tmp_path, make_recipe):
+    exported, stored_recipe_ids = export(recipe_main, tmp_path, recipes_then_fail(make_recipe, 5), max_notes=2)
+    assert stored_recipe_ids == [0, 1, 2, 3]
+    assert sorted(fn.name.split(".")[-2] for fn in tmp_path.glob("*.enex")) == ["part01", "part02"]
+    assert not list(tmp_path.glob("*.tmp"))
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 25 10:52:44 2026
+
+@author: yuki_next
+"""
+
+import hashlib
+
+from recipe_crawler.manifest import CacheManifest
+
+def manifest_lines(cache_dir):
+    return [l for l in (cache_dir / "_manifest.jsonl").read_text().splitlines() if len(l.strip())]
+
+def test_replay(tmp_path):
+    manifest = CacheManifest(tmp_path)
+    manifest.put(1, "1", b"one", content_type="text/html; charset=utf-8")
+    manifest.put(2, "2", b"two")
+    manifest.put(3, "3", b"three")
+    manifest.set_status("1", "parsed")
+    manifest.set_status("2", "failed")
+    manifest.remove("3")
+
+    loaded = CacheManifest(tmp_path)
+    assert sorted(loaded.filenames()) == ["1", "2"]
+    assert loaded.get("1")["status"] == "parsed"
+    assert loaded.get("1")["content_type"] == "text/html; charset=utf-8"
+    assert loaded.get("1")["sha256"] == hashlib.sha256(b"one").hexdigest()
+    assert loaded.get("2")["status"] == "failed"
+    assert not "3" in loaded
+
+def test_same_status_not_appended(tmp_path):
+    manifest = CacheManifest(tmp_path)
+    manifest.put(1, "1", b"one")
+    line_num = len(manifest_lines(tmp_path))
+    manifest.set_status("1", "fetched")
+    manifest.set_status("unknown", "parsed")
+    assert len(manifest_lines(tmp_path)) == line_num
+
+def test_compacted_on_load(tmp_path):
+    manifest = CacheManifest(tmp_path)
+    manifest.put(1, "1", b"one")
+    for i in range(5):
+        manifest.set_status("1", "parsed")
+        manifest.set_status("1", "fetched")
+    manifest.put(2, "2", b"two")
+    manifest.remove("2")
+    assert len(manifest_lines(tmp_path)) == 13
+
+    loaded = CacheManifest(tmp_path)
+    assert len(manifest_lines(tmp_path)) == 1
+    assert loaded.get("1")["status"] == "fetched"
+    assert CacheManifest(tmp_path).filenames() == ["1"]
+
+def test_broken_line_ignored(tmp_path):
+    manifest = CacheManifest(tmp_path)
+    manifest.put(1, "1", b"one")
+    with (tmp_path / "_manifest.jsonl").open("a") as fp:
+        fp.write('{"filename": "2", "st\n') # interrupted write
+    manifest = CacheManifest(tmp_path)
+    manifest.put(3, "3", b"three")
+
+    assert sorted(CacheManifest(tmp_path).filenames()) == ["1", "3"]
+
+def test_rebuild_from_cache_dir(tmp_path):
+    (tmp_path / "10").write_bytes(b"ten")
+    (tmp_path / "11").write_bytes(b"eleven")
+    (tmp_path / "_encodings.json").write_text("{}") # not a cached page
+    (tmp_path / "_parsed").mkdir()
+
+    manifest = CacheManifest(tmp_path)
+    assert sorted(manifest.filenames()) == ["10", "11"]
+    assert manifest.get("10")["sha256"] == hashlib.sha256(b"ten").hexdigest()
+    assert manifest.get("10")["size"] == 3
+    assert len(manifest_lines(tmp_path)) == 2
+
+def test_parse_key(tmp_path):
+    manifest = CacheManifest(tmp_path)
+    manifest.put(1, "1", b"one")
+    assert not manifest.is_parsed("1", "key1") # not parsed yet. the parsed cache is not looked up
+    manifest.set_status("1", "parsed", parse_key="key1")
+    assert manifest.is_parsed("1", "key1")
+    assert not manifest.is_parsed("1", "key2") # parser version or content changed
+
+    manifest.set_status("1", "parsed", parse_key="key2")
+    loaded = CacheManifest(tmp_path)
+    assert loaded.is_parsed("1", "key2")
+    loaded.set_status("1", "failed")
+    assert not "parse_key" in loaded.get("1")
+
+    loaded.put(1, "1", b"one again")
+    assert not loaded.is_parsed("1", "key2")
+
+def test_parsed_without_parse_key(tmp_path):
+    # manifests written before parse_key was recorded
+    manifest = CacheManifest(tmp_path)
+    manifest.put(1, "1", b"one")
+    manifest.set_status("1", "parsed")
+    assert manifest.is_parsed("1", "any key")
+
+def test_read_only(tmp_path):
+    (tmp_path / "10").write_bytes(b"ten")
+    manifest = CacheManifest(tmp_path, is_read_only=True)
+    assert manifest.filenames() == ["10"]
+    assert manifest.get("10")["sha256"] == hashlib.sha256(b"ten").hexdigest()
+    assert not (tmp_path / "_manifest.jsonl").exists()
+
+    manifest = CacheManifest(tmp_path)
+    for i in range(5):
+        manifest.set_status("10", "parsed")
+        manifest.set_status("10", "fetched")
+    line_num = len(manifest_lines(tmp_path))
+    assert CacheManifest(tmp_path, is_read_only=True).get("10")["status"] == "fetched"
+    assert len(manifest_lines(tmp_path)) == line_num # not compacted
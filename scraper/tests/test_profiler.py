@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 27 09:12:48 2026
+
+@author: yuki_next
+"""
+
+import tracemalloc
+
+import pytest
+
+from recipe_crawler.profiler import SiteProfiler
+
+def allocate(size):
+    data = bytearray(size)
+    return len(data)
+
+@pytest.fixture(params=["reset_peak", "restart"])
+def tracing(request, monkeypatch):
+    if request.param == "restart":
+        monkeypatch.delattr(tracemalloc, "reset_peak", raising=False) # python < 3.9
+    tracemalloc.start()
+    yield
+    tracemalloc.stop()
+
+def test_memory_peak_per_site(tmp_path, tracing):
+    allocate(32 * 1024 * 1024) # peak before the site
+    with SiteProfiler(tmp_path / "site_a", cpu=False, memory=True) as site_profiler:
+        allocate(1024 * 1024)
+    assert 1024 * 1024 <= site_profiler.memory_peak < 16 * 1024 * 1024
+    assert (tmp_path / "site_a" / "tracemalloc.txt").read_text().startswith("peak: ")
+
+def test_cpu(tmp_path):
+    with SiteProfiler(tmp_path / "site_a") as site_profiler:
+        allocate(1024)
+    assert (tmp_path / "site_a" / "cprofile.pstats").exists()
+    assert "allocate" in site_profiler.report()
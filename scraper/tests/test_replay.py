@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 26 15:40:18 2026
+
+@author: yuki_next
+"""
+
+import io
+import json
+import pickle
+import threading
+import types
+
+import pytest
+import requests
+
+import recipe_crawler.sessions
+from recipe_crawler.crawlers import OishimeshiRecipeCrawler
+
+entry_url = "https://example.com/recipemovie.cgi?template=index.html"
+
+def detail_url(program_date_str):
+    return "https://example.com/recipemovie.cgi?template=detail.html&date={}".format(program_date_str)
+
+def overview_page(program_date_strs):
+    items = ['<div class="titletext"><p class="title"><a href="{}">料理{}</a></p></div>'.format(detail_url(s), s) for s in program_date_strs]
+    return "<html><body>{}</body></html>".format("".join(items)).encode("utf-8")
+
+def detail_page(material):
+    return """<html><body>
+<div id="zairyou_box"><p>材料（2人分）</p><table><tr><td>{}</td><td>100g</td></tr></table></div>
+<table class="recipe"><tr><td>1</td><td>煮る。</td><td></td></tr></table>
+</body></html>""".format(material).encode("utf-8")
+
+@pytest.fixture
+def pages(monkeypatch):
+    pages = dict() # key: url, value: content
+    def get(url, **kwargs):
+        res = requests.Response()
+        res.url = url
+        res.status_code = 200 if url in pages else 404
+        res._content = pages.get(url, b"")
+        res.headers["Content-Type"] = "text/html; charset=UTF-8"
+        return res
+    monkeypatch.setattr(recipe_crawler.sessions, "get", get)
+    return pages
+
+@pytest.fixture
+def crawler(tmp_path):
+    crawler = OishimeshiRecipeCrawler()
+    args = types.SimpleNamespace(work_dir=tmp_path, processed_list_filename_postfix="_processed_data.txt", parse_workers=1)
+    crawler.init(args, {"program_name": "テスト番組", "entry_urls": [entry_url], "fetch_interval": 0})
+    return crawler
+
+def cache_dir_files(cache_dir):
+    return dict([(fn.relative_to(cache_dir), fn.read_bytes()) for fn in cache_dir.rglob("*") if fn.is_file()])
+
+def test_replay_after_parser_change(pages, crawler, monkeypatch):
+    pages[entry_url] = overview_page(["20200401", "20200402"])
+    pages[detail_url("20200401")] = detail_page("大根")
+    pages[detail_url("20200402")] = detail_page("人参")
+    assert len(list(crawler.process())) == 2
+
+    # the second recipe is gone from the overview page, and the parser changed after that
+    pages[entry_url] = overview_page(["20200401"])
+    assert len(list(crawler.process())) == 1
+    monkeypatch.setattr(OishimeshiRecipeCrawler, "parser_version", OishimeshiRecipeCrawler.parser_version + 1)
+
+    recipes = list(crawler.replay())
+    assert sorted(recipe.id for recipe in recipes) == [20200401, 20200402]
+    assert sorted(recipe.materials[1].text for recipe in recipes) == ["人参: 100g", "大根: 100g"]
+
+def test_replay_writes_nothing(pages, crawler):
+    pages[entry_url] = overview_page(["20200401", "20200402"])
+    pages[detail_url("20200401")] = detail_page("大根")
+    pages[detail_url("20200402")] = detail_page("人参")
+    list(crawler.process())
+    unexpected_content = b"<html><body>unexpected format</body></html>"
+    (crawler.cache_dir / "20200402").write_bytes(unexpected_content)
+    crawler.manifest.put(20200402, "20200402", unexpected_content)
+
+    files = cache_dir_files(crawler.cache_dir)
+    recipes = list(crawler.replay())
+    assert [recipe.id for recipe in recipes] == [20200401]
+    assert cache_dir_files(crawler.cache_dir) == files
+
+def test_run_site_parse_only_writes_nothing(pages, crawler, recipe_main, tmp_path, make_recipe):
+    pages[entry_url] = overview_page(["20200401"])
+    pages[detail_url("20200401")] = detail_page("大根")
+    list(crawler.process())
+    # a work dir of an old version: no manifest, and recipes stored by the old store_local
+    (crawler.cache_dir / "_manifest.jsonl").unlink()
+    (crawler.cache_dir / "_pickle").mkdir()
+    with (crawler.cache_dir / "_pickle" / "20200301.pickle").open("wb") as fp:
+        pickle.dump({"料理": make_recipe(20200301)}, fp)
+    files = cache_dir_files(tmp_path)
+
+    args = types.SimpleNamespace(work_dir=tmp_path, processed_list_filename_postfix="_processed_data.txt", parse_workers=1,
+                                 parse_only=True, parse_only_use_parsed_cache=False)
+    jsonl_fp = io.StringIO()
+    recipe_main.run_site(OishimeshiRecipeCrawler(), args, {"program_name": "テスト番組", "entry_urls": [entry_url]}, None, threading.RLock(), None, jsonl_fp=jsonl_fp)
+
+    assert [json.loads(l)["recipe"]["id"] for l in jsonl_fp.getvalue().splitlines()] == [20200401]
+    assert cache_dir_files(tmp_path) == files
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 25 10:31:06 2026
+
+@author: yuki_next
+"""
+
+import datetime
+import pickle
+
+import pytest
+
+from recipe_crawler.stores import RecipeStore, to_search_query
+
+@pytest.fixture
+def recipe_store(tmp_path, make_recipe):
+    with RecipeStore(tmp_path / "recipes.sqlite3", batch_size=2) as recipe_store:
+        recipe_store.put("site_a", make_recipe(1, "肉じゃが", materials=["じゃがいも 3個", "牛肉 200g"], recipe_steps=["弱火で煮る"], program_date=datetime.date(2020, 1, 10)))
+        recipe_store.put("site_a", make_recipe(2, "ポテトサラダ", materials=["じゃがいも 2個", "マヨネーズ"], recipe_steps=["つぶして和える"], program_date=datetime.date(2020, 2, 10)))
+        recipe_store.put("site_b", make_recipe(3, "豚汁", materials=["豚肉 100g", "大根"], recipe_steps=["味噌を溶く"], program_date=datetime.date(2020, 3, 10)))
+        recipe_store.put("site_b", make_recipe(4, "Beef Stew", materials=["Beef 300g"], recipe_steps=["Simmer"], program_date=datetime.date(2020, 4, 10)))
+        yield recipe_store
+
+def test_find(recipe_store):
+    assert [recipe.id for recipe in recipe_store.find()] == [4, 3, 2, 1] # newest program date first
+    assert [recipe.id for recipe in recipe_store.find(site="site_a")] == [2, 1]
+    assert [recipe.id for recipe in recipe_store.find(date_from=datetime.date(2020, 2, 10), date_to=datetime.date(2020, 3, 10))] == [3, 2]
+    assert [recipe.id for recipe in recipe_store.find(limit=1)] == [4]
+    assert recipe_store.find(site="site_c") == list()
+
+def test_get(recipe_store, make_recipe):
+    recipe_store.put("site_b", make_recipe(3, "豚汁のおにぎり")) # two recipes in one detail page
+    assert sorted(recipe_store.get("site_b", 3).keys()) == ["豚汁", "豚汁のおにぎり"]
+    assert recipe_store.get("site_b", "3")["豚汁"].materials[1].text == "大根"
+    assert recipe_store.get("site_a", 3) == dict()
+
+def test_count(recipe_store):
+    assert recipe_store.count() == 4
+    assert recipe_store.count(site="site_b") == 2
+    assert recipe_store.count(program_name="テスト番組", date_to=datetime.date(2020, 1, 31)) == 1
+
+def test_put_replaces(recipe_store, make_recipe):
+    recipe_store.put("site_a", make_recipe(1, "肉じゃが", materials=["じゃがいも 3個", "豚肉 200g"]))
+    assert recipe_store.count() == 4
+    assert recipe_store.get("site_a", 1)["肉じゃが"].materials[1].text == "豚肉 200g"
+
+def test_pending_written_on_close(tmp_path, make_recipe):
+    with RecipeStore(tmp_path / "recipes.sqlite3", batch_size=100) as recipe_store:
+        recipe_store.put("site_a", make_recipe(1))
+    with RecipeStore(tmp_path / "recipes.sqlite3") as recipe_store:
+        assert recipe_store.count() == 1
+
+def test_migrate_pickle_dir(tmp_path, make_recipe):
+    pickle_dir = tmp_path / "site_a" / "_pickle"
+    pickle_dir.mkdir(parents=True)
+    for recipe_id in (1, 2):
+        with (pickle_dir / "{}.pickle".format(recipe_id)).open("wb") as fp:
+            pickle.dump({"料理{}".format(recipe_id): make_recipe(recipe_id)}, fp)
+    (pickle_dir / "3.pickle").write_bytes(b"broken")
+
+    with RecipeStore(tmp_path / "recipes.sqlite3") as recipe_store:
+        assert recipe_store.migrate_pickle_dir("site_a", pickle_dir) == 2
+        assert recipe_store.sites() == ["site_a"]
+        assert sorted(recipe.id for recipe in recipe_store.find(site="site_a")) == [1, 2]
+    assert not pickle_dir.exists()
+    assert (tmp_path / "site_a" / "_pickle.migrated" / "1.pickle").exists()
+
+@pytest.fixture
+def search_store(recipe_store):
+    if not recipe_store.search_enabled:
+        pytest.skip("sqlite3 without fts5")
+    return recipe_store
+
+def test_search_japanese_words(search_store):
+    results = search_store.search("じゃがいも")
+    assert sorted([recipe.cooking_name for _, recipe in results]) == ["ポテトサラダ", "肉じゃが"]
+
+def test_search_all_words_must_match(search_store):
+    results = search_store.search("じゃがいも 牛肉")
+    assert [recipe.cooking_name for _, recipe in results] == ["肉じゃが"]
+
+def test_search_cooking_name_and_steps(search_store):
+    assert [recipe.cooking_name for _, recipe in search_store.search("豚汁")] == ["豚汁"]
+    assert [recipe.cooking_name for _, recipe in search_store.search("味噌")] == ["豚汁"]
+
+def test_search_one_character(search_store):
+    assert [recipe.cooking_name for _, recipe in search_store.search("汁")] == ["豚汁"]
+
+def test_search_normalized(search_store):
+    # NFKC and case folding
+    assert [recipe.cooking_name for _, recipe in search_store.search("ＢＥＥＦ")] == ["Beef Stew"]
+
+def test_search_site(search_store):
+    assert search_store.search("じゃがいも", site="site_b") == list()
+    assert [site for site, _ in search_store.search("豚肉", site="site_b")] == ["site_b"]
+
+def test_search_no_match_and_empty_query(search_store):
+    assert search_store.search("カレー") == list()
+    assert search_store.search("  ") == list()
+
+def test_search_replaced_recipe(search_store, make_recipe):
+    search_store.put("site_b", make_recipe(3, "豚汁", materials=["豚肉 100g", "ごぼう"]))
+    assert search_store.search("大根") == list()
+    assert [recipe.cooking_name for _, recipe in search_store.search("ごぼう")] == ["豚汁"]
+
+def test_search_limit(search_store):
+    assert len(search_store.search("じゃがいも", limit=1)) == 1
+
+def test_rebuild_search_index(search_store):
+    search_store.rebuild_search_index()
+    assert len(search_store.search("じゃがいも")) == 2
+
+def test_to_search_query():
+    assert to_search_query("じゃがいも 牛") == '"じゃ ゃが がい いも" AND "牛"*'
+    assert to_search_query("") == ""